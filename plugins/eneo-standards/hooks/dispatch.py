@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""PreToolUse dispatcher: one process per tool call for every policy.
+
+hooks.json registers dispatch.sh once per matcher (Edit|Write|MultiEdit and
+Bash). It allows the calls no policy can block without leaving bash and
+execs this script for everything else. The payload is parsed once and the
+tool's policies from lib/policies.py run in order (phase-gate, protect-files
+/ bash-firewall). The first block prints its message to stderr and exits 2
+(exit 1 is silently swallowed — GH issue anthropics/claude-code#21988).
+Malformed payloads fail open.
+
+With ENEO_HOOK_DAEMON=1 the payload is forwarded to the session's resident
+daemon (lib/hook_daemon.py) instead, and evaluated here only when the daemon
+is not (yet) reachable.
+
+    dispatch.py                          # policies chosen from tool_name
+    dispatch.py --only protect-files     # one policy (used by the .sh shims)
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+# Make the shared env library importable (runtime path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    only: list[str] = []
+    while args:
+        flag = args.pop(0)
+        if flag == "--only" and args:
+            only.append(args.pop(0))
+        else:
+            print("usage: dispatch.py [--only POLICY]...", file=sys.stderr)
+            return 0  # misconfiguration must not block the tool call
+
+    payload = sys.stdin.buffer.read()
+    relayed = None
+    if os.environ.get("ENEO_HOOK_DAEMON") == "1":
+        import hook_daemon  # type: ignore[import-not-found]
+
+        relayed = hook_daemon.forward(only, payload)
+    if relayed is None:
+        import policies  # type: ignore[import-not-found]
+
+        relayed = policies.handle(payload, tuple(only))
+    code, stderr = relayed
+    sys.stderr.write(stderr)
+    return code
+
+
+if __name__ == "__main__":
+    import hook_trace  # type: ignore[import-not-found]
+
+    sys.exit(hook_trace.run("dispatch", "PreToolUse", main))
@@ -0,0 +1,175 @@
+#!/usr/bin/env bash
+# PreToolUse entry point registered in hooks.json. Tool calls that no policy
+# can block are allowed here, in bash, without jq; everything else is handed
+# unchanged to dispatch.py, which owns the policies, their messages, the
+# decision cache and the daemon. A Python start-up costs ~70ms per tool call
+# on a slow sandbox; this path costs a few.
+#
+# Allowed here (exit 0):
+#   - Edit|Write|MultiEdit whose file_path is in no class of
+#     lib/path-policy.json, or only in test/src while the phase cannot block it;
+#   - Bash whose command has no '`', '<<' or '>' (beyond `2>&1` and
+#     `>/dev/null`-style redirects) and, quotes removed, none of the words
+#     that policies.shell_targets() treats as writers, so it has no targets.
+# Everything else goes to dispatch.py: \u escapes in the JSON, a key that
+# appears twice, a repo override in .claude/config/path-policy.json, and any
+# call that might be blocked.
+
+set -euo pipefail
+source "$(dirname "${BASH_SOURCE[0]}")/lib/env.sh"
+eneo_trace_begin dispatch PreToolUse
+
+HOOK_DIR="$(dirname "${BASH_SOURCE[0]}")"
+# Substrings of every command name policies._command_targets acts on; "sh"
+# covers bash/zsh/dash/ksh and "rm" covers `git rm`.
+WRITER_WORDS=(tee sed cp mv install ln dd truncate rm sh eval)
+PROTECTED_CLASSES=" secret lockfile ratchet hook_cache phase_mirror "
+
+delegate() {
+  trap - EXIT
+  exec python3 "$HOOK_DIR/dispatch.py" <<<"$PAYLOAD"
+}
+
+# delegate, for a payload only partly read from stdin.
+delegate_rest() {
+  trap - EXIT
+  exec python3 "$HOOK_DIR/dispatch.py" < <(printf '%s' "$PAYLOAD"; exec cat)
+}
+
+# json_string KEY: REPLY = the value of KEY when it is a string and "KEY"
+# occurs once in the payload. Inside a JSON string every '"' follows a
+# backslash, so an unescaped "KEY" is always structural. \uXXXX, \b and \f
+# are left to Python.
+json_string() {
+  local key="\"$1\"" head rest raw="" chunk out="" esc n
+  head="${PAYLOAD%%"$key"*}"
+  (( ${#head} < ${#PAYLOAD} )) || return 1
+  rest="${PAYLOAD:${#head}+${#key}}"
+  [[ "$rest" != *"$key"* ]] || return 1
+  rest="${rest#"${rest%%[![:space:]]*}"}"
+  [[ "$rest" == :* ]] || return 1
+  rest="${rest:1}"
+  rest="${rest#"${rest%%[![:space:]]*}"}"
+  [[ "$rest" == \"* ]] || return 1
+  rest="${rest:1}"
+  # The value ends at the first quote after an even run of backslashes.
+  while [[ "$rest" == *\"* ]]; do
+    chunk="${rest%%\"*}"
+    rest="${rest:${#chunk}+1}"
+    raw+="$chunk"
+    n=0
+    while (( n < ${#chunk} )) && [[ "${chunk:${#chunk}-n-1:1}" == \\ ]]; do
+      n=$(( n + 1 ))
+    done
+    if (( n % 2 == 0 )); then
+      while [[ "$raw" == *\\* ]]; do
+        chunk="${raw%%\\*}"
+        out+="$chunk"
+        raw="${raw:${#chunk}+1}"
+        esc="${raw:0:1}"
+        raw="${raw:1}"
+        case "$esc" in
+          \"|\\|/) out+="$esc" ;;
+          n) out+=$'\n' ;;
+          t) out+=$'\t' ;;
+          r) out+=$'\r' ;;
+          *) return 1 ;;
+        esac
+      done
+      REPLY="$out$raw"
+      return 0
+    fi
+    raw+='"'
+  done
+  return 1
+}
+
+# path_classes PATH: REPLY = " class class ... " from lib/path-policy.json.
+# Fails when the table cannot be read here exactly as path_policy.py does.
+path_classes() {
+  local path="$1" policy body list name glob
+  local class_re='"([A-Za-z_][A-Za-z0-9_]*)"[[:space:]]*:[[:space:]]*\[([^]]*)\]' glob_re='"([^"]*)"'
+  IFS= read -r -d '' policy < "$HOOK_DIR/lib/path-policy.json" || true
+  [[ "$policy" != *\\* && "$policy" =~ \"classes\"[[:space:]]*:[[:space:]]*\{([^{}]*)\} ]] || return 1
+  body="${BASH_REMATCH[1]}"
+  REPLY=" "
+  while [[ "$body" =~ $class_re ]]; do
+    name="${BASH_REMATCH[1]}"
+    list="${BASH_REMATCH[2]}"
+    body="${body#*"${BASH_REMATCH[0]}"}"
+    while [[ "$list" =~ $glob_re ]]; do
+      glob="${BASH_REMATCH[1]}"
+      list="${list#*"${BASH_REMATCH[0]}"}"
+      # fnmatch and bash read '[' classes differently; leave those to Python.
+      [[ "$glob" != *\[* ]] || return 1
+      # shellcheck disable=SC2053  # unquoted: $glob is the pattern
+      if [[ "$path" == $glob ]]; then
+        REPLY+="$name "
+        break
+      fi
+    done
+  done
+}
+
+task_phase() {
+  if (( ENEO_CTX_VALID )); then
+    REPLY="$ENEO_CTX_PHASE"
+    return
+  fi
+  REPLY=""
+  read -r REPLY 2>/dev/null < "$ENEO_REPO_ROOT/.claude/state/phase" || true
+  REPLY="${REPLY:-FREE}"
+}
+
+edit_allowed() {
+  local path is_test=0 is_src=0
+  json_string file_path || return 1
+  path="$REPLY"
+  [[ -n "$path" ]] || return 0
+  _eneo_repo_root_lookup
+  [[ ! -e "$ENEO_REPO_ROOT/.claude/config/path-policy.json" ]] || return 1
+  path_classes "$path" || return 1
+  local classes="$REPLY" class
+  for class in $PROTECTED_CLASSES; do
+    [[ "$classes" != *" $class "* ]] || return 1
+  done
+  [[ "$classes" != *" test "* ]] || is_test=1
+  (( is_test )) || [[ "$classes" != *" src "* ]] || is_src=1
+  (( is_test || is_src )) || return 0
+  task_phase
+  ! { [[ "$REPLY" == GREEN ]] && (( is_test )); } && ! { [[ "$REPLY" == RED ]] && (( is_src )); }
+}
+
+bash_allowed() {
+  local cmd word
+  local quiet_re='(^|[[:space:]])([0-9]*(>>?|&>>?)[[:space:]]*/dev/null|[0-9]*>&[0-9]+)([[:space:];|&)]|$)'
+  json_string command || return 1
+  cmd="$REPLY"
+  [[ "$cmd" != *[\`]* && "$cmd" != *"<<"* ]] || return 1
+  # 2>&1, >/dev/null and friends write nothing a policy protects.
+  while [[ "$cmd" =~ $quiet_re ]]; do
+    cmd="${cmd/"${BASH_REMATCH[0]}"/ }"
+  done
+  [[ "$cmd" != *">"* ]] || return 1
+  # Quotes and backslashes can spell a word in pieces (r"m"); drop them.
+  cmd="${cmd//[\"\'\\]/}"
+  for word in "${WRITER_WORDS[@]}"; do
+    [[ "$cmd" != *"$word"* ]] || return 1
+  done
+}
+
+# read takes a byte per syscall from a pipe and bash's # and %% go quadratic
+# on long strings, so payloads over 16k (large Writes) go straight to Python.
+# read -N needs bash 4.1; older bash (stock macOS) hands every call over.
+PAYLOAD=""
+(( BASH_VERSINFO[0] * 100 + BASH_VERSINFO[1] >= 401 )) || delegate_rest
+IFS= read -r -N 16385 -d '' PAYLOAD || true
+(( ${#PAYLOAD} <= 16384 )) || delegate_rest
+
+json_string tool_name || delegate
+case "$REPLY" in
+  Edit|Write|MultiEdit) edit_allowed || delegate ;;
+  Bash) bash_allowed || delegate ;;
+  *) delegate ;;
+esac
+exit 0
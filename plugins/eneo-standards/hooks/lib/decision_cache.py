@@ -0,0 +1,182 @@
+"""Per-session memo of PreToolUse decisions (.claude/state/.cache/decisions.json).
+
+Agents re-run the same Bash command and re-edit the same file many times in
+one TDD phase. policies.handle() looks the decision up here before running
+any policy and stores it afterwards, keyed on the phase, the policy names
+and the command or file path. Only allows are stored: a block is rare, cheap
+to recompute, and names the task slug. The file is a MAC line followed by
+one JSON object,
+
+    <blake2b MAC of the JSON, hex>
+    {"v": 2, "rules": "<policies.rules_version()>", "entries": {key: [0, ""], ...}}
+
+with entries in least- to most-recently-used order, capped at
+ENEO_DECISION_CACHE_SIZE (default 256). A rules version other than the
+caller's discards every entry, so editing a policy never serves a stale
+answer. eneo_phase_set, eneo_task_init and eneo_task_clear delete the file;
+ENEO_DECISION_CACHE=0 disables it.
+
+The path is also in the "hook_cache" class of path-policy.json, so the
+agent's Edit/Write and bash writes to it are blocked; the MAC covers every
+other way of writing it. Its key is 32 random bytes in
+${TMPDIR:-/tmp}/eneo-decisions.<uid>/key, used only when the directory is
+ours and mode 0700, as env.py treats the root cache. A file whose MAC does
+not verify is ignored and overwritten.
+
+Cache keys are stored verbatim rather than hashed, and the MAC comes from the
+builtin _blake2 module: importing hashlib costs more than most lookups
+save. Commands longer than _MAX_KEY are not cached.
+
+The hook daemon does not use this file; it answers from warm state.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+
+CACHE_VERSION = 2
+DECISIONS_RELPATH = os.path.join(".claude", "state", ".cache", "decisions.json")
+_MAX_KEY = 1024
+_KEY_BYTES = 32
+
+
+def enabled() -> bool:
+    return os.environ.get("ENEO_DECISION_CACHE", "1") != "0"
+
+
+def _size() -> int:
+    try:
+        return max(1, int(os.environ.get("ENEO_DECISION_CACHE_SIZE", "256")))
+    except ValueError:
+        return 256
+
+
+def key(phase: str, names: tuple[str, ...], subject: str) -> str | None:
+    """Cache key for *subject* (a command or file path), or None if too long."""
+    entry = f"{phase}\x1f{','.join(names)}\x1f{subject}"
+    return entry if len(entry) <= _MAX_KEY else None
+
+
+def read_phase(root: str) -> str:
+    """The phase mirror, read directly (env.phase() without the env import)."""
+    try:
+        with open(os.path.join(root, ".claude", "state", "phase"), encoding="utf-8") as handle:
+            return handle.read().strip() or "FREE"
+    except OSError:
+        return "FREE"
+
+
+def _ours(st: os.stat_result, *, directory: bool) -> bool:
+    if st.st_uid != os.getuid():
+        return False
+    if directory:
+        return stat.S_ISDIR(st.st_mode) and not st.st_mode & 0o077
+    return stat.S_ISREG(st.st_mode)
+
+
+def _secret() -> bytes | None:
+    """This user's MAC key, created on first use; None if it cannot be trusted."""
+    tmp = (os.environ.get("TMPDIR") or "/tmp").rstrip("/") or "/"
+    directory = os.path.join(tmp, f"eneo-decisions.{os.getuid()}")
+    path = os.path.join(directory, "key")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+    try:
+        if not _ours(os.lstat(directory), directory=True):
+            return None
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(os.urandom(_KEY_BYTES))
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+        with os.fdopen(fd, "rb") as handle:
+            if not _ours(os.fstat(handle.fileno()), directory=False):
+                return None
+            secret = handle.read(_KEY_BYTES + 1)
+    except OSError:
+        return None
+    return secret if len(secret) == _KEY_BYTES else None
+
+
+def _mac(secret: bytes, body: str) -> str:
+    try:
+        from _blake2 import blake2b
+    except ImportError:
+        from hashlib import blake2b
+    return blake2b(body.encode("utf-8"), key=secret, digest_size=16).hexdigest()
+
+
+def _load(path: str, rules: str, secret: bytes) -> dict[str, list]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            mac, _, body = handle.read().partition("\n")
+        if mac != _mac(secret, body):
+            return {}
+        data = json.loads(body)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("v") != CACHE_VERSION or data.get("rules") != rules:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save(path: str, rules: str, entries: dict[str, list], secret: bytes) -> None:
+    body = json.dumps({"v": CACHE_VERSION, "rules": rules, "entries": entries}, separators=(",", ":"))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            handle.write(f"{_mac(secret, body)}\n{body}")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def lookup(root: str, rules: str, cache_key: str) -> tuple[int, str] | None:
+    """Return the cached (exit code, stderr) for *cache_key*, or None."""
+    secret = _secret()
+    if secret is None:
+        return None
+    path = os.path.join(root, DECISIONS_RELPATH)
+    entries = _load(path, rules, secret)
+    hit = entries.get(cache_key)
+    if hit != [0, ""]:
+        return None
+    # Refresh recency only when the entry has drifted into the older half,
+    # so a run of repeated calls does not rewrite the file every time.
+    keys = list(entries)
+    if keys.index(cache_key) < len(keys) // 2:
+        entries[cache_key] = entries.pop(cache_key)
+        _save(path, rules, entries, secret)
+    return 0, ""
+
+
+def store(root: str, rules: str, cache_key: str, decision: tuple[int, str]) -> None:
+    """Remember *decision* for *cache_key* if it is an allow."""
+    secret = _secret()
+    if secret is None or decision != (0, ""):
+        return
+    path = os.path.join(root, DECISIONS_RELPATH)
+    entries = _load(path, rules, secret)
+    entries.pop(cache_key, None)
+    entries[cache_key] = [0, ""]
+    for stale in list(entries)[: max(0, len(entries) - _size())]:
+        del entries[stale]
+    _save(path, rules, entries, secret)
+
+
+def invalidate(root: str) -> None:
+    try:
+        os.unlink(os.path.join(root, DECISIONS_RELPATH))
+    except OSError:
+        pass
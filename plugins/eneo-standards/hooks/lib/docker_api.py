@@ -0,0 +1,194 @@
+"""Minimal Docker Engine API client over the local unix socket.
+
+env.py uses this instead of forking the `docker` CLI when ENEO_DOCKER_API=1
+and the daemon socket exists (`DOCKER_HOST=unix://...`, else
+/var/run/docker.sock). Only the calls the harness needs are implemented:
+listing running containers (name and ID) and running a command through an exec
+session.
+
+Failures raise DockerAPIError so callers can fall back to the CLI; the
+DockerAPIExecLost subclass marks failures after a command was started, which
+must not be retried.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import socket
+import struct
+import sys
+from urllib.parse import quote
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+
+class DockerAPIError(Exception):
+    """The socket is unreachable or the daemon returned an unexpected reply."""
+
+
+class DockerAPITimeout(DockerAPIError):
+    """An exec session did not finish within the requested timeout."""
+
+
+class DockerAPIExecLost(DockerAPIError):
+    """The exec session started but its result could not be read.
+
+    Unlike a plain DockerAPIError the command may already have run, so callers
+    must not retry it through the CLI.
+    """
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float | None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+def socket_path() -> str | None:
+    """Return the daemon socket path if DOCKER_HOST points at a unix socket."""
+    host = os.environ.get("DOCKER_HOST") or f"unix://{DEFAULT_SOCKET}"
+    if not host.startswith("unix://"):
+        return None
+    return host[len("unix://"):]
+
+
+def available() -> bool:
+    """True when the API client is enabled and the socket exists."""
+    if os.environ.get("ENEO_DOCKER_API", "0") != "1":
+        return False
+    path = socket_path()
+    return bool(path) and os.path.exists(path)
+
+
+def _request(
+    method: str,
+    path: str,
+    body: dict | None = None,
+    *,
+    timeout: float | None = 5,
+) -> tuple[int, bytes]:
+    sock = socket_path()
+    if not sock:
+        raise DockerAPIError("DOCKER_HOST is not a unix socket")
+    conn = _UnixHTTPConnection(sock, timeout)
+    headers = {"Host": "docker"}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    try:
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    except socket.timeout as exc:
+        raise DockerAPITimeout(f"{method} {path} timed out") from exc
+    except (OSError, http.client.HTTPException) as exc:
+        raise DockerAPIError(f"{method} {path} failed: {exc}") from exc
+    finally:
+        conn.close()
+
+
+def _json(status: int, data: bytes, expected: tuple[int, ...]) -> object:
+    if status not in expected:
+        raise DockerAPIError(f"unexpected status {status}: {data[:200]!r}")
+    try:
+        return json.loads(data or b"null")
+    except json.JSONDecodeError as exc:
+        raise DockerAPIError(f"invalid JSON reply: {exc}") from exc
+
+
+def list_containers() -> list[tuple[str, str]]:
+    """(name, short id) of running containers, in `docker ps` order."""
+    containers = _json(*_request("GET", "/containers/json"), (200,))
+    rows: list[tuple[str, str]] = []
+    for container in containers if isinstance(containers, list) else []:
+        for name in container.get("Names") or []:
+            rows.append((name.lstrip("/"), str(container.get("Id") or "")[:12]))
+            break
+    return rows
+
+
+def list_container_names() -> list[str]:
+    """Names of running containers, in the order `docker ps` prints them."""
+    return [name for name, _ in list_containers()]
+
+
+def _demux(stream: bytes) -> tuple[bytes, bytes]:
+    """Split Docker's multiplexed exec stream into (stdout, stderr)."""
+    out = bytearray()
+    err = bytearray()
+    offset = 0
+    while offset + 8 <= len(stream):
+        kind, size = struct.unpack(">BxxxL", stream[offset:offset + 8])
+        chunk = stream[offset + 8:offset + 8 + size]
+        (err if kind == 2 else out).extend(chunk)
+        offset += 8 + size
+    return bytes(out), bytes(err)
+
+
+def exec_run(
+    container: str,
+    cmd: list[str],
+    *,
+    workdir: str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    capture: bool = True,
+) -> tuple[int, str, str]:
+    """Run *cmd* inside *container* and return (exit_code, stdout, stderr).
+
+    With capture=False the output is written to this process's stdout/stderr
+    instead, mirroring a non-captured `docker exec`.
+    """
+    create: dict[str, object] = {
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "Tty": False,
+        "Cmd": cmd,
+    }
+    if workdir:
+        create["WorkingDir"] = workdir
+    if env:
+        create["Env"] = [f"{key}={value}" for key, value in env.items()]
+
+    created = _json(
+        *_request("POST", f"/containers/{quote(container, safe='')}/exec", create),
+        (200, 201),
+    )
+    exec_id = created.get("Id") if isinstance(created, dict) else None
+    if not exec_id:
+        raise DockerAPIError("exec create returned no Id")
+
+    try:
+        status, stream = _request(
+            "POST", f"/exec/{exec_id}/start", {"Detach": False, "Tty": False}, timeout=timeout
+        )
+        if status != 200:
+            raise DockerAPIExecLost(f"exec start returned {status}")
+        out, err = _demux(stream)
+
+        inspected = _json(*_request("GET", f"/exec/{exec_id}/json"), (200,))
+        exit_code = inspected.get("ExitCode") if isinstance(inspected, dict) else None
+        if exit_code is None:
+            raise DockerAPIExecLost("exec inspect returned no ExitCode")
+    except (DockerAPITimeout, DockerAPIExecLost):
+        raise
+    except DockerAPIError as exc:
+        raise DockerAPIExecLost(str(exc)) from exc
+
+    stdout = out.decode("utf-8", errors="replace")
+    stderr = err.decode("utf-8", errors="replace")
+    if not capture:
+        sys.stdout.write(stdout)
+        sys.stdout.flush()
+        sys.stderr.write(stderr)
+        sys.stderr.flush()
+    return int(exit_code), stdout, stderr
@@ -4,6 +4,13 @@ Ports `find_repo_root()` + devcontainer detection from the legacy checker
 plugin (plugins/checker/hooks/typecheck-stop.py) and adds the Decision 0.2
 dual-mode execution wrapper so Python hooks have the same API as bash.
 
+When ENEO_EXEC_AGENT=1, host-with-docker commands are sent to a persistent
+agent inside the devcontainer (exec_agent.py) so they skip the per-call
+`docker exec` + login shell; unavailable agents fall back transparently.
+When ENEO_DOCKER_API=1 and the daemon socket exists, container listing and
+exec go through docker_api.py (Docker Engine API over the unix socket) instead
+of forking the docker CLI; any API failure falls back to the CLI.
+
 Import from a hook with:
 
     import sys
@@ -16,8 +23,29 @@ from __future__ import annotations
 
 import json
 import os
+import re
+import shlex
+import signal
+import stat
 import subprocess
+import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, NamedTuple, Sequence
+
+# asyncio, concurrent.futures, hashlib, docker_api and exec_agent are imported
+# inside the functions that need them: together they cost ~100ms at import
+# time, and the PreToolUse dispatcher only needs detection and path helpers.
+if TYPE_CHECKING:
+    import asyncio
+
+# ENEO_HOOK_PROFILE counts every subprocess this hook starts (see env.sh).
+if os.environ.get("ENEO_HOOK_PROFILE", "0") != "0":
+    import hook_profile
+
+    hook_profile.install()
 
 
 def _is_eneo_candidate(name: str) -> bool:
@@ -39,12 +67,258 @@ def _preferred_eneo_container(names: list[str]) -> str | None:
     return None
 
 
+# --- Session-scoped detection cache ------------------------------------------
+# Shared with env.sh: .claude/state/.cache/env.json holds the result of one
+# `docker ps` probe as a single compact JSON line (fixed key order so bash can
+# parse it without jq). See the matching block in env.sh for invalidation.
+ENV_CACHE_VERSION = 3
+_docker_probe_memo: tuple[str, str, str] | None = None
+
+
+def _session_id() -> str:
+    return os.environ.get("ENEO_SESSION_ID") or os.environ.get("CLAUDE_SESSION_ID") or ""
+
+
+def _docker_socket() -> str | None:
+    host = os.environ.get("DOCKER_HOST") or "unix:///var/run/docker.sock"
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    return None
+
+
+def env_cache_file() -> Path | None:
+    """Return the detection cache path, or None outside an Eneo repo."""
+    if os.environ.get("ENEO_ENV_CACHE", "1") == "0":
+        return None
+    root = find_repo_root()
+    if not root:
+        return None
+    return Path(root) / ".claude" / "state" / ".cache" / "env.json"
+
+
+def _read_env_cache(path: Path) -> dict | None:
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(entry, dict) or entry.get("v") != ENV_CACHE_VERSION:
+        return None
+    return entry
+
+
+def _write_env_cache(path: Path, entry: dict) -> None:
+    ordered = {
+        "v": ENV_CACHE_VERSION,
+        "session": _session_id(),
+        "ts": int(entry["ts"]),
+        "mode": entry["mode"],
+        "container": entry["container"],
+        "misses": int(entry.get("misses", 0)),
+        "cid": entry.get("cid", ""),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}")
+        tmp.write_text(json.dumps(ordered, separators=(",", ":")) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _env_cache_valid(path: Path, entry: dict, now: float) -> bool:
+    session = _session_id()
+    if session and entry.get("session") != session:
+        return False
+    ttl = float(os.environ.get("ENEO_ENV_CACHE_TTL", "30"))
+    if now - float(entry.get("ts", 0)) >= ttl:
+        return False
+    sock = _docker_socket()
+    if sock:
+        try:
+            if os.stat(sock).st_mtime > path.stat().st_mtime:
+                return False  # daemon restarted since the entry was written
+        except OSError:
+            pass
+    return True
+
+
+def _env_cache_hits_file(path: Path) -> Path:
+    """.claude/stats/env-cache-hits: one byte appended per hit, as env.sh does."""
+    return path.parents[2] / "stats" / "env-cache-hits"
+
+
+def env_cache_stats() -> dict[str, int]:
+    path = env_cache_file()
+    entry = _read_env_cache(path) if path else None
+    try:
+        hits = _env_cache_hits_file(path).stat().st_size if path else 0
+    except OSError:
+        hits = 0
+    return {"hits": hits, "misses": int(entry.get("misses", 0)) if entry else 0}
+
+
+def _running_containers() -> list[tuple[str, str]]:
+    """List running (name, short id) pairs via the Engine API, else `docker ps`."""
+    import docker_api
+
+    if docker_api.available():
+        try:
+            return docker_api.list_containers()
+        except docker_api.DockerAPIError:
+            pass
+    try:
+        ps = subprocess.run(
+            ["docker", "ps", "--format", "{{.Names}}\t{{.ID}}"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return []
+    if ps.returncode != 0:
+        return []
+    rows = []
+    for line in ps.stdout.splitlines():
+        name, _, cid = line.partition("\t")
+        rows.append((name, cid))
+    return rows
+
+
+def _running_container_names() -> list[str]:
+    return [name for name, _ in _running_containers()]
+
+
+def _docker_probe() -> tuple[str, str, str]:
+    """Return (mode, container, container id) for the host, using the shared cache."""
+    global _docker_probe_memo
+    if _docker_probe_memo is not None:
+        return _docker_probe_memo
+
+    now = time.time()
+    path = env_cache_file()
+    entry = _read_env_cache(path) if path else None
+    if path and entry and _env_cache_valid(path, entry, now):
+        hits = _env_cache_hits_file(path)
+        if hits.parent.is_dir():
+            try:
+                with open(hits, "ab") as handle:
+                    handle.write(b".")
+            except OSError:
+                pass
+        _docker_probe_memo = (str(entry["mode"]), str(entry["container"]), str(entry.get("cid", "")))
+        return _docker_probe_memo
+
+    mode, container, cid = "native", "", ""
+    rows = _running_containers()
+    selected = _preferred_eneo_container([name for name, _ in rows])
+    if selected:
+        mode, container = "host-with-docker", selected
+        cid = dict(rows).get(selected, "")
+
+    if path:
+        _write_env_cache(
+            path,
+            {
+                "ts": now,
+                "mode": mode,
+                "container": container,
+                "misses": (int(entry.get("misses", 0)) if entry else 0) + 1,
+                "cid": cid,
+            },
+        )
+    _docker_probe_memo = (mode, container, cid)
+    return _docker_probe_memo
+
+
+# --- Hook time budget --------------------------------------------------------
+# hooks.json kills a hook at its timeout. A hook that declares its budget with
+# budget_start() gets every eneo_exec* timeout clipped to what is left, and
+# asks budget_allows() before optional work, so it degrades (skips a probe,
+# serves a stale cache entry) instead of being killed mid-report. The deadline
+# is exported as ENEO_BUDGET_DEADLINE (epoch seconds), so bash helpers and
+# child processes share it; env.sh has the matching eneo_budget_* functions.
+# Every budget-driven degradation goes to stderr and to
+# .claude/stats/hook-budget.jsonl. ENEO_HOOK_BUDGET=0 disables the layer.
+BUDGET_LOG_RELPATH = os.path.join(".claude", "stats", "hook-budget.jsonl")
+
+
+def budget_start(seconds: float, hook: str) -> None:
+    """Start *hook*'s budget: its hooks.json timeout minus a reporting reserve."""
+    if os.environ.get("ENEO_HOOK_BUDGET") == "0":
+        return
+    reserve = min(max(seconds * 0.1, 1.0), 15.0)
+    os.environ["ENEO_BUDGET_DEADLINE"] = f"{time.time() + seconds - reserve:.3f}"
+    os.environ["ENEO_BUDGET_HOOK"] = hook
+
+
+def budget_remaining() -> float | None:
+    """Seconds left in the current hook's budget, or None without one."""
+    raw = os.environ.get("ENEO_BUDGET_DEADLINE")
+    if not raw or os.environ.get("ENEO_HOOK_BUDGET") == "0":
+        return None
+    try:
+        return float(raw) - time.time()
+    except ValueError:
+        return None
+
+
+def budget_degrade(action: str, detail: str = "") -> None:
+    """Log one budget-driven degradation; never raises."""
+    hook = os.environ.get("ENEO_BUDGET_HOOK", "")
+    remaining = budget_remaining()
+    left = f"{remaining:.1f}s left" if remaining is not None else "no budget"
+    print(f"[eneo-budget] {hook or 'hook'}: {action} ({left}{'; ' + detail if detail else ''})", file=sys.stderr)
+    root = find_repo_root()
+    if not root:
+        return
+    record = {
+        "hook": hook,
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "action": action,
+        "remaining_s": None if remaining is None else round(remaining, 3),
+        "detail": detail,
+    }
+    path = Path(root) / BUDGET_LOG_RELPATH
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except OSError:
+        pass
+
+
+def budget_allows(seconds: float, action: str) -> bool:
+    """True when *seconds* fit in the budget; otherwise log *action* and return False."""
+    remaining = budget_remaining()
+    if remaining is None or remaining >= seconds:
+        return True
+    budget_degrade(action, f"needs {seconds:g}s")
+    return False
+
+
+def budget_timeout(timeout: float | None, what: str = "command") -> float | None:
+    """*timeout* clipped to the remaining budget (logged when it shrinks)."""
+    remaining = budget_remaining()
+    if remaining is None:
+        return timeout
+    clipped = max(remaining, 0.1)
+    if timeout is None:
+        return clipped
+    if clipped < timeout:
+        budget_degrade(f"clipped {what} timeout", f"{timeout:g}s -> {clipped:.1f}s")
+        return clipped
+    return timeout
+
+
 # --- Environment detection ---------------------------------------------------
 def detect_env() -> str:
     """Return: in-container | host-with-docker | native | disabled."""
     mode = os.environ.get("ENEO_DEVCONTAINER_MODE", "").strip()
     if mode:
         return mode
+    ctx = _context()
+    if ctx:
+        return ctx["mode"]
 
     if (
         Path("/.dockerenv").exists()
@@ -55,44 +329,65 @@ def detect_env() -> str:
 
     # Only consider host-with-docker if docker is installed AND an eneo
     # container name is running.
-    try:
-        ps = subprocess.run(
-            ["docker", "ps", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if ps.returncode == 0 and _preferred_eneo_container(ps.stdout.splitlines()):
-            return "host-with-docker"
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        pass
+    return _docker_probe()[0]
 
-    return "native"
 
+def eneo_container_name() -> str | None:
+    """Cached lookup of the first eneo-ish container currently running."""
+    ctx = _context()
+    if ctx:
+        return ctx["container"] or None
+    return _docker_probe()[1] or None
 
-_container_name_cache: str | None = None
 
+def eneo_container_id() -> str | None:
+    """Short ID of the container eneo_container_name() selected."""
+    ctx = _context()
+    if ctx:
+        return ctx["cid"] or None
+    return _docker_probe()[2] or None
 
-def eneo_container_name() -> str | None:
-    """Cached lookup of the first eneo-ish container currently running."""
-    global _container_name_cache
-    if _container_name_cache is not None:
-        return _container_name_cache or None
-    try:
-        ps = subprocess.run(
-            ["docker", "ps", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        selected = _preferred_eneo_container(ps.stdout.splitlines())
-        if selected:
-            _container_name_cache = selected
-            return selected
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        pass
-    _container_name_cache = ""
-    return None
+
+def _container_shell(cmd: list[str]) -> list[str]:
+    """Wrap *cmd* in the login shell + PATH setup the devcontainer expects."""
+    return ["bash", "-lc", 'export PATH=/home/vscode/.local/bin:$PATH; "$@"', "bash", *cmd]
+
+
+def _docker_exec_argv(container: str, workdir: str, cmd: list[str]) -> list[str]:
+    return ["docker", "exec", "-w", f"/workspace/{workdir}", container, *_container_shell(cmd)]
+
+
+def _exec_argv(workdir: str, cmd: list[str]) -> tuple[list[str], str | None] | None:
+    """Resolve (argv, cwd) for running *cmd* as a local process in the current
+    mode, or None when the call soft-skips (disabled / no container)."""
+    mode = detect_env()
+    if mode == "disabled":
+        return None
+    if mode in ("in-container", "native"):
+        return cmd, str(Path(find_repo_root() or ".") / workdir)
+    if mode == "host-with-docker":
+        container = eneo_container_name()
+        if not container:
+            return None
+        return _docker_exec_argv(container, workdir, cmd), None
+    return cmd, None
+
+
+def _completed(
+    cmd: list[str],
+    returncode: int,
+    stdout: str,
+    stderr: str,
+    *,
+    capture: bool,
+    check: bool,
+) -> subprocess.CompletedProcess[str]:
+    """Shape an in-process exec result like the subprocess.run it replaces."""
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr)
+    if not capture:
+        return subprocess.CompletedProcess(cmd, returncode)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
 
 
 def eneo_exec(
@@ -107,11 +402,13 @@ def eneo_exec(
 
     Soft-fails with returncode=0 when mode=disabled or host-with-docker cannot
     find a running container — matching the bash `eneo_exec` behavior.
+    *timeout* is clipped to the hook's remaining time budget.
     """
     mode = detect_env()
     root = find_repo_root()
     if mode == "disabled":
         return subprocess.CompletedProcess(cmd, 0, "", "")
+    timeout = budget_timeout(timeout, _tool_name(cmd))
 
     if mode in ("in-container", "native"):
         cwd = Path(root or ".") / workdir
@@ -125,23 +422,49 @@ def eneo_exec(
         )
 
     if mode == "host-with-docker":
+        import docker_api
+        import exec_agent
+
         container = eneo_container_name()
         if not container:
             # fail open on infra
             return subprocess.CompletedProcess(cmd, 0, "", "[eneo-env] no eneo devcontainer running; skipped\n")
+        if os.environ.get("ENEO_EXEC_AGENT") == "1" and root:
+            try:
+                returncode, stdout, stderr, timed_out = exec_agent.dispatch(
+                    root,
+                    container,
+                    workdir,
+                    cmd,
+                    timeout=timeout,
+                    on_output=None if capture else exec_agent.write_through,
+                )
+            except exec_agent.AgentUnavailable:
+                pass  # fall back to docker exec below
+            else:
+                if timed_out:
+                    raise subprocess.TimeoutExpired(cmd, timeout or 0, stdout, stderr)
+                return _completed(cmd, returncode, stdout, stderr, capture=capture, check=check)
+        if docker_api.available():
+            try:
+                returncode, stdout, stderr = docker_api.exec_run(
+                    container,
+                    _container_shell(cmd),
+                    workdir=f"/workspace/{workdir}",
+                    timeout=timeout,
+                    capture=capture,
+                )
+            except docker_api.DockerAPITimeout as exc:
+                raise subprocess.TimeoutExpired(cmd, timeout or 0) from exc
+            except docker_api.DockerAPIExecLost as exc:
+                # fail open on infra; the command may already have run
+                return subprocess.CompletedProcess(cmd, 0, "", f"[eneo-env] docker exec result lost: {exc}\n")
+            except docker_api.DockerAPIError:
+                pass  # fall back to the CLI below
+            else:
+                return _completed(cmd, returncode, stdout, stderr, capture=capture, check=check)
         return subprocess.run(
-            [
-                "docker",
-                "exec",
-                "-w",
-                f"/workspace/{workdir}",
-                container,
-                "bash",
-                "-lc",
-                'export PATH=/home/vscode/.local/bin:$PATH; "$@"',
-                "bash",
-                *cmd,
-            ],
+            _docker_exec_argv(container, workdir, cmd),
             capture_output=capture,
             text=True,
             check=check,
@@ -154,6 +477,480 @@ def eneo_exec(
     )
 
 
+# --- Streaming execution -----------------------------------------------------
+class StreamResult(NamedTuple):
+    returncode: int
+    head: list[str]
+    tail: list[str]
+    total_lines: int
+    log_path: str | None  # full output when tee= was given
+
+    @property
+    def omitted(self) -> int:
+        return self.total_lines - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        """Head and tail joined, with a marker for the lines in between."""
+        lines = list(self.head)
+        if self.omitted > 0:
+            lines.append(f"... {self.omitted} lines omitted ...")
+        lines.extend(self.tail)
+        return "\n".join(lines)
+
+
+def eneo_exec_stream(
+    workdir: str,
+    cmd: list[str],
+    *,
+    on_line: Callable[[str], None] | None = None,
+    head: int = 20,
+    tail: int = 50,
+    tee: str | os.PathLike[str] | None = None,
+    timeout: float | None = None,
+) -> StreamResult:
+    """Run *cmd* like eneo_exec but stream its output in constant memory.
+
+    stdout and stderr are merged. Each line (without its newline) goes to
+    *on_line* as it arrives; only the first *head* and last *tail* lines are
+    kept, and *tee* optionally receives the complete log. Raises
+    subprocess.TimeoutExpired (with the retained text as output) on timeout.
+    """
+    resolved = _exec_argv(workdir, cmd)
+    if resolved is None:
+        note = [] if detect_env() == "disabled" else ["[eneo-env] no eneo devcontainer running; skipped"]
+        return StreamResult(0, note, [], len(note), None)
+    argv, cwd = resolved
+    timeout = budget_timeout(timeout, _tool_name(cmd))
+
+    kept_head: list[str] = []
+    ring: deque[str] = deque(maxlen=max(0, tail))
+    total = 0
+    log = open(tee, "w", encoding="utf-8") if tee else None
+    try:
+        proc = subprocess.Popen(
+            argv,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            start_new_session=True,
+        )
+    except BaseException:
+        if log:
+            log.close()
+        raise
+    timed_out = threading.Event()
+
+    def _expire() -> None:
+        timed_out.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    timer = threading.Timer(timeout, _expire) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        assert proc.stdout is not None
+        for raw in proc.stdout:
+            line = raw.rstrip("\n")
+            total += 1
+            if log:
+                log.write(raw)
+            if len(kept_head) < head:
+                kept_head.append(line)
+            else:
+                ring.append(line)
+            if on_line:
+                on_line(line)
+        returncode = proc.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        if log:
+            log.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    result = StreamResult(returncode, kept_head, list(ring), total, str(tee) if tee else None)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout or 0, output=result.text())
+    return result
+
+
+# --- Async execution ---------------------------------------------------------
+def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def eneo_exec_async(
+    workdir: str,
+    cmd: list[str],
+    *,
+    timeout: float | None = None,
+) -> subprocess.CompletedProcess[str]:
+    """asyncio twin of ``eneo_exec(..., capture=True)``.
+
+    Raises subprocess.TimeoutExpired on timeout. Cancelling the awaiting task
+    kills the local process group (in host-with-docker mode that is the
+    `docker exec` client). Soft-fails with returncode=0 exactly like eneo_exec.
+    """
+    import asyncio
+
+    resolved = _exec_argv(workdir, cmd)
+    if resolved is None:
+        note = "" if detect_env() == "disabled" else "[eneo-env] no eneo devcontainer running; skipped\n"
+        return subprocess.CompletedProcess(cmd, 0, "", note)
+    argv, cwd = resolved
+    timeout = budget_timeout(timeout, _tool_name(cmd))
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill_process_group(proc)
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout or 0) from None
+    except asyncio.CancelledError:
+        _kill_process_group(proc)
+        await proc.wait()
+        raise
+    return subprocess.CompletedProcess(
+        cmd,
+        proc.returncode if proc.returncode is not None else 1,
+        out.decode("utf-8", errors="replace"),
+        err.decode("utf-8", errors="replace"),
+    )
+
+
+_TOOL_PREFIXES = (("uv", "run"), ("bun", "run"), ("bun", "x"), ("python", "-m"), ("python3", "-m"))
+
+
+def _tool_name(cmd: list[str]) -> str:
+    """Name the tool a command runs, looking through `uv run` / `bun x` etc."""
+    rest = list(cmd)
+    stripped = True
+    while stripped and len(rest) > 2:
+        stripped = False
+        for prefix in _TOOL_PREFIXES:
+            if tuple(rest[:2]) == prefix:
+                rest = rest[2:]
+                stripped = True
+                break
+    if rest and rest[0] in ("bunx", "npx") and len(rest) > 1:
+        rest = rest[1:]
+    return os.path.basename(rest[0]) if rest else ""
+
+
+class ExecScheduler:
+    """Bounded-concurrency runner for eneo_exec_async jobs.
+
+    *limits* caps concurrent jobs per (workdir, tool), e.g.
+    ``{"pytest": 1, "pyright": 2}``; other tools get *default_limit*. The tool
+    is resolved through `uv run` / `bun x` / `python -m` prefixes.
+    """
+
+    def __init__(self, limits: dict[str, int] | None = None, *, default_limit: int = 4) -> None:
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._semaphores: dict[tuple[str, str], asyncio.Semaphore] = {}
+
+    def _semaphore(self, workdir: str, cmd: list[str]) -> asyncio.Semaphore:
+        import asyncio
+
+        tool = _tool_name(cmd)
+        key = (workdir, tool)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(max(1, self.limits.get(tool, self.default_limit)))
+        return self._semaphores[key]
+
+    async def run(
+        self, workdir: str, cmd: list[str], *, timeout: float | None = None
+    ) -> subprocess.CompletedProcess[str]:
+        async with self._semaphore(workdir, cmd):
+            return await eneo_exec_async(workdir, cmd, timeout=timeout)
+
+    async def run_all(
+        self,
+        jobs: Sequence[tuple[str, list[str]]],
+        *,
+        fail_fast: bool = False,
+        timeout: float | None = None,
+    ) -> list[subprocess.CompletedProcess[str] | None]:
+        """Run *jobs* and return results in job order.
+
+        With fail_fast, the first non-zero exit (or timeout) cancels every job
+        still queued or running; cancelled jobs come back as None. A timed-out
+        job is reported as returncode 124.
+        """
+        import asyncio
+
+        async def guarded(workdir: str, cmd: list[str]) -> subprocess.CompletedProcess[str]:
+            try:
+                return await self.run(workdir, cmd, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return subprocess.CompletedProcess(cmd, 124, "", f"[eneo-env] timed out after {timeout}s\n")
+            except OSError as exc:
+                return subprocess.CompletedProcess(cmd, 127, "", f"[eneo-env] {exc}\n")
+
+        tasks = [asyncio.ensure_future(guarded(workdir, list(cmd))) for workdir, cmd in jobs]
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if fail_fast and any(task.result().returncode != 0 for task in done):
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        return [
+            task.result() if task.done() and not task.cancelled() else None
+            for task in tasks
+        ]
+
+
+# --- Batched execution -------------------------------------------------------
+class ExecResult(NamedTuple):
+    workdir: str
+    argv: list[str]
+    returncode: int
+    output: str  # stdout and stderr interleaved
+    duration: float  # seconds
+
+
+_JOB_MARKER = "\x1eENEO-JOB"
+_JOB_MARKER_RE = re.compile(r"\n?\x1eENEO-JOB (\d+) (-?\d+) (\S+) (\S+)\n")
+
+
+def _run_local_job(root: str | None, workdir: str, cmd: list[str], timeout: float | None) -> ExecResult:
+    started = time.monotonic()
+    try:
+        proc = subprocess.run(
+            cmd,
+            cwd=str(Path(root or ".") / workdir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+        returncode, output = proc.returncode, proc.stdout or ""
+    except subprocess.TimeoutExpired:
+        returncode, output = 124, f"[eneo-env] timed out after {timeout}s\n"
+    except OSError as exc:
+        returncode, output = 127, f"[eneo-env] {exc}\n"
+    return ExecResult(workdir, cmd, returncode, output, time.monotonic() - started)
+
+
+def _batch_script(jobs: Sequence[tuple[str, list[str]]], timeout: float | None) -> str:
+    """Shell script that runs every job in one container entry, each followed
+    by a marker line carrying its index, exit code, and start/end timestamps."""
+    limit = f"timeout {timeout:g} " if timeout else ""
+    lines = [
+        "__eneo_job() {",
+        '  local i="$1" wd="$2" start rc; shift 2',
+        '  start="${EPOCHREALTIME:-$(date +%s.%N)}"',
+        f'  ( cd "/workspace/$wd" && {limit}"$@" ) 2>&1; rc=$?',
+        f"  printf '\\n{_JOB_MARKER} %s %s %s %s\\n' \"$i\" \"$rc\" \"$start\" \"${{EPOCHREALTIME:-$(date +%s.%N)}}\"",
+        "}",
+    ]
+    for index, (workdir, cmd) in enumerate(jobs):
+        lines.append(" ".join(["__eneo_job", str(index), shlex.quote(workdir), *map(shlex.quote, cmd)]))
+    return "\n".join(lines) + "\n"
+
+
+def _parse_batch(jobs: Sequence[tuple[str, list[str]]], stdout: str) -> list[ExecResult]:
+    results: dict[int, ExecResult] = {}
+    offset = 0
+    for match in _JOB_MARKER_RE.finditer(stdout):
+        index = int(match.group(1))
+        try:
+            duration = float(match.group(4).replace(",", ".")) - float(match.group(3).replace(",", "."))
+        except ValueError:
+            duration = 0.0
+        if index < len(jobs):
+            workdir, cmd = jobs[index]
+            results[index] = ExecResult(workdir, cmd, int(match.group(2)), stdout[offset:match.start()], duration)
+        offset = match.end()
+    return [
+        results.get(index)
+        or ExecResult(workdir, cmd, 124, "[eneo-env] batch ended before this job reported\n", 0.0)
+        for index, (workdir, cmd) in enumerate(jobs)
+    ]
+
+
+def eneo_exec_many(
+    jobs: Sequence[tuple[str, list[str]]],
+    *,
+    timeout: float | None = None,
+) -> list[ExecResult]:
+    """Run several (workdir, argv) jobs and return one ExecResult per job.
+
+    native / in-container: jobs run concurrently. host-with-docker: all jobs
+    run sequentially inside a single container entry, so the `docker exec` +
+    login-shell cost is paid once instead of per probe. *timeout* applies to
+    each job. Soft-fails like eneo_exec (returncode=0) when disabled or no
+    container is running.
+    """
+    jobs = [(workdir, list(cmd)) for workdir, cmd in jobs]
+    if not jobs:
+        return []
+    mode = detect_env()
+    root = find_repo_root()
+    if mode == "disabled":
+        return [ExecResult(workdir, cmd, 0, "", 0.0) for workdir, cmd in jobs]
+
+    if mode != "host-with-docker":
+        from concurrent.futures import ThreadPoolExecutor
+
+        # The docker path is clipped once, as a whole batch, by eneo_exec.
+        timeout = budget_timeout(timeout, "batch job")
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            return list(pool.map(lambda job: _run_local_job(root, job[0], job[1], timeout), jobs))
+
+    if not eneo_container_name():
+        skipped = "[eneo-env] no eneo devcontainer running; skipped\n"
+        return [ExecResult(workdir, cmd, 0, skipped, 0.0) for workdir, cmd in jobs]
+    batch_timeout = timeout * len(jobs) + 10 if timeout else None
+    started = time.monotonic()
+    try:
+        proc = eneo_exec("", ["bash", "-c", _batch_script(jobs, timeout)], capture=True, timeout=batch_timeout)
+    except subprocess.TimeoutExpired as exc:
+        partial = exc.stdout.decode() if isinstance(exc.stdout, bytes) else (exc.stdout or "")
+        return _parse_batch(jobs, partial)
+    stdout = proc.stdout or ""
+    if _JOB_MARKER not in stdout:
+        # eneo_exec soft-failed before any job reported (e.g. lost exec result).
+        elapsed = time.monotonic() - started
+        return [ExecResult(workdir, cmd, proc.returncode, proc.stderr or "", elapsed) for workdir, cmd in jobs]
+    return _parse_batch(jobs, stdout)
+
+
+# --- Toolchain probe cache ---------------------------------------------------
+# Version probes like `uv run pyright --version` can take seconds (uv syncs the
+# environment first), yet their answer only changes when the lockfile, the
+# project file, or the container does. Successful probe output is stored in
+# .claude/state/.cache/probes/<name>: the first line is the fingerprint, the
+# rest is the output. env.sh (eneo_probe_many) reads and writes the same files.
+PROBE_INPUTS = ("backend/uv.lock", "backend/pyproject.toml")
+_probe_fingerprint_memo: str | None = None
+
+
+def _container_identity(mode: str) -> str:
+    if mode == "host-with-docker":
+        return eneo_container_id() or eneo_container_name() or ""
+    if mode == "in-container":
+        return os.uname().nodename  # Docker sets the hostname to the short container ID
+    return ""
+
+
+def probe_fingerprint() -> str | None:
+    """sha256 over PROBE_INPUTS, the mode and the container identity."""
+    global _probe_fingerprint_memo
+    if _probe_fingerprint_memo is not None:
+        return _probe_fingerprint_memo
+    root = find_repo_root()
+    if not root:
+        return None
+    mode = detect_env()
+    identity = _container_identity(mode)
+    if mode == "host-with-docker" and not identity:
+        return None  # no container: eneo_exec soft-fails, nothing worth caching
+    import hashlib
+
+    digest = hashlib.sha256()
+    for rel in PROBE_INPUTS:
+        try:
+            digest.update((Path(root) / rel).read_bytes())
+        except OSError:
+            pass
+    digest.update(f"{mode}\n{identity}\n".encode("utf-8"))
+    _probe_fingerprint_memo = digest.hexdigest()
+    return _probe_fingerprint_memo
+
+
+def _probe_file(name: str) -> Path | None:
+    root = find_repo_root()
+    if not root or os.environ.get("ENEO_PROBE_CACHE", "1") == "0":
+        return None
+    return Path(root) / ".claude" / "state" / ".cache" / "probes" / name
+
+
+def eneo_probe_many(
+    probes: Sequence[tuple[str, str, list[str]]],
+    *,
+    timeout: float | None = None,
+) -> list[ExecResult]:
+    """Like eneo_exec_many for (name, workdir, argv) probes, served from the
+    probe cache when the fingerprint matches. Only probes that exited 0 are
+    cached, so a missing tool is re-checked on every call. Cache hits report
+    a duration of 0.
+
+    When the hook's time budget cannot fit the misses (*timeout*, else 5s),
+    entries with an outdated fingerprint are served anyway and probes with
+    no entry report exit 124, both logged as budget degradations.
+    """
+    fingerprint = probe_fingerprint() if detect_env() != "disabled" else None
+    results: list[ExecResult | None] = []
+    misses: list[int] = []
+    stale: dict[int, str] = {}
+    for index, (name, workdir, cmd) in enumerate(probes):
+        path = _probe_file(name) if fingerprint else None
+        try:
+            header, _, output = path.read_text(encoding="utf-8").partition("\n") if path else ("", "", "")
+        except OSError:
+            header, output = "", ""
+        if fingerprint and header == fingerprint:
+            results.append(ExecResult(workdir, list(cmd), 0, output, 0.0))
+        else:
+            results.append(None)
+            misses.append(index)
+            if header:
+                stale[index] = output
+
+    names = ", ".join(probes[i][0] for i in misses)
+    if misses and not budget_allows(timeout or 5.0, f"skipped probes {names}"):
+        for index in misses:
+            name, workdir, cmd = probes[index]
+            if index in stale:
+                budget_degrade(f"served stale probe {name}")
+                results[index] = ExecResult(workdir, list(cmd), 0, stale[index], 0.0)
+            else:
+                results[index] = ExecResult(workdir, list(cmd), 124, "[eneo-env] skipped: hook time budget spent\n", 0.0)
+        return [result for result in results if result is not None]
+
+    fresh = eneo_exec_many([(probes[i][1], probes[i][2]) for i in misses], timeout=timeout)
+    for index, result in zip(misses, fresh):
+        results[index] = result
+        path = _probe_file(probes[index][0]) if fingerprint else None
+        if path and result.returncode == 0:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}")
+                tmp.write_text(f"{fingerprint}\n{result.output}", encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError:
+                pass
+    return [result for result in results if result is not None]
+
+
 # --- Path translation --------------------------------------------------------
 def host_to_container_path(p: str) -> str:
     root = find_repo_root() or ""
@@ -166,10 +963,7 @@ def container_to_host_path(p: str) -> str:
 
 
 # --- Repo-root detection (verbatim from checker/typecheck-stop.py lines 18–46)
-def find_repo_root(start_dir: str | None = None) -> str | None:
-    """Find the eneo repo root containing backend/src/intric."""
-    start = Path(start_dir or os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd())
-
+def _resolve_repo_root(start: Path) -> str | None:
     # Try git root from start_dir first
     try:
         result = subprocess.run(
@@ -202,6 +996,97 @@ def find_repo_root(start_dir: str | None = None) -> str | None:
     return None
 
 
+# Resolved roots are memoized in-process (validated by one stat of $root/.git)
+# and on disk in ${TMPDIR:-/tmp}/eneo-root-cache.<uid>/, shared with env.sh;
+# see eneo_repo_root there for the invalidation rules. The directory is only
+# read when it is ours, not a symlink and mode 0700, and an entry only when it
+# is our own regular file; a directory another user planted is never written.
+_repo_root_memo: dict[str, tuple[str, int]] = {}
+
+
+def _root_marker_mtime(root: str) -> int | None:
+    for marker in (os.path.join(root, ".git"), root):
+        try:
+            return os.stat(marker).st_mtime_ns
+        except OSError:
+            continue
+    return None
+
+
+def _root_cache_file(start: str) -> Path | None:
+    if os.environ.get("ENEO_ROOT_CACHE", "1") == "0":
+        return None
+    tmp = (os.environ.get("TMPDIR") or "/tmp").rstrip("/") or "/"
+    return Path(tmp) / f"eneo-root-cache.{os.getuid()}" / start.replace("/", "%")
+
+
+def _root_cache_trusted(path: Path, *, directory: bool) -> bool:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if st.st_uid != os.getuid():
+        return False
+    if directory:
+        return stat.S_ISDIR(st.st_mode) and not st.st_mode & 0o077
+    return stat.S_ISREG(st.st_mode)
+
+
+def _read_root_cache(cache: Path) -> str | None:
+    if not (_root_cache_trusted(cache.parent, directory=True) and _root_cache_trusted(cache, directory=False)):
+        return None
+    try:
+        root = cache.read_text(encoding="utf-8").split("\n", 1)[0]
+        cached_at = cache.stat().st_mtime_ns
+    except OSError:
+        return None
+    if not root or not os.path.isdir(os.path.join(root, "backend", "src", "intric")):
+        return None
+    marker = _root_marker_mtime(root)
+    return root if marker is not None and cached_at > marker else None
+
+
+def _write_root_cache(cache: Path, root: str) -> None:
+    try:
+        try:
+            cache.parent.mkdir(mode=0o700)
+        except FileExistsError:
+            st = os.lstat(cache.parent)
+            if st.st_uid != os.getuid() or not stat.S_ISDIR(st.st_mode):
+                return  # someone else's directory: never write into it
+            os.chmod(cache.parent, 0o700)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}")
+        tmp.write_text(root + "\n", encoding="utf-8")
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+
+
+def find_repo_root(start_dir: str | None = None) -> str | None:
+    """Find the eneo repo root containing backend/src/intric."""
+    start = start_dir or os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+    ctx = _context()
+    if ctx and ctx["key"] == start:
+        # The envelope echoes the start dir when no repo was found.
+        return ctx["root"] if os.path.isdir(os.path.join(ctx["root"], "backend", "src", "intric")) else None
+    memo = _repo_root_memo.get(start)
+    if memo and _root_marker_mtime(memo[0]) == memo[1]:
+        return memo[0]
+
+    cache = _root_cache_file(start)
+    root = _read_root_cache(cache) if cache else None
+    if root is None:
+        root = _resolve_repo_root(Path(start))
+        if root is None:
+            return None
+        if cache:
+            _write_root_cache(cache, root)
+    mtime = _root_marker_mtime(root)
+    if mtime is not None:
+        _repo_root_memo[start] = (root, mtime)
+    return root
+
+
 def get_changed_python_files(repo_root: str, scope: str = "backend/src/intric") -> list[str]:
     """Return staged + unstaged + untracked .py files inside *scope*."""
     files: list[str] = []
@@ -230,6 +1115,9 @@ def get_changed_python_files(repo_root: str, scope: str = "backend/src/intric")
 # --- Phase-state helpers -----------------------------------------------------
 def phase() -> str:
     """Return current phase: RED | GREEN | REFACTOR | FREE."""
+    ctx = _context()
+    if ctx:
+        return ctx["phase"]
     root = find_repo_root()
     if not root:
         return "FREE"
@@ -238,6 +1126,9 @@ def phase() -> str:
 
 
 def current_slug() -> str | None:
+    ctx = _context()
+    if ctx:
+        return ctx["slug"] or None
     root = find_repo_root()
     if not root:
         return None
@@ -250,7 +1141,98 @@ def current_slug() -> str | None:
         return None
 
 
-def env_report() -> dict[str, str | None]:
+# --- Hook context envelope ---------------------------------------------------
+# ENEO_CTX hands the facts a hook already resolved to every helper it starts.
+# Same format, checksum and rejection rules as the block in env.sh.
+CTX_VERSION = 2
+_CTX_FIELDS = ("key", "mode", "root", "container", "cid", "phase", "slug", "gen")
+_CTX_SUM_RE = re.compile(r'(\{.*),"sum":"([0-9a-f]{8})"\}')
+_ctx_memo: tuple[str, dict[str, str] | None] | None = None
+
+
+def _fnv1a(text: str) -> str:
+    value = 0x811C9DC5
+    for byte in text.encode("utf-8"):
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return f"{value:08x}"
+
+
+def _ctx_start() -> str:
+    return os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+
+
+def _parse_context(raw: str) -> dict[str, str] | None:
+    match = _CTX_SUM_RE.fullmatch(raw)
+    if not match:
+        return None
+    body = match.group(1) + "}"
+    if _fnv1a(body) != match.group(2):
+        return None
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("v") != CTX_VERSION
+        or tuple(data)[1:] != _CTX_FIELDS
+        or not all(isinstance(data[field], str) for field in _CTX_FIELDS)
+        or data["gen"] != state_gen(data["root"])
+    ):
+        return None
+    return {field: data[field] for field in _CTX_FIELDS}
+
+
+def _context() -> dict[str, str] | None:
+    """The inherited envelope, if present, valid and made for this start dir."""
+    global _ctx_memo
+    raw = os.environ.get("ENEO_CTX", "")
+    if not raw:
+        return None
+    if _ctx_memo is None or _ctx_memo[0] != raw:
+        _ctx_memo = (raw, _parse_context(raw))
+    ctx = _ctx_memo[1]
+    return ctx if ctx and ctx["key"] == _ctx_start() else None
+
+
+def state_gen(root: str) -> str:
+    """eneo_state_gen: the generation token state writers leave in .claude/state/gen."""
+    try:
+        with open(os.path.join(root, ".claude", "state", "gen"), encoding="utf-8") as handle:
+            return handle.readline().rstrip("\n")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def env_context() -> str | None:
+    """Build the ENEO_CTX envelope for this process (None if a value needs escaping)."""
+    mode = detect_env()
+    root = find_repo_root() or _ctx_start()
+    gen = state_gen(root)  # before phase/slug, as eneo_ctx reads it
+    values = {
+        "key": _ctx_start(),
+        "mode": mode,
+        "root": root,
+        "container": (eneo_container_name() or "") if mode == "host-with-docker" else "",
+        "cid": (eneo_container_id() or "") if mode == "host-with-docker" else "",
+        "phase": phase(),
+        "slug": current_slug() or "",
+        "gen": gen,
+    }
+    if any(re.search(r'["\\\x00-\x1f\x7f]', value) for value in values.values()):
+        return None
+    body = json.dumps({"v": CTX_VERSION, **values}, separators=(",", ":"), ensure_ascii=False)
+    return f'{body[:-1]},"sum":"{_fnv1a(body)}"}}'
+
+
+def invalidate_context() -> None:
+    """Drop the inherited envelope, e.g. after writing task state."""
+    global _ctx_memo
+    os.environ.pop("ENEO_CTX", None)
+    _ctx_memo = None
+
+
+def env_report() -> dict[str, object]:
     return {
         "ENEO_DEVCONTAINER_MODE": os.environ.get("ENEO_DEVCONTAINER_MODE"),
         "detected_mode": detect_env(),
@@ -258,6 +1240,8 @@ def env_report() -> dict[str, str | None]:
         "container": eneo_container_name(),
         "phase": phase(),
         "slug": current_slug(),
+        "env_cache": env_cache_stats(),
+        "ctx": env_context(),
     }
 
 
@@ -6,6 +6,9 @@
 
 set -euo pipefail
 
+ENEO_LIB_DIR="${BASH_SOURCE[0]%/*}"
+[[ "$ENEO_LIB_DIR" == "${BASH_SOURCE[0]}" ]] && ENEO_LIB_DIR="."
+
 # --- Environment detection ----------------------------------------------------
 # ENEO_DEVCONTAINER_MODE: in-container | host-with-docker | native | disabled
 eneo_container_candidates() {
@@ -17,24 +20,160 @@ eneo_container_candidates() {
     '
 }
 
-_eneo_preferred_container() {
-  eneo_container_candidates \
-    | grep -E '(devcontainer|backend|app|web|api|(^|[-_])eneo[-_]1$|(^|[-_])eneo[-_][0-9]+$|[-_]eneo[-_]1$)' \
+# Reads candidate names on stdin and prints the preferred app container.
+_eneo_pick_preferred() {
+  grep -E '(devcontainer|backend|app|web|api|(^|[-_])eneo[-_]1$|(^|[-_])eneo[-_][0-9]+$|[-_]eneo[-_]1$)' \
     | head -1
 }
 
+_eneo_preferred_container() {
+  eneo_container_candidates | _eneo_pick_preferred
+}
+
+# Like eneo_container_candidates but prints "<name><TAB><short id>".
+_eneo_container_rows() {
+  docker ps --format '{{.Names}}	{{.ID}}' 2>/dev/null \
+    | awk -F'\t' '
+      $1 ~ /eneo/ && $1 !~ /(db|redis|celery|worker|flow)/ {
+        print
+      }
+    '
+}
+
+# --- Session-scoped detection cache -------------------------------------------
+# detect_env and eneo_container_name share one docker probe whose result is
+# persisted to .claude/state/.cache/env.json, so the status line and every hook
+# process reuse it instead of spawning `docker ps`. env.py reads and writes the
+# same file. It is one compact JSON line in a fixed key order, which lets bash
+# parse it without jq.
+#
+# An entry is invalid when the session differs (ENEO_SESSION_ID, falling back
+# to CLAUDE_SESSION_ID), when it is older than ENEO_ENV_CACHE_TTL seconds
+# (default 30), or when the Docker socket is newer than the cache file (the
+# daemon restarted). ENEO_ENV_CACHE=0 disables the cache. A hit only reads
+# the file; it is rewritten on a miss, which also bumps its miss counter.
+# Hits are counted apart, one byte appended to .claude/stats/env-cache-hits
+# when .claude/stats/ exists, so the entry is never rewritten to count them.
+eneo_env_cache_file() {
+  _eneo_repo_root_lookup
+  echo "$ENEO_REPO_ROOT/.claude/state/.cache/env.json"
+}
+
+_eneo_session_id() {
+  echo "${ENEO_SESSION_ID:-${CLAUDE_SESSION_ID:-}}"
+}
+
+_eneo_docker_socket() {
+  local host="${DOCKER_HOST:-unix:///var/run/docker.sock}"
+  case "$host" in
+    unix://*) echo "${host#unix://}" ;;
+    *) echo "" ;;
+  esac
+}
+
+_eneo_epoch() {
+  if [[ -n "${EPOCHSECONDS:-}" ]]; then
+    echo "$EPOCHSECONDS"
+  else
+    date +%s
+  fi
+}
+
+ENEO_ENV_CACHE_RE='^\{"v":3,"session":"([^"]*)","ts":([0-9]+),"mode":"([^"]*)","container":"([^"]*)","misses":([0-9]+),"cid":"([^"]*)"'
+
+_eneo_env_cache_write() {
+  local file="$1" ts="$2" mode="$3" container="$4" misses="$5" cid="$6"
+  local dir="${file%/*}"
+  [[ -d "$dir" ]] || mkdir -p "$dir" 2>/dev/null || return 0
+  printf '{"v":3,"session":"%s","ts":%s,"mode":"%s","container":"%s","misses":%s,"cid":"%s"}\n' \
+    "$(_eneo_session_id)" "$ts" "$mode" "$container" "$misses" "$cid" \
+    > "$file.$$" 2>/dev/null || return 0
+  mv -f "$file.$$" "$file" 2>/dev/null || rm -f "$file.$$" 2>/dev/null || true
+}
+
+# Prints "<mode><TAB><container><TAB><container id>". Uses the cache when it is valid; otherwise
+# runs one `docker ps` and refreshes the cache.
+_eneo_docker_probe() {
+  local file="" line="" misses=0 now session
+  now=$(_eneo_epoch)
+  session=$(_eneo_session_id)
+  if [[ "${ENEO_ENV_CACHE:-1}" != "0" ]]; then
+    local root; _eneo_repo_root_lookup; root="$ENEO_REPO_ROOT"
+    if [[ -d "$root/backend/src/intric" ]]; then
+      file="$root/.claude/state/.cache/env.json"
+    fi
+  fi
+  if [[ -n "$file" && -f "$file" ]] && IFS= read -r line < "$file" \
+     && [[ "$line" =~ $ENEO_ENV_CACHE_RE ]]; then
+    local c_session="${BASH_REMATCH[1]}" c_ts="${BASH_REMATCH[2]}"
+    local c_mode="${BASH_REMATCH[3]}" c_container="${BASH_REMATCH[4]}" c_cid="${BASH_REMATCH[6]}"
+    misses="${BASH_REMATCH[5]}"
+    local sock; sock=$(_eneo_docker_socket)
+    if [[ ( -z "$session" || "$c_session" == "$session" ) \
+          && $((now - c_ts)) -lt "${ENEO_ENV_CACHE_TTL:-30}" \
+          && ! ( -n "$sock" && "$sock" -nt "$file" ) ]]; then
+      local stats="${file%/.claude/*}/.claude/stats"
+      [[ ! -d "$stats" ]] || printf . >> "$stats/env-cache-hits" 2>/dev/null || true
+      printf '%s\t%s\t%s\n' "$c_mode" "$c_container" "$c_cid"
+      return
+    fi
+  fi
+
+  local rows names="" row container="" cid="" mode="native"
+  rows=$(_eneo_container_rows || true)
+  if [[ -n "$rows" ]]; then
+    while IFS= read -r row; do
+      names+="${row%%$'\t'*}"$'\n'
+    done <<<"$rows"
+    container=$(printf '%s' "$names" | _eneo_pick_preferred || true)
+    container="${container:-${names%%$'\n'*}}"
+    while IFS= read -r row; do
+      if [[ "${row%%$'\t'*}" == "$container" && "$row" == *$'\t'* ]]; then
+        cid="${row#*$'\t'}"
+        break
+      fi
+    done <<<"$rows"
+    mode="host-with-docker"
+  fi
+  if [[ -n "$file" ]]; then
+    _eneo_env_cache_write "$file" "$now" "$mode" "$container" "$((misses + 1))" "$cid"
+  fi
+  printf '%s\t%s\t%s\n' "$mode" "$container" "$cid"
+}
+
+# Prints "hits=<n> misses=<n>" (probes served from the cache, docker probes
+# run) for the current repo's detection cache.
+eneo_env_cache_stats() {
+  local file line hits=0 misses=0
+  file=$(eneo_env_cache_file)
+  if [[ -f "$file" ]] && IFS= read -r line < "$file" && [[ "$line" =~ $ENEO_ENV_CACHE_RE ]]; then
+    misses="${BASH_REMATCH[5]}"
+  fi
+  line="${file%/.claude/*}/.claude/stats/env-cache-hits"
+  if [[ -f "$line" ]]; then
+    hits=$(wc -c < "$line" 2>/dev/null) || hits=0
+    hits="${hits//[!0-9]/}"
+  fi
+  echo "hits=${hits:-0} misses=$misses"
+}
+
 detect_env() {
   if [[ -n "${ENEO_DEVCONTAINER_MODE:-}" ]]; then
     echo "$ENEO_DEVCONTAINER_MODE"
     return
   fi
+  if (( ENEO_CTX_VALID )); then
+    echo "$ENEO_CTX_MODE"
+    return
+  fi
   if [[ -f /.dockerenv ]] || [[ -n "${REMOTE_CONTAINERS:-}" ]] || [[ -n "${DEVCONTAINER:-}" ]]; then
     echo "in-container"
     return
   fi
-  if command -v docker >/dev/null 2>&1 && \
-     { [[ -n "$(_eneo_preferred_container)" ]] || [[ -n "$(eneo_container_candidates | head -1)" ]]; }; then
-    echo "host-with-docker"
+  if command -v docker >/dev/null 2>&1; then
+    local probe
+    probe=$(_eneo_docker_probe)
+    echo "${probe%%$'\t'*}"
     return
   fi
   echo "native"
@@ -42,17 +181,117 @@ detect_env() {
 
 ENEO_CONTAINER_NAME_CACHE=""
 eneo_container_name() {
+  if (( ENEO_CTX_VALID )) && [[ -z "$ENEO_CONTAINER_NAME_CACHE" ]]; then
+    ENEO_CONTAINER_NAME_CACHE="$ENEO_CTX_CONTAINER"
+    ENEO_CONTAINER_ID_CACHE="$ENEO_CTX_CID"
+    echo "$ENEO_CONTAINER_NAME_CACHE"
+    return
+  fi
   if [[ -n "$ENEO_CONTAINER_NAME_CACHE" ]]; then
     echo "$ENEO_CONTAINER_NAME_CACHE"
     return
   fi
-  ENEO_CONTAINER_NAME_CACHE=$(_eneo_preferred_container || true)
-  if [[ -z "$ENEO_CONTAINER_NAME_CACHE" ]]; then
-    ENEO_CONTAINER_NAME_CACHE=$(eneo_container_candidates | head -1 || true)
+  if command -v docker >/dev/null 2>&1; then
+    local probe
+    probe=$(_eneo_docker_probe)
+    probe="${probe#*$'\t'}"
+    ENEO_CONTAINER_NAME_CACHE="${probe%%$'\t'*}"
+    ENEO_CONTAINER_ID_CACHE="${probe#*$'\t'}"
   fi
   echo "$ENEO_CONTAINER_NAME_CACHE"
 }
 
+# Short ID of the container eneo_container_name selected (empty if unknown).
+ENEO_CONTAINER_ID_CACHE=""
+eneo_container_id() {
+  if [[ -z "$ENEO_CONTAINER_NAME_CACHE" ]]; then
+    eneo_container_name >/dev/null
+  fi
+  echo "$ENEO_CONTAINER_ID_CACHE"
+}
+
+# --- Hook time budget ---------------------------------------------------------
+# Bash twin of the budget block in env.py. eneo_budget_start SECONDS HOOK
+# exports ENEO_BUDGET_DEADLINE (epoch seconds): the hooks.json timeout minus
+# a reserve (10%, 1-15s) for reporting. eneo_exec and eneo_exec_many then run
+# commands under `timeout` with what is left, and skip them once nothing is;
+# eneo_budget_allows SECONDS ACTION gates optional work. Every budget-driven
+# degradation is logged to stderr and .claude/stats/hook-budget.jsonl.
+# Python hooks and children started from here share the same deadline.
+# ENEO_HOOK_BUDGET=0 disables the layer.
+eneo_budget_start() {
+  local seconds="$1" now reserve_ms
+  [[ "${ENEO_HOOK_BUDGET:-1}" != "0" ]] || return 0
+  _eneo_now_us now
+  reserve_ms=$(( seconds * 100 ))
+  (( reserve_ms >= 1000 )) || reserve_ms=1000
+  (( reserve_ms <= 15000 )) || reserve_ms=15000
+  local deadline_ms=$(( now / 1000 + seconds * 1000 - reserve_ms ))
+  printf -v ENEO_BUDGET_DEADLINE '%d.%03d' $(( deadline_ms / 1000 )) $(( deadline_ms % 1000 ))
+  export ENEO_BUDGET_DEADLINE
+  export ENEO_BUDGET_HOOK="${2:-}"
+}
+
+# _eneo_utc_time VAR FORMAT [EPOCH]: sets VAR to EPOCH (default now) in UTC,
+# formatted by strftime FORMAT. printf's %(...)T needs bash 4.2; older bash
+# (stock macOS 3.2) forks date(1) instead, BSD -r or GNU -d for an epoch.
+_eneo_utc_time() {
+  if (( BASH_VERSINFO[0] * 100 + BASH_VERSINFO[1] >= 402 )); then
+    TZ=UTC printf -v "$1" "%($2)T" "${3:--1}"
+  elif [[ -n "${3:-}" ]]; then
+    printf -v "$1" '%s' "$(date -u -r "$3" "+$2" 2>/dev/null || date -u -d "@$3" "+$2")"
+  else
+    printf -v "$1" '%s' "$(date -u "+$2")"
+  fi
+}
+
+# Sets ENEO_BUDGET_LEFT_MS (may be negative); returns 1 without a budget.
+_eneo_budget_left_ms() {
+  ENEO_BUDGET_LEFT_MS=""
+  [[ "${ENEO_HOOK_BUDGET:-1}" != "0" && "${ENEO_BUDGET_DEADLINE:-}" =~ ^([0-9]+)\.([0-9]{3})$ ]] || return 1
+  local now
+  _eneo_now_us now
+  ENEO_BUDGET_LEFT_MS=$(( BASH_REMATCH[1] * 1000 + 10#${BASH_REMATCH[2]} - now / 1000 ))
+}
+
+eneo_budget_degrade() {
+  local action="$1" detail="${2:-}" left="no budget" left_json=null ts
+  if _eneo_budget_left_ms; then
+    printf -v left '%d.%ds left' $(( ENEO_BUDGET_LEFT_MS / 1000 )) $(( ENEO_BUDGET_LEFT_MS % 1000 / 100 ))
+    printf -v left_json '%d.%03d' $(( ENEO_BUDGET_LEFT_MS / 1000 )) $(( ENEO_BUDGET_LEFT_MS % 1000 ))
+    (( ENEO_BUDGET_LEFT_MS >= 0 )) || { left="spent"; left_json="${ENEO_BUDGET_LEFT_MS}e-3"; }
+  fi
+  echo "[eneo-budget] ${ENEO_BUDGET_HOOK:-hook}: $action ($left${detail:+; $detail})" >&2
+  _eneo_repo_root_lookup 2>/dev/null || return 0
+  [[ -d "$ENEO_REPO_ROOT/backend/src/intric" ]] || return 0
+  command mkdir -p "$ENEO_REPO_ROOT/.claude/stats" 2>/dev/null || return 0
+  _eneo_utc_time ts '%Y-%m-%dT%H:%M:%SZ'
+  action="${action//\\/\\\\}"; action="${action//\"/\\\"}"
+  detail="${detail//\\/\\\\}"; detail="${detail//\"/\\\"}"
+  printf '{"hook":"%s","ts":"%s","action":"%s","remaining_s":%s,"detail":"%s"}\n' \
+    "${ENEO_BUDGET_HOOK:-}" "$ts" "$action" "$left_json" "$detail" \
+    >> "$ENEO_REPO_ROOT/.claude/stats/hook-budget.jsonl" 2>/dev/null || true
+}
+
+eneo_budget_allows() {
+  local seconds="$1" action="$2"
+  _eneo_budget_left_ms || return 0
+  (( ENEO_BUDGET_LEFT_MS >= seconds * 1000 )) && return 0
+  eneo_budget_degrade "$action" "needs ${seconds}s"
+  return 1
+}
+
+# Fills the caller's ENEO_BUDGET_LIMIT array with a `timeout` prefix for the
+# time left (empty without a budget); returns 1 when the budget is spent.
+_eneo_budget_limit() {
+  ENEO_BUDGET_LIMIT=()
+  _eneo_budget_left_ms || return 0
+  (( ENEO_BUDGET_LEFT_MS > 0 )) || return 1
+  if command -v timeout >/dev/null 2>&1; then
+    ENEO_BUDGET_LIMIT=(timeout --kill-after=2 "$(( (ENEO_BUDGET_LEFT_MS + 999) / 1000 ))")
+  fi
+}
+
 # --- Command wrapper ----------------------------------------------------------
 # Usage: eneo_exec <workdir-relative-to-repo-root> <cmd> [args...]
 # Returns the exit code of the wrapped command, or 0 if mode=disabled or
@@ -63,13 +302,16 @@ eneo_exec() {
   local mode
   mode=$(detect_env)
   local root
-  root=$(eneo_repo_root)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
+  [[ "$mode" != disabled ]] || return 0
+  if ! _eneo_budget_limit; then
+    eneo_budget_degrade "skipped $1"
+    return 124
+  fi
   case "$mode" in
-    disabled)
-      return 0
-      ;;
     in-container|native)
-      ( cd "${root}/${workdir}" && "$@" )
+      ( cd "${root}/${workdir}" && ${ENEO_BUDGET_LIMIT[@]+"${ENEO_BUDGET_LIMIT[@]}"} "$@" )
       ;;
     host-with-docker)
       local container
@@ -78,32 +320,312 @@ eneo_exec() {
         echo "[eneo-env] no eneo devcontainer running; skipping: $*" >&2
         return 0  # fail open
       fi
-      docker exec -w "/workspace/${workdir}" "$container" \
+      # ENEO_EXEC_AGENT=1: reuse the persistent in-container agent (see
+      # exec_agent.py). Only the marker file says the agent was unreachable
+      # and nothing ran, so fall through to a plain docker exec; a bare 75 is
+      # the command's own EX_TEMPFAIL.
+      if [[ "${ENEO_EXEC_AGENT:-0}" == "1" ]] && command -v python3 >/dev/null 2>&1; then
+        local rc=0 marker="$root/.claude/state/.cache/exec-agent.unavailable.${BASHPID:-$$.$RANDOM}"
+        rm -f "$marker" 2>/dev/null || true
+        python3 "$ENEO_LIB_DIR/exec_agent.py" run \
+          --root "$root" --container "$container" --workdir "$workdir" \
+          --unavailable-marker "$marker" \
+          ${ENEO_BUDGET_LIMIT[2]:+--timeout "${ENEO_BUDGET_LIMIT[2]}"} -- "$@" || rc=$?
+        if [[ "$rc" -ne 75 || ! -e "$marker" ]]; then
+          return "$rc"
+        fi
+        rm -f "$marker" 2>/dev/null || true
+      fi
+      ${ENEO_BUDGET_LIMIT[@]+"${ENEO_BUDGET_LIMIT[@]}"} docker exec -w "/workspace/${workdir}" "$container" \
         bash -lc 'export PATH=/home/vscode/.local/bin:$PATH; "$@"' bash "$@"
       ;;
   esac
 }
 
+# --- Batched execution --------------------------------------------------------
+# _eneo_usec [SECONDS.FRACTION]: prints the value (default now) in
+# microseconds. Without EPOCHREALTIME (bash < 5) it asks date(1); BSD date
+# has no %N and prints it literally, so there whole seconds are kept. date
+# goes through `command` so a profiling wrapper cannot recurse into it.
+_eneo_usec() {
+  local t="${1:-${EPOCHREALTIME:-}}"
+  [[ -n "$t" ]] || t=$(command date +%s.%N)
+  [[ "$t" =~ ^[0-9]+[.,][0-9]+$ ]] || t="${t%%[!0-9]*}.0"
+  t="${t//[.,]/}000000"
+  echo "${t:0:16}"
+}
+
+# _eneo_now_us VAR: sets VAR to microseconds since the epoch, without a fork
+# where bash has EPOCHREALTIME.
+_eneo_now_us() {
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    printf -v "$1" '%s' "${EPOCHREALTIME/[.,]/}"
+  else
+    printf -v "$1" '%s' "$(_eneo_usec)"
+  fi
+}
+
+# Usage: eneo_exec_many <workdir> <cmd> [args...] [::: <workdir> <cmd> [args...]]...
+# Runs every job and fills three arrays indexed by job position:
+#   ENEO_EXEC_RC[i]   exit code
+#   ENEO_EXEC_OUT[i]  stdout+stderr, trailing newlines stripped (like $(...))
+#   ENEO_EXEC_MS[i]   wall time in milliseconds
+# native / in-container: jobs run concurrently. host-with-docker: all jobs run
+# in a single container entry. Soft-fails like eneo_exec when mode=disabled or
+# no container is running (rc=0, empty output).
+eneo_exec_many() {
+  ENEO_EXEC_RC=()
+  ENEO_EXEC_OUT=()
+  ENEO_EXEC_MS=()
+  local -a workdirs=() cmds=()
+  local current="" wd="" expect_wd=1 arg
+  for arg in "$@"; do
+    if [[ "$arg" == ":::" ]]; then
+      workdirs+=("$wd")
+      cmds+=("$current")
+      current=""
+      expect_wd=1
+    elif (( expect_wd )); then
+      wd="$arg"
+      expect_wd=0
+    else
+      current+="$(printf '%q' "$arg") "
+    fi
+  done
+  if [[ -n "$current" ]]; then
+    workdirs+=("$wd")
+    cmds+=("$current")
+  fi
+  local count=${#cmds[@]} i
+  (( count > 0 )) || return 0
+
+  local mode root
+  mode=$(detect_env)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
+  case "$mode" in
+    disabled)
+      for ((i = 0; i < count; i++)); do
+        ENEO_EXEC_RC[i]=0; ENEO_EXEC_OUT[i]=""; ENEO_EXEC_MS[i]=0
+      done
+      ;;
+    host-with-docker)
+      local script marker=$'\x1e'ENEO-JOB
+      script='__eneo_job() {
+  local i="$1" wd="$2" start rc; shift 2
+  start="${EPOCHREALTIME:-$(date +%s.%N)}"
+  ( cd "/workspace/$wd" && "$@" ) 2>&1; rc=$?
+  printf "\n'"$marker"' %s %s %s %s\n" "$i" "$rc" "$start" "${EPOCHREALTIME:-$(date +%s.%N)}"
+}
+'
+      for ((i = 0; i < count; i++)); do
+        script+="__eneo_job $i $(printf '%q' "${workdirs[i]}") ${cmds[i]}"$'\n'
+        ENEO_EXEC_RC[i]=0; ENEO_EXEC_OUT[i]=""; ENEO_EXEC_MS[i]=0
+      done
+      local output line buffer="" idx rc start end
+      output=$(eneo_exec "" bash -c "$script" 2>/dev/null || true)
+      while IFS= read -r line || [[ -n "$line" ]]; do
+        if [[ "$line" == "$marker "* ]]; then
+          read -r _ idx rc start end <<<"$line"
+          while [[ "$buffer" == *$'\n' ]]; do buffer="${buffer%$'\n'}"; done
+          ENEO_EXEC_RC[idx]="$rc"
+          ENEO_EXEC_OUT[idx]="$buffer"
+          ENEO_EXEC_MS[idx]=$(( ($(_eneo_usec "$end") - $(_eneo_usec "$start")) / 1000 ))
+          buffer=""
+        else
+          buffer+="$line"$'\n'
+        fi
+      done <<<"$output"
+      ;;
+    *)
+      local tmp_dir tmp_prefix
+      local -a pids=()
+      if ! _eneo_budget_limit; then
+        eneo_budget_degrade "skipped $count batch job(s)"
+        for ((i = 0; i < count; i++)); do
+          ENEO_EXEC_RC[i]=124; ENEO_EXEC_OUT[i]=""; ENEO_EXEC_MS[i]=0
+        done
+        return 0
+      fi
+      if ! tmp_dir=$(mktemp -d "${TMPDIR:-/tmp}/eneo-exec-many.XXXXXX"); then
+        echo "[eneo-env] could not create a scratch dir; skipping $count batch job(s)" >&2
+        for ((i = 0; i < count; i++)); do
+          ENEO_EXEC_RC[i]=1; ENEO_EXEC_OUT[i]=""; ENEO_EXEC_MS[i]=0
+        done
+        return 0
+      fi
+      trap 'rm -rf "$tmp_dir"; trap - RETURN' RETURN
+      tmp_prefix="$tmp_dir/job"
+      for ((i = 0; i < count; i++)); do
+        (
+          start=$(_eneo_usec)
+          eval "job=(${cmds[i]})"
+          rc=0
+          ( cd "${root}/${workdirs[i]}" && ${ENEO_BUDGET_LIMIT[@]+"${ENEO_BUDGET_LIMIT[@]}"} "${job[@]}" ) >"$tmp_prefix.$i" 2>&1 || rc=$?
+          printf '%s %s\n' "$rc" "$(( ($(_eneo_usec) - start) / 1000 ))" >"$tmp_prefix.$i.rc"
+        ) &
+        pids+=("$!")
+      done
+      for ((i = 0; i < count; i++)); do
+        wait "${pids[i]}" 2>/dev/null || true
+        local rc_line=""
+        IFS= read -r rc_line <"$tmp_prefix.$i.rc" 2>/dev/null || rc_line="1 0"
+        ENEO_EXEC_RC[i]="${rc_line%% *}"
+        ENEO_EXEC_MS[i]="${rc_line##* }"
+        ENEO_EXEC_OUT[i]="$(<"$tmp_prefix.$i")"
+      done
+      ;;
+  esac
+}
+
+# --- Toolchain probe cache ----------------------------------------------------
+# Version probes like `uv run pyright --version` can take seconds (uv syncs the
+# environment first), yet their answer only changes when backend/uv.lock,
+# backend/pyproject.toml, or the container does. Successful probe output is
+# kept in .claude/state/.cache/probes/<name>: the first line is the
+# fingerprint (sha256 over those files, the mode and the container ID), the
+# rest is the output. env.py (eneo_probe_many) shares the same files.
+# ENEO_PROBE_CACHE=0 disables it.
+ENEO_PROBE_INPUTS=(backend/uv.lock backend/pyproject.toml)
+ENEO_PROBE_FINGERPRINT=""
+
+_eneo_sha256() {
+  local sum
+  if command -v sha256sum >/dev/null 2>&1; then
+    sum=$(sha256sum)
+  else
+    sum=$(shasum -a 256)
+  fi
+  echo "${sum%% *}"
+}
+
+# Prints the probe fingerprint; returns 1 when probes should not be cached
+# (no Eneo repo, mode=disabled, or no container to key on).
+eneo_probe_fingerprint() {
+  if [[ -n "$ENEO_PROBE_FINGERPRINT" ]]; then
+    echo "$ENEO_PROBE_FINGERPRINT"
+    return
+  fi
+  local root mode identity="" rel sum
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
+  [[ -d "$root/backend/src/intric" ]] || return 1
+  mode=$(detect_env)
+  case "$mode" in
+    disabled) return 1 ;;
+    host-with-docker)
+      eneo_container_name >/dev/null
+      identity="${ENEO_CONTAINER_ID_CACHE:-$ENEO_CONTAINER_NAME_CACHE}"
+      [[ -n "$identity" ]] || return 1
+      ;;
+    in-container) identity="${HOSTNAME:-$(hostname)}" ;;
+  esac
+  sum=$(
+    {
+      for rel in "${ENEO_PROBE_INPUTS[@]}"; do
+        cat "$root/$rel" 2>/dev/null || true
+      done
+      printf '%s\n%s\n' "$mode" "$identity"
+    } | _eneo_sha256
+  ) || return 1
+  [[ -n "$sum" ]] || return 1
+  ENEO_PROBE_FINGERPRINT="$sum"
+  echo "$sum"
+}
+
+# Usage: eneo_probe_many <name> <workdir> <cmd> [args...] [::: <name> <workdir> <cmd> [args...]]...
+# Fills the same arrays as eneo_exec_many, plus ENEO_PROBE_CACHED[i]=1 when
+# job i was served from the cache (ENEO_EXEC_MS[i]=0 then). Misses run in one
+# eneo_exec_many batch; only probes that exit 0 are cached.
+eneo_probe_many() {
+  ENEO_PROBE_CACHED=()
+  local fingerprint="" dir=""
+  eneo_probe_fingerprint >/dev/null 2>&1 || true
+  fingerprint="$ENEO_PROBE_FINGERPRINT"
+  if [[ -n "$fingerprint" && "${ENEO_PROBE_CACHE:-1}" != "0" ]]; then
+    _eneo_repo_root_lookup
+    dir="$ENEO_REPO_ROOT/.claude/state/.cache/probes"
+  fi
+
+  local -a names=() hit_out=() exec_args=() miss_idx=()
+  local count=0 expect_name=1 skipping=0 arg content
+  for arg in "$@"; do
+    if [[ "$arg" == ":::" ]]; then
+      expect_name=1
+      continue
+    fi
+    if (( expect_name )); then
+      expect_name=0
+      skipping=0
+      names[count]="$arg"
+      ENEO_PROBE_CACHED[count]=0
+      if [[ -n "$dir" && -f "$dir/$arg" ]]; then
+        content=$(<"$dir/$arg")
+        if [[ "${content%%$'\n'*}" == "$fingerprint" ]]; then
+          skipping=1
+          ENEO_PROBE_CACHED[count]=1
+          hit_out[count]=""
+          [[ "$content" != *$'\n'* ]] || hit_out[count]="${content#*$'\n'}"
+        fi
+      fi
+      if (( ! skipping )); then
+        (( ${#miss_idx[@]} == 0 )) || exec_args+=(":::")
+        miss_idx+=("$count")
+      fi
+      count=$((count + 1))
+    elif (( ! skipping )); then
+      exec_args+=("$arg")
+    fi
+  done
+
+  local -a rc=() out=() ms=()
+  if (( ${#miss_idx[@]} > 0 )); then
+    eneo_exec_many "${exec_args[@]}"
+    rc=("${ENEO_EXEC_RC[@]}")
+    out=("${ENEO_EXEC_OUT[@]}")
+    ms=("${ENEO_EXEC_MS[@]}")
+  fi
+  ENEO_EXEC_RC=()
+  ENEO_EXEC_OUT=()
+  ENEO_EXEC_MS=()
+  local i j=0 file
+  for ((i = 0; i < count; i++)); do
+    if (( ENEO_PROBE_CACHED[i] )); then
+      ENEO_EXEC_RC[i]=0; ENEO_EXEC_OUT[i]="${hit_out[i]}"; ENEO_EXEC_MS[i]=0
+      continue
+    fi
+    ENEO_EXEC_RC[i]="${rc[j]:-0}"; ENEO_EXEC_OUT[i]="${out[j]:-}"; ENEO_EXEC_MS[i]="${ms[j]:-0}"
+    if [[ -n "$dir" && "${rc[j]:-1}" == "0" ]] && mkdir -p "$dir" 2>/dev/null; then
+      file="$dir/${names[i]}"
+      printf '%s\n%s\n' "$fingerprint" "${out[j]}" > "$file.$$" 2>/dev/null \
+        && mv -f "$file.$$" "$file" 2>/dev/null || rm -f "$file.$$" 2>/dev/null || true
+    fi
+    j=$((j + 1))
+  done
+}
+
 # --- Path translation ---------------------------------------------------------
 host_to_container_path() {
   local p="$1"
   local root
-  root=$(eneo_repo_root)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
   echo "${p/$root/\/workspace}"
 }
 
 container_to_host_path() {
   local p="$1"
   local root
-  root=$(eneo_repo_root)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
   echo "${p/\/workspace/$root}"
 }
 
 # --- Repo-root detection (ported from plugins/checker/hooks/typecheck-stop.py)
 # Handles: normal clone, nested ~/eneo/eneo/, devcontainer /workspace,
 # and CLAUDE_PROJECT_DIR fallback.
-eneo_repo_root() {
-  local start="${CLAUDE_PROJECT_DIR:-$(pwd)}"
+_eneo_resolve_repo_root() {
+  local start="$1"
 
   # 1. git rev-parse from start
   local git_root
@@ -134,21 +656,223 @@ eneo_repo_root() {
     return
   fi
 
-  # 5. Fall back to start — callers can check for existence
-  echo "$start"
+  return 1
+}
+
+# Resolved roots are memoized in-process (ENEO_REPO_ROOT_MEMO, keyed by the
+# start dir) and on disk in ${TMPDIR:-/tmp}/eneo-root-cache.<uid>/, one file
+# per start dir with "/" encoded as "%", shared with env.py. A disk entry is
+# trusted while it is newer than $root/.git (git touches it on checkout,
+# commit, worktree changes) and $root/backend/src/intric still exists, so a
+# repeat lookup is one read plus two stats. The fallback answer (no Eneo repo
+# found) is never cached. ENEO_ROOT_CACHE=0 disables the disk entry.
+# /tmp is shared, so the directory and the entry are only used when they are
+# ours and not symlinks; a directory another user created first is ignored,
+# never written. It is created 0700 and chmod'ed back to 0700 on every write
+# (only its owner can loosen it; env.py also checks the mode).
+# The memo only lives in the shell that ran the lookup, so callers use
+# _eneo_repo_root_lookup and read ENEO_REPO_ROOT rather than
+# $(eneo_repo_root), whose subshell would drop it.
+ENEO_REPO_ROOT=""
+ENEO_REPO_ROOT_MEMO=""
+ENEO_REPO_ROOT_MEMO_KEY=""
+
+_eneo_repo_root_lookup() {
+  local start="${CLAUDE_PROJECT_DIR:-$PWD}"
+  if [[ -n "$ENEO_REPO_ROOT_MEMO" && "$ENEO_REPO_ROOT_MEMO_KEY" == "$start" ]]; then
+    ENEO_REPO_ROOT="$ENEO_REPO_ROOT_MEMO"
+    return
+  fi
+  if (( ENEO_CTX_VALID )) && [[ "$ENEO_CTX_KEY" == "$start" ]]; then
+    ENEO_REPO_ROOT="$ENEO_CTX_ROOT"
+    return
+  fi
+
+  local dir="" cache="" root="" marker
+  if [[ "${ENEO_ROOT_CACHE:-1}" != "0" ]]; then
+    local tmp="${TMPDIR:-/tmp}"
+    dir="${tmp%/}/eneo-root-cache.${UID}"
+    cache="$dir/${start//\//%}"
+    if [[ -d "$dir" && ! -L "$dir" && -O "$dir" && -f "$cache" && ! -L "$cache" && -O "$cache" ]] \
+       && IFS= read -r root < "$cache" \
+       && [[ -n "$root" && -d "$root/backend/src/intric" ]]; then
+      marker="$root/.git"
+      [[ -e "$marker" ]] || marker="$root"
+      [[ "$cache" -nt "$marker" ]] || root=""
+    else
+      root=""
+    fi
+  fi
+
+  if [[ -z "$root" ]]; then
+    # 5. Fall back to start — callers can check for existence
+    if ! root=$(_eneo_resolve_repo_root "$start"); then
+      ENEO_REPO_ROOT="$start"
+      return
+    fi
+    if [[ -n "$cache" ]] \
+       && { { [[ -d "$dir" && ! -L "$dir" && -O "$dir" ]] && chmod 700 "$dir"; } || mkdir -m 700 "$dir"; } 2>/dev/null; then
+      printf '%s\n' "$root" > "$cache.$$" 2>/dev/null \
+        && mv -f "$cache.$$" "$cache" 2>/dev/null || rm -f "$cache.$$" 2>/dev/null || true
+    fi
+  fi
+
+  ENEO_REPO_ROOT_MEMO="$root"
+  ENEO_REPO_ROOT_MEMO_KEY="$start"
+  ENEO_REPO_ROOT="$root"
+}
+
+eneo_repo_root() {
+  _eneo_repo_root_lookup
+  echo "$ENEO_REPO_ROOT"
 }
 
 # --- Phase-state helpers ------------------------------------------------------
 # Returns RED | GREEN | REFACTOR | FREE (default).
 eneo_phase() {
+  if (( ENEO_CTX_VALID )); then
+    echo "$ENEO_CTX_PHASE"
+    return
+  fi
   local root
-  root=$(eneo_repo_root)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
   cat "$root/.claude/state/phase" 2>/dev/null || echo "FREE"
 }
 
+# current-task.json plus the typed patches journaled since its last
+# compaction (see eneo_task_patch in state.sh). The journal's first line is
+# {"gen":"<id>"}; a snapshot that already folded that generation carries
+# "_journal_gen": "<id>" and skips it, so a reader racing a compaction never
+# applies a record twice. The journal is passed raw (--rawfile __journal) and
+# a line that is not a JSON object is skipped: a writer killed mid-append
+# leaves a torn line. lib/state.py folds the same way.
+# ENEO_TASK_PATCH defines eneo_patch, one record applied; staged
+# transactions (eneo_tx_patch in state.sh) reuse it.
+ENEO_TASK_PATCH='def eneo_patch($p):
+  if $p.op == "set" then .[$p.field] = $p.value
+  elif $p.op == "put" then .[$p.field] = ((.[$p.field] // {}) | .[$p.key] = $p.value)
+  elif $p.op == "remove" then .[$p.field] = (
+    (.[$p.field] // []) as $xs
+    | if ($xs | type) == "array"
+      then (($xs | index($p.value)) as $i | if $i == null then $xs else $xs[0:$i] + $xs[$i + 1:] end)
+      else []
+      end)
+  else . end
+  | .last_update = ($p.ts // .last_update);'
+ENEO_TASK_FOLD="$ENEO_TASK_PATCH"'
+  [$__journal | split("\n")[] | fromjson? | objects] as $__journal
+  | ($__journal[0].gen // null) as $gen
+  | if $gen == null or ._journal_gen == $gen then . else
+      reduce $__journal[1:][] as $p (.; eneo_patch($p))
+      | ._journal_gen = $gen
+    end'
+
+# Usage: eneo_task_jq [jq-option...] <filter>
+# Runs <filter> over current-task.json with its journal folded in; returns 1
+# when there is no task. One jq call either way.
+eneo_task_jq() {
+  (( $# )) || return 2
+  _eneo_repo_root_lookup
+  local file="$ENEO_REPO_ROOT/.claude/state/current-task.json" filter="${!#}"
+  local journal="${file%.json}.journal"
+  local opened=0 rc=0
+  [[ -f "$file" ]] || return 1
+  # A compaction can fold the journal into the JSON and remove it between
+  # the test and jq's read, so open it first (fd 3 of the group) and hand jq
+  # the descriptor, as state.py's load() reads the journal before the
+  # snapshot. The fold skips a journal whose gen the JSON already carries,
+  # so either snapshot is fine. fd 4 keeps jq's stderr while the failed
+  # open of a vanished journal is silenced.
+  if [[ -s "$journal" ]]; then
+    {
+      opened=1
+      jq "${@:1:$#-1}" --rawfile __journal /dev/fd/3 "$ENEO_TASK_FOLD | ($filter)" "$file" 2>&4 || rc=$?
+    } 4>&2 2>/dev/null 3<"$journal" || true
+    (( ! opened )) || return "$rc"
+  fi
+  jq "${@:1:$#-1}" "$filter" "$file"
+}
+
+# Usage: eneo_task_view || <no task>
+# Sets the task's display fields in the caller's shell, flattened to strings
+# ("" for null):
+#   TASK_SLUG TASK_LANE TASK_PHASE TASK_PHASE_TOTAL TASK_PHASE_NAME
+#   TASK_TDD_PHASE TASK_WAVE TASK_WAVE_TOTAL TASK_WAVE_BAR TASK_STATUS
+#   TASK_NEXT_HINT TASK_ACTIVE_AGENTS TASK_LAST_UPDATE
+# TASK_WAVE_BAR has one ▓ (done), ▒ (in_progress) or ░ per wave. Every write
+# through state.sh or state.py regenerates current-task.view, these
+# assignments shell-quoted one per line, so a reader can take them without
+# forking jq. The view is never sourced or evaluated: each record must be
+# TASK_<known field>='<value>' and is unquoted and assigned with printf -v.
+# A view older than the JSON or the journal (a writer that went around the
+# helpers), or one with any other line, costs one eneo_task_jq call instead,
+# whose output is read the same way.
+# TASK_LAST_UPDATE is derived on read: the later of last_update and the
+# activity heartbeat (eneo_task_heartbeat in state.sh), which is written
+# without rewriting the JSON.
+ENEO_TASK_VIEW='def text: if . == null then "" elif type == "string" then . elif type == "number" then tostring else tojson end;
+  ((.wave_total | text | tonumber? // 0) | floor) as $waves
+  | (.wave_status | if type == "object" then . else {} end) as $status
+  | ["SLUG", .slug], ["LANE", .lane], ["PHASE", .phase], ["PHASE_TOTAL", .phase_total],
+    ["PHASE_NAME", .phase_name], ["TDD_PHASE", .tdd_phase // "FREE"], ["WAVE", .wave],
+    ["WAVE_TOTAL", .wave_total],
+    ["WAVE_BAR", ([range(1; $waves + 1) | $status[tostring]
+      | if . == "done" then "▓" elif . == "in_progress" then "▒" else "░" end] | join(""))],
+    ["STATUS", .status], ["NEXT_HINT", .next_hint],
+    ["ACTIVE_AGENTS", (.active_agents | if type == "array" then map(text) | join(", ") else "" end)],
+    ["LAST_UPDATE", .last_update]
+  | "TASK_\(.[0])=\(.[1] | text | @sh)"'
+
+_ENEO_TASK_VIEW_FIELDS=" SLUG LANE PHASE PHASE_TOTAL PHASE_NAME TDD_PHASE WAVE WAVE_TOTAL WAVE_BAR STATUS NEXT_HINT ACTIVE_AGENTS LAST_UPDATE "
+
+# _eneo_task_view_assign < view: set TASK_* from the records on stdin. A
+# quoted value may span lines (a newline in next_hint); fails on a record
+# that is not TASK_<field>='...' with '\'' as the only escape.
+_eneo_task_view_assign() {
+  local re=$'^TASK_([A-Z_]+)=\'(([^\']|\'\\\\\'\')*)\'$' line record="" key value
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    record+="$line"
+    if [[ ! "$record" =~ $re ]]; then
+      record+=$'\n'
+      continue
+    fi
+    key="${BASH_REMATCH[1]}"
+    value="${BASH_REMATCH[2]}"
+    [[ "$_ENEO_TASK_VIEW_FIELDS" == *" $key "* ]] || return 1
+    printf -v "TASK_$key" '%s' "${value//"'\''"/"'"}"
+    record=""
+  done
+  [[ -z "$record" ]]
+}
+
+eneo_task_view() {
+  _eneo_repo_root_lookup
+  local file="$ENEO_REPO_ROOT/.claude/state/current-task.json" fields
+  local view="${file%.json}.view" journal="${file%.json}.journal" beat="" _ key
+  [[ -f "$file" ]] || return 1
+  for key in $_ENEO_TASK_VIEW_FIELDS; do
+    printf -v "TASK_$key" '%s' ""
+  done
+  if ! [[ -f "$view" && ! "$file" -nt "$view" && ! "$journal" -nt "$view" ]] \
+      || ! _eneo_task_view_assign 2>/dev/null < "$view"; then
+    fields=$(eneo_task_jq -r "$ENEO_TASK_VIEW" 2>/dev/null) || return 1
+    _eneo_task_view_assign <<<"$fields" || return 1
+  fi
+  { read -r _ beat < "${file%/*}/heartbeat"; } 2>/dev/null || true
+  if [[ "$beat" > "$TASK_LAST_UPDATE" ]]; then
+    TASK_LAST_UPDATE="$beat"
+  fi
+}
+
 eneo_current_slug() {
+  if (( ENEO_CTX_VALID )); then
+    [[ -z "$ENEO_CTX_SLUG" ]] || echo "$ENEO_CTX_SLUG"
+    return
+  fi
   local root
-  root=$(eneo_repo_root)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
   local file="$root/.claude/state/current-task.json"
   if [[ -f "$file" ]]; then
     # Parse JSON "slug" without requiring jq (fail soft)
@@ -160,12 +884,277 @@ eneo_current_slug() {
   fi
 }
 
+# --- Hook context envelope ----------------------------------------------------
+# ENEO_CTX carries the facts a hook already resolved (mode, repo root,
+# container, phase, slug) to every helper it starts, so children skip
+# re-detection. It is one compact JSON line in a fixed key order:
+#   {"v":2,"key":"<start dir>","mode":"...","root":"...","container":"...",
+#    "cid":"...","phase":"...","slug":"...","gen":"...","sum":"<fnv1a-32 hex>"}
+# "sum" is FNV-1a over everything before ',"sum"' plus the closing brace.
+# Envelopes with another version, a bad checksum, or a key that is not this
+# process's CLAUDE_PROJECT_DIR (else $PWD) are ignored. "gen" is the content
+# of .claude/state/gen when the envelope was built; every state writer
+# rewrites that file after it writes, so an envelope whose gen no longer
+# matches is stale and ignored too. Writers in this process also call
+# eneo_ctx_invalidate, and an explicit ENEO_DEVCONTAINER_MODE still wins.
+# env.py reads the same envelope.
+ENEO_CTX_VERSION=2
+ENEO_CTX_RE='^\{"v":2,"key":"([^"]*)","mode":"([^"]*)","root":"([^"]*)","container":"([^"]*)","cid":"([^"]*)","phase":"([^"]*)","slug":"([^"]*)","gen":"([^"]*)"\}$'
+ENEO_CTX_SUM_RE='^(\{.*),"sum":"([0-9a-f]{8})"\}$'
+ENEO_CTX_VALID=0
+
+_eneo_fnv1a() {
+  local LC_ALL=C
+  local s="$1" h=2166136261 i c
+  for ((i = 0; i < ${#s}; i++)); do
+    printf -v c '%d' "'${s:i:1}"
+    h=$(( ((h ^ (c & 255)) * 16777619) & 0xFFFFFFFF ))
+  done
+  printf '%08x' "$h"
+}
+
+# Prints the envelope for the current process, or nothing when a value
+# cannot be embedded without escaping.
+eneo_ctx() {
+  local mode root container cid phase slug gen body value
+  mode=$(detect_env)
+  _eneo_repo_root_lookup
+  root="$ENEO_REPO_ROOT"
+  container=""
+  cid=""
+  if [[ "$mode" == "host-with-docker" ]]; then
+    eneo_container_name >/dev/null 2>&1 || true
+    container="$ENEO_CONTAINER_NAME_CACHE"
+    cid="$ENEO_CONTAINER_ID_CACHE"
+  fi
+  # Read the generation first: a write landing after this point leaves the
+  # envelope with an old gen, so it is rejected rather than trusted.
+  gen=$(eneo_state_gen "$root")
+  phase=$(eneo_phase)
+  slug=$(eneo_current_slug)
+  for value in "${CLAUDE_PROJECT_DIR:-$PWD}" "$mode" "$root" "$container" "$cid" "$phase" "$slug" "$gen"; do
+    [[ "$value" != *[\"\\[:cntrl:]]* ]] || return 0
+  done
+  printf -v body '{"v":%s,"key":"%s","mode":"%s","root":"%s","container":"%s","cid":"%s","phase":"%s","slug":"%s","gen":"%s"}' \
+    "$ENEO_CTX_VERSION" "${CLAUDE_PROJECT_DIR:-$PWD}" "$mode" "$root" "$container" "$cid" "$phase" "$slug" "$gen"
+  printf '%s,"sum":"%s"}\n' "${body%\}}" "$(_eneo_fnv1a "$body")"
+}
+
+# Computes the envelope once and exports it for every child of this shell.
+eneo_ctx_export() {
+  ENEO_CTX=$(eneo_ctx)
+  export ENEO_CTX
+  _eneo_ctx_load
+}
+
+eneo_ctx_invalidate() {
+  unset ENEO_CTX
+  ENEO_CTX_VALID=0
+}
+
+_eneo_ctx_load() {
+  ENEO_CTX_VALID=0
+  local ctx="${ENEO_CTX:-}"
+  [[ -n "$ctx" && "$ctx" =~ $ENEO_CTX_SUM_RE ]] || return 0
+  local body="${BASH_REMATCH[1]}}" sum="${BASH_REMATCH[2]}"
+  [[ "$body" =~ $ENEO_CTX_RE ]] || return 0
+  [[ "${BASH_REMATCH[1]}" == "${CLAUDE_PROJECT_DIR:-$PWD}" ]] || return 0
+  ENEO_CTX_KEY="${BASH_REMATCH[1]}"
+  ENEO_CTX_MODE="${BASH_REMATCH[2]}"
+  ENEO_CTX_ROOT="${BASH_REMATCH[3]}"
+  ENEO_CTX_CONTAINER="${BASH_REMATCH[4]}"
+  ENEO_CTX_CID="${BASH_REMATCH[5]}"
+  ENEO_CTX_PHASE="${BASH_REMATCH[6]}"
+  ENEO_CTX_SLUG="${BASH_REMATCH[7]}"
+  local gen="${BASH_REMATCH[8]}" current=""
+  [[ "$(_eneo_fnv1a "$body")" == "$sum" ]] || return 0
+  read -r current 2>/dev/null <"$ENEO_CTX_ROOT/.claude/state/gen" || true
+  [[ "$gen" == "$current" ]] || return 0
+  ENEO_CTX_VALID=1
+}
+
+# Prints the state generation token for <root> (empty when none was written).
+eneo_state_gen() {
+  local gen=""
+  read -r gen 2>/dev/null <"$1/.claude/state/gen" || true
+  printf '%s\n' "$gen"
+}
+
 # --- Debug introspection ------------------------------------------------------
 eneo_env_report() {
   echo "ENEO_DEVCONTAINER_MODE=${ENEO_DEVCONTAINER_MODE:-<unset>}"
   echo "detected_mode=$(detect_env)"
-  echo "repo_root=$(eneo_repo_root)"
+  _eneo_repo_root_lookup
+  echo "repo_root=$ENEO_REPO_ROOT"
   echo "container=$(eneo_container_name)"
   echo "phase=$(eneo_phase)"
   echo "slug=$(eneo_current_slug)"
+  echo "env_cache=$(eneo_env_cache_stats)"
+  echo "ctx=$(eneo_ctx)"
+}
+
+# --- Hook latency spans -------------------------------------------------------
+# eneo_trace_begin NAME EVENT, called right after sourcing, appends one span
+# per process to .claude/stats/hook-timings.jsonl when the process exits:
+#   {"hook":"...","event":"...","start_us":N,"dur_us":N,"exit":N,"spawns":N,"pid":N}
+# "spawns" is the growth of the kernel's last allocated PID over the span
+# (/proc/sys/kernel/ns_last_pid), i.e. every process the hook forked, plus
+# any started concurrently elsewhere; null where /proc does not expose it.
+# Spans are only written when .claude/stats/ already exists (or
+# ENEO_TRACE=1, which creates it); ENEO_TRACE=0 disables tracing. lib/
+# hook_trace.py writes the same lines for Python hooks and bins, and
+# bin/eneo-hook-trace summarizes them. An EXIT trap set before the span
+# begins is kept and runs first; a script that sets its own EXIT trap later
+# must call eneo_on_exit "$rc" from it.
+ENEO_TRACE_NAME=""
+
+# _eneo_exit_trap: run eneo_on_exit at exit, after whatever EXIT trap the
+# sourcing script already had. That trap moves into _eneo_exit_prev, which
+# is entered with the exit status still in $?.
+_eneo_exit_trap() {
+  local prev
+  prev="$(trap -p EXIT)"
+  [[ "$prev" != *eneo_on_exit* && "$prev" != *_eneo_exit_chain* ]] || return 0
+  if [[ -z "$prev" ]]; then
+    trap 'eneo_on_exit $?' EXIT
+    return 0
+  fi
+  # trap -p prints `trap -- 'CMD' EXIT`, quoted for reuse as shell input.
+  prev="${prev#trap -- }"
+  eval "prev=${prev% EXIT}"
+  eval "_eneo_exit_prev() {
+$prev
+}"
+  trap _eneo_exit_chain EXIT
+}
+
+_eneo_exit_status() { return "$1"; }
+
+_eneo_exit_chain() {
+  local rc=$?
+  if (( rc == 0 )); then
+    _eneo_exit_prev || true
+  else
+    _eneo_exit_status "$rc" || _eneo_exit_prev || true
+  fi
+  eneo_on_exit "$rc"
+}
+
+eneo_trace_begin() {
+  [[ "${ENEO_TRACE:-}" != "0" && -z "$ENEO_TRACE_NAME" ]] || return 0
+  ENEO_TRACE_NAME="$1"
+  ENEO_TRACE_EVENT="${2:-}"
+  _eneo_now_us ENEO_TRACE_START
+  ENEO_TRACE_PID0=""
+  read -r ENEO_TRACE_PID0 < /proc/sys/kernel/ns_last_pid 2>/dev/null || true
+  _eneo_exit_trap
 }
+
+eneo_trace_end() {
+  local rc="${1:-0}" now pid1="" spawns=null
+  [[ -n "$ENEO_TRACE_NAME" ]] || return 0
+  _eneo_now_us now
+  read -r pid1 < /proc/sys/kernel/ns_last_pid 2>/dev/null || true
+  if [[ -n "$ENEO_TRACE_PID0" && -n "$pid1" ]] && (( pid1 >= ENEO_TRACE_PID0 )); then
+    spawns=$(( pid1 - ENEO_TRACE_PID0 ))
+  fi
+  _eneo_repo_root_lookup 2>/dev/null || true
+  local dir="$ENEO_REPO_ROOT/.claude/stats"
+  if [[ ! -d "$dir" ]]; then
+    [[ "${ENEO_TRACE:-}" == "1" && -d "$ENEO_REPO_ROOT/backend/src/intric" ]] || return 0
+    command mkdir -p "$dir" 2>/dev/null || return 0
+  fi
+  printf '{"hook":"%s","event":"%s","start_us":%s,"dur_us":%s,"exit":%s,"spawns":%s,"pid":%s}\n' \
+    "$ENEO_TRACE_NAME" "$ENEO_TRACE_EVENT" "$ENEO_TRACE_START" "$(( now - ENEO_TRACE_START ))" \
+    "$rc" "$spawns" "$$" >> "$dir/hook-timings.jsonl" 2>/dev/null || true
+  ENEO_TRACE_NAME=""
+}
+
+# --- Spawn accounting (ENEO_HOOK_PROFILE) -------------------------------------
+# With ENEO_HOOK_PROFILE set, sourcing this file shadows the external binaries
+# hooks fork (ENEO_PROFILE_BINS) with functions that time each call and log
+# "<bin> <microseconds>" to a per-process file. Most calls run inside $(...)
+# or pipelines, whose variables die with the subshell, so the log is a file;
+# appends use only builtins. At exit the totals per binary are printed:
+#   ENEO_HOOK_PROFILE=1      one line on stderr
+#   ENEO_HOOK_PROFILE=stats  one JSON line in .claude/stats/hook-profile.jsonl
+#     {"hook":"...","pid":N,"ts":"...","bins":{"jq":{"n":N,"ms":N},...}}
+# env.py does the same for subprocess calls (lib/hook_profile.py), and
+# `eneo-hook-trace --profile` ranks binaries across the stats file. Times are
+# wall time per call, so stages of one pipeline overlap. Only direct calls by
+# name are seen; `command jq` or an absolute path bypasses the wrapper.
+ENEO_PROFILE_BINS="${ENEO_PROFILE_BINS:-jq git docker date mktemp shasum sha256sum wc cat sed awk grep head tail cut tr mv rm mkdir python3 uv}"
+ENEO_PROF_LOG=""
+
+_eneo_prof_run() {
+  local bin="$1" t0 t1 rc=0
+  shift
+  _eneo_now_us t0
+  command "$bin" "$@" || rc=$?
+  [[ -n "$ENEO_PROF_LOG" ]] || return "$rc"
+  _eneo_now_us t1
+  printf '%s %s\n' "$bin" "$(( t1 - t0 ))" >> "$ENEO_PROF_LOG" 2>/dev/null || true
+  return "$rc"
+}
+
+_eneo_profile_init() {
+  [[ -n "${ENEO_HOOK_PROFILE:-}" && "$ENEO_HOOK_PROFILE" != "0" && -z "$ENEO_PROF_LOG" ]] || return 0
+  ENEO_PROF_LOG="${TMPDIR:-/tmp}"
+  ENEO_PROF_LOG="${ENEO_PROF_LOG%/}/eneo-profile.$$.$RANDOM"
+  : > "$ENEO_PROF_LOG" 2>/dev/null || { ENEO_PROF_LOG=""; return 0; }
+  local bin
+  for bin in $ENEO_PROFILE_BINS; do
+    eval "$bin() { _eneo_prof_run $bin \"\$@\"; }"
+  done
+  _eneo_exit_trap
+}
+
+eneo_profile_flush() {
+  [[ -n "$ENEO_PROF_LOG" ]] || return 0
+  local log="$ENEO_PROF_LOG" bin us i total_n=0 total_us=0 line="" json=""
+  ENEO_PROF_LOG=""
+  # Parallel indexed arrays rather than associative ones: bash 3.2 has none.
+  local -a bins=() count=() micros=()
+  while read -r bin us; do
+    [[ -n "$bin" && "$us" =~ ^[0-9]+$ ]] || continue
+    for (( i = 0; i < ${#bins[@]}; i++ )); do
+      [[ "${bins[i]}" != "$bin" ]] || break
+    done
+    bins[i]="$bin"
+    count[i]=$(( ${count[i]:-0} + 1 ))
+    micros[i]=$(( ${micros[i]:-0} + us ))
+  done < "$log"
+  command rm -f "$log"
+  for (( i = 0; i < ${#bins[@]}; i++ )); do
+    total_n=$(( total_n + count[i] ))
+    total_us=$(( total_us + micros[i] ))
+    printf -v line '%s %s %s×%d.%dms' "$line" "${bins[i]}" "${count[i]}" \
+      "$(( micros[i] / 1000 ))" "$(( micros[i] % 1000 / 100 ))"
+    printf -v json '%s,"%s":{"n":%d,"ms":%d.%03d}' "$json" "${bins[i]}" "${count[i]}" \
+      "$(( micros[i] / 1000 ))" "$(( micros[i] % 1000 ))"
+  done
+  local hook="${ENEO_TRACE_NAME:-${0##*/}}"
+  if [[ "$ENEO_HOOK_PROFILE" == "stats" ]]; then
+    _eneo_repo_root_lookup 2>/dev/null || true
+    local dir="$ENEO_REPO_ROOT/.claude/stats" ts
+    [[ -d "$ENEO_REPO_ROOT/backend/src/intric" ]] || return 0
+    [[ -d "$dir" ]] || command mkdir -p "$dir" 2>/dev/null || return 0
+    _eneo_utc_time ts '%Y-%m-%dT%H:%M:%SZ'
+    printf '{"hook":"%s","pid":%s,"ts":"%s","bins":{%s}}\n' "$hook" "$$" "$ts" "${json#,}" \
+      >> "$dir/hook-profile.jsonl" 2>/dev/null || true
+  else
+    printf '[eneo-profile] %s: %d spawns, %d.%dms —%s\n' "$hook" "$total_n" \
+      "$(( total_us / 1000 ))" "$(( total_us % 1000 / 100 ))" "${line:- none}" >&2
+  fi
+}
+
+# Runs at exit of any process that began a span or a profile: the profile is
+# flushed first so it can name the hook, then the span is written.
+eneo_on_exit() {
+  local rc="${1:-0}"
+  eneo_profile_flush
+  eneo_trace_end "$rc"
+}
+
+_eneo_ctx_load
+_eneo_profile_init
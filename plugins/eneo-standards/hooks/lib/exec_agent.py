@@ -0,0 +1,333 @@
+"""Persistent in-container exec agent for host-with-docker mode.
+
+Every plain `eneo_exec` in host-with-docker mode pays for `docker exec` plus a
+login shell. With ENEO_EXEC_AGENT=1, env.py and env.sh instead hand commands to
+a long-lived agent started once inside the devcontainer. The agent listens on
+a unix socket in the bind-mounted repo (.claude/state/.cache/exec-agent.sock),
+so host-side clients reach it without entering the container.
+
+Protocol: the client sends one JSON line
+    {"cwd": "/workspace/backend", "argv": [...], "env": {...}, "timeout": 20}
+and the agent streams JSON lines back:
+    {"stream": "stdout" | "stderr", "data": "..."}   (zero or more)
+    {"exit": 0, "duration_ms": 12.5, "timed_out": false}   (exactly one, last)
+
+Unix sockets only work across the bind mount when host and container share a
+kernel (Linux). Where the socket cannot be reached (Docker Desktop on macOS),
+the first failed start is remembered for ENEO_EXEC_AGENT_RETRY seconds and
+callers keep using `docker exec`.
+
+CLI:
+    exec_agent.py serve --socket PATH [--idle SECONDS]
+    exec_agent.py run --root ROOT --container NAME --workdir DIR [--timeout S]
+                      [--unavailable-marker PATH] -- CMD...
+`run` exits with the command's code, or 75 when the agent is unavailable and
+nothing was started (the caller should fall back). A command can exit 75
+itself, so callers that fall back pass --unavailable-marker: the file is
+created only in the unavailable case, and a 75 without it is the command's.
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+EX_TEMPFAIL = 75
+CONTAINER_ROOT = "/workspace"
+AGENT_RELPATH = Path(".claude") / "state" / ".cache"
+_SOCKET_NAME = "exec-agent.sock"
+_SCRIPT_NAME = "exec-agent.py"
+_DISABLED_NAME = "exec-agent.disabled"
+_MAX_SOCKET_PATH = 100  # AF_UNIX sun_path is 104–108 bytes depending on platform
+
+
+class AgentUnavailable(Exception):
+    """The agent could not be reached; nothing was executed."""
+
+
+# --- Server (runs inside the devcontainer) -----------------------------------
+def _pump(stream, name: str, send) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in iter(lambda: stream.read1(65536), b""):
+        text = decoder.decode(chunk)
+        if text:
+            send({"stream": name, "data": text})
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        send({"stream": name, "data": tail})
+
+
+def _handle(conn: socket.socket) -> None:
+    write_lock = threading.Lock()
+
+    def send(frame: dict) -> None:
+        line = (json.dumps(frame) + "\n").encode("utf-8")
+        with write_lock:
+            conn.sendall(line)
+
+    try:
+        with conn, conn.makefile("rb") as reader:
+            request = json.loads(reader.readline() or b"{}")
+            argv = request.get("argv") or []
+            if not argv:
+                send({"exit": 2, "duration_ms": 0, "timed_out": False})
+                return
+            env = dict(os.environ)
+            env.update(request.get("env") or {})
+            started = time.monotonic()
+            try:
+                proc = subprocess.Popen(
+                    argv,
+                    cwd=request.get("cwd") or None,
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    start_new_session=True,
+                )
+            except OSError as exc:
+                send({"stream": "stderr", "data": f"[exec-agent] {exc}\n"})
+                send({"exit": 127, "duration_ms": 0, "timed_out": False})
+                return
+            pumps = [
+                threading.Thread(target=_pump, args=(proc.stdout, "stdout", send)),
+                threading.Thread(target=_pump, args=(proc.stderr, "stderr", send)),
+            ]
+            for pump in pumps:
+                pump.start()
+            timed_out = False
+            try:
+                proc.wait(timeout=request.get("timeout"))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+            for pump in pumps:
+                pump.join()
+            send({
+                "exit": 124 if timed_out else proc.returncode,
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                "timed_out": timed_out,
+            })
+    except (OSError, ValueError):
+        pass  # client went away or sent garbage; nothing to report to
+
+
+def serve(socket_path: str, idle_seconds: float = 600) -> int:
+    """Accept requests until no client has connected for *idle_seconds*."""
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    server.listen(16)
+    server.settimeout(idle_seconds)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return 0  # idle exit
+            conn.settimeout(None)
+            threading.Thread(target=_handle, args=(conn,), daemon=True).start()
+    finally:
+        server.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+
+# --- Client (runs on the host) -----------------------------------------------
+def socket_path(root: str) -> Path:
+    return Path(root) / AGENT_RELPATH / _SOCKET_NAME
+
+
+def request(
+    sock_path: str,
+    argv: list[str],
+    *,
+    cwd: str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    on_output=None,
+) -> tuple[int, str, str, bool]:
+    """Send one request; return (exit_code, stdout, stderr, timed_out).
+
+    *on_output(stream_name, text)* is called for each chunk as it arrives.
+    Raises AgentUnavailable if the request cannot be sent, or if the first
+    frame back is not agent JSON (not an agent socket).
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(sock_path)
+    except OSError as exc:
+        client.close()
+        raise AgentUnavailable(str(exc)) from exc
+
+    payload = {"cwd": cwd, "argv": argv, "env": env or {}, "timeout": timeout}
+    out: list[str] = []
+    err: list[str] = []
+    with client, client.makefile("rb") as reader:
+        try:
+            client.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        except OSError as exc:
+            raise AgentUnavailable(str(exc)) from exc
+        for line in reader:
+            try:
+                frame = json.loads(line)
+                if not isinstance(frame, dict):
+                    raise ValueError(line)
+            except ValueError:
+                if not out and not err:
+                    raise AgentUnavailable(f"invalid frame from {sock_path}") from None
+                break  # garbage after output started: the command may have run
+            if "exit" in frame:
+                return int(frame["exit"]), "".join(out), "".join(err), bool(frame.get("timed_out"))
+            (err if frame.get("stream") == "stderr" else out).append(frame.get("data", ""))
+            if on_output:
+                on_output(frame.get("stream"), frame.get("data", ""))
+    # The agent died mid-request; the command may have run.
+    return 1, "".join(out), "".join(err) + "[exec-agent] connection closed before exit status\n", False
+
+
+def _can_connect(sock_path: Path) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(sock_path))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def ensure_agent(root: str, container: str, *, wait: float = 3.0) -> Path:
+    """Return a reachable agent socket, starting the agent if needed.
+
+    Raises AgentUnavailable when the agent cannot be started or reached.
+    """
+    sock = socket_path(root)
+    cache_dir = sock.parent
+    if len(str(sock)) > _MAX_SOCKET_PATH:
+        raise AgentUnavailable(f"socket path too long: {sock}")
+    if sock.exists() and _can_connect(sock):
+        return sock
+
+    disabled = cache_dir / _DISABLED_NAME
+    retry = float(os.environ.get("ENEO_EXEC_AGENT_RETRY", "600"))
+    try:
+        if time.time() - disabled.stat().st_mtime < retry:
+            raise AgentUnavailable("agent start failed recently")
+    except FileNotFoundError:
+        pass
+
+    # Copy the agent into the bind mount so the container can run it; the
+    # plugin directory itself is not visible inside the devcontainer.
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    script = cache_dir / _SCRIPT_NAME
+    shutil.copyfile(__file__, script)
+    container_dir = f"{CONTAINER_ROOT}/{AGENT_RELPATH.as_posix()}"
+    idle = os.environ.get("ENEO_EXEC_AGENT_IDLE", "600")
+    try:
+        subprocess.run(
+            [
+                "docker", "exec", "-d", container,
+                "bash", "-lc",
+                'export PATH=/home/vscode/.local/bin:$PATH; exec python3 "$@"',
+                "bash", f"{container_dir}/{_SCRIPT_NAME}",
+                "serve", "--socket", f"{container_dir}/{_SOCKET_NAME}", "--idle", idle,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        )
+    except (FileNotFoundError, subprocess.SubprocessError) as exc:
+        disabled.touch()
+        raise AgentUnavailable(f"could not start agent: {exc}") from exc
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if sock.exists() and _can_connect(sock):
+            return sock
+        time.sleep(0.05)
+    disabled.touch()
+    raise AgentUnavailable("agent socket unreachable from the host")
+
+
+def dispatch(
+    root: str,
+    container: str,
+    workdir: str,
+    argv: list[str],
+    *,
+    timeout: float | None = None,
+    env: dict[str, str] | None = None,
+    on_output=None,
+) -> tuple[int, str, str, bool]:
+    """Run *argv* in ``/workspace/<workdir>`` through the agent."""
+    sock = ensure_agent(root, container)
+    cwd = f"{CONTAINER_ROOT}/{workdir}".rstrip("/")
+    return request(str(sock), argv, cwd=cwd, env=env, timeout=timeout, on_output=on_output)
+
+
+def write_through(stream_name: str, text: str) -> None:
+    target = sys.stderr if stream_name == "stderr" else sys.stdout
+    target.write(text)
+    target.flush()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_p = sub.add_parser("serve")
+    serve_p.add_argument("--socket", required=True)
+    serve_p.add_argument("--idle", type=float, default=600)
+    run_p = sub.add_parser("run")
+    run_p.add_argument("--root", required=True)
+    run_p.add_argument("--container", required=True)
+    run_p.add_argument("--workdir", default="")
+    run_p.add_argument("--timeout", type=float)
+    run_p.add_argument("--unavailable-marker")
+    run_p.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return serve(args.socket, args.idle)
+
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        parser.error("run needs a command after --")
+    try:
+        returncode, _, _, timed_out = dispatch(
+            args.root, args.container, args.workdir, cmd,
+            timeout=args.timeout, on_output=write_through,
+        )
+    except AgentUnavailable:
+        if args.unavailable_marker:
+            try:
+                Path(args.unavailable_marker).parent.mkdir(parents=True, exist_ok=True)
+                Path(args.unavailable_marker).touch()
+            except OSError:
+                pass
+        return EX_TEMPFAIL
+    if timed_out:
+        print(f"[exec-agent] timed out after {args.timeout}s: {' '.join(cmd)}", file=sys.stderr)
+    return returncode
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,379 @@
+"""Resident per-session hook daemon (opt-in with ENEO_HOOK_DAEMON=1).
+
+Every PreToolUse call is otherwise a cold process that resolves the repo
+root, reads the phase mirror and current-task.json, and compiles the policy
+patterns before it can answer. With ENEO_HOOK_DAEMON=1, hooks/dispatch.py
+becomes a thin client: it forwards the raw stdin payload to a daemon over a
+unix socket and relays the exit code and stderr it gets back. The daemon
+keeps the repo root, env mode, parsed task state, compiled policies and the
+git index signature warm, re-reading a file only when its stat changes.
+
+The first hook of a session that finds no daemon starts one in the
+background and answers in-process; so does any hook that cannot reach it.
+The daemon exits after ENEO_HOOK_DAEMON_IDLE seconds without a request
+(default 900).
+
+Socket: ${TMPDIR:-/tmp}/eneo-hookd.<uid>/<key>.sock, where <key> hashes the
+start directory (CLAUDE_PROJECT_DIR or cwd), the session ID and the mtimes
+of the policy sources, so a new session or an updated plugin gets a fresh
+daemon instead of stale answers. The directory is used only when it is not a
+symlink, is owned by this user and has mode 0700; otherwise (someone else
+made it first on a shared /tmp) every hook answers in-process.
+
+Protocol: the client sends one header line with the comma-separated policy
+names (empty = the tool's policies), then the payload, then shuts down its
+write side. The daemon replies with the exit code on the first line and the
+stderr text after it.
+
+CLI:
+    hook_daemon.py serve --socket PATH [--idle SECONDS]
+    hook_daemon.py status        # print the warm state of this session's daemon
+
+The client half only imports os, socket and sys so forwarding stays cheap;
+everything else is imported by the daemon.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import stat
+import sys
+
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+_SOURCES = (
+    "policies.py", "path_policy.py", "path-policy.json", "env.py", "hook_trace.py", "decision_cache.py",
+    "hook_daemon.py",
+)
+_SPAWN_BACKOFF = 10.0  # seconds between start attempts for the same socket
+_MAX_SOCKET_PATH = 100  # AF_UNIX sun_path is 104–108 bytes depending on platform
+
+
+def enabled() -> bool:
+    return os.environ.get("ENEO_HOOK_DAEMON") == "1"
+
+
+# --- Client ------------------------------------------------------------------
+def socket_path() -> str:
+    """This session's daemon socket for the current start directory."""
+    import hashlib
+
+    start = os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+    session = os.environ.get("ENEO_SESSION_ID") or os.environ.get("CLAUDE_SESSION_ID") or ""
+    mtimes = []
+    for name in _SOURCES:
+        try:
+            mtimes.append(str(os.stat(os.path.join(_LIB_DIR, name)).st_mtime_ns))
+        except OSError:
+            mtimes.append("-")
+    key = hashlib.sha1("\0".join([start, session, *mtimes]).encode("utf-8")).hexdigest()[:16]
+    tmp = (os.environ.get("TMPDIR") or "/tmp").rstrip("/") or "/"
+    return os.path.join(tmp, f"eneo-hookd.{os.getuid()}", f"{key}.sock")
+
+
+def _socket_dir_trusted(directory: str) -> bool:
+    try:
+        st = os.lstat(directory)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and stat.S_ISDIR(st.st_mode) and stat.S_IMODE(st.st_mode) == 0o700
+
+
+def _exchange(path: str, request: bytes, timeout: float) -> bytes:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path)
+        client.sendall(request)
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+    finally:
+        client.close()
+
+
+def forward(names: list[str], payload: bytes, *, timeout: float = 2.0) -> tuple[int, str] | None:
+    """Have the daemon evaluate *payload*; None means "answer in-process".
+
+    A missing or dead daemon is started in the background for the next call.
+    Policies only read state, so re-running one in-process after a timeout
+    is safe.
+    """
+    path = socket_path()
+    if not _socket_dir_trusted(os.path.dirname(path)):
+        start_daemon(path)  # creates the directory when it is missing
+        return None
+    try:
+        reply = _exchange(path, ",".join(names).encode("utf-8") + b"\n" + payload, timeout)
+    except (ConnectionRefusedError, FileNotFoundError):
+        start_daemon(path)
+        return None
+    except OSError:
+        return None
+    head, _, stderr = reply.partition(b"\n")
+    if not head.isdigit():
+        return None
+    return int(head), stderr.decode("utf-8", "replace")
+
+
+def start_daemon(path: str) -> bool:
+    """Spawn a detached daemon for *path* unless one was started recently."""
+    import subprocess
+    import time
+
+    if len(path) > _MAX_SOCKET_PATH:
+        return False
+    marker = path[: -len(".sock")] + ".spawned"
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if not _socket_dir_trusted(os.path.dirname(path)):
+            return False  # someone else's directory: never serve from it
+        if time.time() - os.stat(marker).st_mtime < _SPAWN_BACKOFF:
+            return False
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    env = {k: v for k, v in os.environ.items() if k != "ENEO_CTX"}  # an envelope would pin stale state
+    try:
+        with open(marker, "w", encoding="utf-8"):
+            pass
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--socket", path,
+             "--idle", os.environ.get("ENEO_HOOK_DAEMON_IDLE", "900")],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            start_new_session=True,
+        )
+    except OSError:
+        return False
+    return True
+
+
+# --- Daemon ------------------------------------------------------------------
+class WarmState:
+    """Task state the policies read, re-read only when a file's stat changes.
+
+    Provides the same phase() / current_slug() interface as env.py, so it can
+    stand in for it as a policies.PolicyContext state source.
+    """
+
+    def __init__(self) -> None:
+        import env
+
+        self._env = env
+        self._files: dict[str, tuple[tuple[int, int, int], object]] = {}
+        self._mode: tuple[tuple[int, int, int] | None, str] | None = None
+        self.requests = 0
+
+    def root(self) -> str | None:
+        # env memoizes the root in-process against the mtime of .git.
+        return self._env.find_repo_root()
+
+    def mode(self) -> str:
+        # Re-detect whenever env.json changes (another hook re-probed, or the
+        # entry expired and was rewritten). detect_env() may rewrite it itself,
+        # so the signature is taken after detection.
+        path = self._env.env_cache_file()
+        if self._mode is None or self._mode[0] != self._signature(path):
+            self._env._docker_probe_memo = None
+            mode = self._env.detect_env()
+            self._mode = (self._signature(path), mode)
+        return self._mode[1]
+
+    @staticmethod
+    def _signature(path) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino) if st else None
+
+    def _read(self, relpath: str, parse, default):
+        root = self.root()
+        if not root:
+            return default
+        path = os.path.join(root, relpath)
+        try:
+            st = os.stat(path)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+            cached = self._files.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+            value = parse(path)
+        except (OSError, ValueError):
+            self._files.pop(path, None)
+            return default
+        self._files[path] = (signature, value)
+        return value
+
+    @staticmethod
+    def _text(path: str) -> str:
+        with open(path, encoding="utf-8") as handle:
+            return handle.read().strip()
+
+    @staticmethod
+    def _json(path: str) -> object:
+        import json
+
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def phase(self) -> str:
+        return self._read(os.path.join(".claude", "state", "phase"), self._text, "FREE") or "FREE"
+
+    def task(self) -> dict:
+        task = self._read(os.path.join(".claude", "state", "current-task.json"), self._json, {})
+        return task if isinstance(task, dict) else {}
+
+    def current_slug(self) -> str | None:
+        return self.task().get("slug")
+
+    def git_index(self) -> tuple[int, int] | None:
+        """(mtime_ns, size) of .git/index; changes whenever the index does."""
+        root = self.root()
+        try:
+            st = os.stat(os.path.join(root, ".git", "index")) if root else None
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size) if st else None
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "root": self.root(),
+            "mode": self.mode(),
+            "phase": self.phase(),
+            "slug": self.current_slug(),
+            "git_index": self.git_index(),
+        }
+
+
+def _read_request(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _answer(state: WarmState, request: bytes) -> bytes:
+    import json
+
+    import policies
+
+    header, _, payload = request.partition(b"\n")
+    if header == b"?status":
+        return b"0\n" + json.dumps(state.snapshot()).encode("utf-8")
+    state.requests += 1
+    names = tuple(name for name in header.decode("utf-8", "replace").split(",") if name)
+    try:
+        code, stderr = policies.handle(payload, names, state)
+    except Exception as exc:  # noqa: BLE001 - a policy bug must fail open, not kill the daemon
+        code, stderr = 0, f"[hook-daemon] {type(exc).__name__}: {exc}\n"
+    return f"{code}\n".encode("utf-8") + stderr.encode("utf-8")
+
+
+def _can_connect(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def serve(path: str, idle_seconds: float = 900) -> int:
+    """Answer hook requests until none has arrived for *idle_seconds*.
+
+    Requests are handled one at a time: each is a few stat calls and regex
+    matches, and WarmState is not shared across threads.
+    """
+    sys.path.insert(0, _LIB_DIR)
+    if not _socket_dir_trusted(os.path.dirname(path)):
+        return 1
+    if _can_connect(path):
+        return 0  # another hook won the start race
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    state = WarmState()
+    import policies  # noqa: F401 - compile the policy module before the first request
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(16)
+    server.settimeout(idle_seconds)
+    inode = os.stat(path).st_ino
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return 0  # idle exit
+            with conn:
+                conn.settimeout(2.0)
+                try:
+                    conn.sendall(_answer(state, _read_request(conn)))
+                except OSError:
+                    pass  # client went away; it falls back on its own
+    finally:
+        server.close()
+        try:
+            if os.stat(path).st_ino == inode:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def status() -> dict | None:
+    """The warm state of this session's daemon, or None when none is running."""
+    import json
+
+    path = socket_path()
+    if not _socket_dir_trusted(os.path.dirname(path)):
+        return None
+    try:
+        reply = _exchange(path, b"?status\n", 2.0)
+    except OSError:
+        return None
+    head, _, body = reply.partition(b"\n")
+    return json.loads(body) if head == b"0" else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_p = sub.add_parser("serve")
+    serve_p.add_argument("--socket", required=True)
+    serve_p.add_argument("--idle", type=float, default=900)
+    sub.add_parser("status")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return serve(args.socket, args.idle)
+    snapshot = status()
+    if snapshot is None:
+        print("hook daemon: not running", file=sys.stderr)
+        return 1
+    print(json.dumps(snapshot, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Subprocess accounting for Python hooks (ENEO_HOOK_PROFILE).
+
+Python twin of the ENEO_HOOK_PROFILE block in env.sh. install() swaps
+subprocess.Popen for a subclass that counts every process by binary name
+and times it from start until wait() returns; subprocess.run and
+communicate() both end in wait(). Processes that are never waited on
+(asyncio transports reap their own children) are counted with no time.
+At exit the totals are printed:
+
+    ENEO_HOOK_PROFILE=1      one line on stderr
+    ENEO_HOOK_PROFILE=stats  one JSON line in .claude/stats/hook-profile.jsonl
+
+env.py calls install() on import, so every hook that uses the shared
+library is covered.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROFILE_RELPATH = os.path.join(".claude", "stats", "hook-profile.jsonl")
+
+_counts: dict[str, list[float]] = {}  # binary -> [calls, seconds]
+_lock = threading.Lock()
+_installed = False
+
+
+def _binary(args) -> str:
+    if isinstance(args, (str, bytes)):
+        args = args.split() or [""]
+    first = args[0] if args else ""
+    return os.path.basename(os.fsdecode(first)) or "?"
+
+
+def _add(name: str, calls: int, seconds: float) -> None:
+    with _lock:
+        entry = _counts.setdefault(name, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+
+class _ProfiledPopen(subprocess.Popen):
+    def __init__(self, args, *rest, **kwargs) -> None:
+        self._eneo_started = time.perf_counter()
+        self._eneo_binary = _binary(args)
+        self._eneo_timed = False
+        super().__init__(args, *rest, **kwargs)
+        _add(self._eneo_binary, 1, 0.0)
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout)
+        if not self._eneo_timed:
+            self._eneo_timed = True
+            _add(self._eneo_binary, 0, time.perf_counter() - self._eneo_started)
+        return returncode
+
+
+def summary() -> dict[str, dict[str, float]]:
+    with _lock:
+        return {
+            name: {"n": int(calls), "ms": round(seconds * 1000, 3)}
+            for name, (calls, seconds) in sorted(_counts.items(), key=lambda item: -item[1][1])
+        }
+
+
+def _hook_name() -> str:
+    # Same names as the spans: "typecheck-stop", not "typecheck-stop.py".
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0] if sys.argv and sys.argv[0] else "python"
+
+
+def flush() -> None:
+    """Emit the summary according to ENEO_HOOK_PROFILE; never raises."""
+    mode = os.environ.get("ENEO_HOOK_PROFILE", "")
+    bins = summary()
+    try:
+        if mode == "stats":
+            import env  # type: ignore[import-not-found]
+
+            root = env.find_repo_root()
+            if not root:
+                return
+            path = os.path.join(root, PROFILE_RELPATH)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            line = {
+                "hook": _hook_name(),
+                "pid": os.getpid(),
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "bins": bins,
+            }
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(line, separators=(",", ":")) + "\n")
+        else:
+            total_n = sum(entry["n"] for entry in bins.values())
+            total_ms = sum(entry["ms"] for entry in bins.values())
+            detail = " ".join(f"{name} {entry['n']}×{entry['ms']:.1f}ms" for name, entry in bins.items())
+            print(
+                f"[eneo-profile] {_hook_name()}: {total_n} spawns, {total_ms:.1f}ms — {detail or 'none'}",
+                file=sys.stderr,
+            )
+    except Exception:  # noqa: BLE001 - profiling must never break a hook
+        pass
+
+
+def install() -> None:
+    """Start counting when ENEO_HOOK_PROFILE is set (idempotent)."""
+    global _installed
+    mode = os.environ.get("ENEO_HOOK_PROFILE", "")
+    if _installed or not mode or mode == "0":
+        return
+    _installed = True
+    subprocess.Popen = _ProfiledPopen  # type: ignore[misc]
+    atexit.register(flush)
@@ -0,0 +1,110 @@
+"""Hook latency spans for Python hooks and bins.
+
+Python twin of eneo_trace_begin / eneo_trace_end in env.sh: one line per
+process appended to .claude/stats/hook-timings.jsonl,
+
+    {"hook":"...","event":"...","start_us":N,"dur_us":N,"exit":N,"spawns":N,"pid":N}
+
+with "spawns" taken from the growth of /proc/sys/kernel/ns_last_pid (null
+where /proc does not expose it). Spans are only written when
+.claude/stats/ exists or ENEO_TRACE=1; ENEO_TRACE=0 disables them.
+
+    sys.exit(hook_trace.run("dispatch", "PreToolUse", main))
+
+Only os, stat, sys and time are imported up front so tracing does not slow the
+PreToolUse dispatcher down; the repo root comes from env.py when a hook has
+already imported it, else from the shared root cache.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import sys
+import time
+
+TYPE_CHECKING = False  # importing typing alone costs several ms at startup
+if TYPE_CHECKING:
+    from typing import Callable
+
+TIMINGS_RELPATH = os.path.join(".claude", "stats", "hook-timings.jsonl")
+_LAST_PID = "/proc/sys/kernel/ns_last_pid"
+
+
+def _last_pid() -> int | None:
+    try:
+        with open(_LAST_PID, encoding="ascii") as handle:
+            return int(handle.read())
+    except (OSError, ValueError):
+        return None
+
+
+def repo_root() -> str | None:
+    """The repo root without importing env.py, or None if not cheaply known."""
+    env = sys.modules.get("env")
+    if env is None:
+        start = os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+        tmp = (os.environ.get("TMPDIR") or "/tmp").rstrip("/") or "/"
+        cache_dir = os.path.join(tmp, f"eneo-root-cache.{os.getuid()}")
+        cache = os.path.join(cache_dir, start.replace("/", "%"))
+        try:
+            # Trusted only when ours, as env.py checks it (see _read_root_cache).
+            dir_st, cache_st = os.lstat(cache_dir), os.lstat(cache)
+            if (
+                dir_st.st_uid == cache_st.st_uid == os.getuid()
+                and stat.S_ISDIR(dir_st.st_mode)
+                and not dir_st.st_mode & 0o077
+                and stat.S_ISREG(cache_st.st_mode)
+            ):
+                with open(cache, encoding="utf-8") as handle:
+                    root = handle.readline().rstrip("\n")
+                if root and os.path.isdir(os.path.join(root, "backend", "src", "intric")):
+                    return root
+        except OSError:
+            pass
+        import env  # type: ignore[import-not-found]
+    return env.find_repo_root()
+
+
+def record(hook: str, event: str, start_us: int, dur_us: int, exit_code: int, spawns: int | None) -> None:
+    """Append one span; never raises."""
+    if os.environ.get("ENEO_TRACE") == "0":
+        return
+    try:
+        root = repo_root()
+        if not root:
+            return
+        path = os.path.join(root, TIMINGS_RELPATH)
+        if not os.path.isdir(os.path.dirname(path)):
+            if os.environ.get("ENEO_TRACE") != "1":
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = (
+            f'{{"hook":"{hook}","event":"{event}","start_us":{start_us},"dur_us":{dur_us},'
+            f'"exit":{exit_code},"spawns":{"null" if spawns is None else spawns},"pid":{os.getpid()}}}\n'
+        )
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(line)
+    except Exception:  # noqa: BLE001 - tracing must never break a hook
+        pass
+
+
+def run(hook: str, event: str, main: Callable[[], int | None]) -> int:
+    """Call *main*, record its span, and return its exit code."""
+    if os.environ.get("ENEO_TRACE") == "0":
+        return main() or 0
+    start_us = time.time_ns() // 1000
+    started = time.perf_counter_ns()
+    pid0 = _last_pid()
+    code = 1
+    try:
+        code = main() or 0
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+        raise
+    finally:
+        dur_us = (time.perf_counter_ns() - started) // 1000
+        pid1 = _last_pid()
+        spawns = pid1 - pid0 if pid0 is not None and pid1 is not None and pid1 >= pid0 else None
+        record(hook, event, start_us, dur_us, code, spawns)
+    return code
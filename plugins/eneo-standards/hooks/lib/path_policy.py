@@ -0,0 +1,105 @@
+"""Declarative path classes shared by every PreToolUse policy.
+
+lib/path-policy.json names the classes (secret, lockfile, ratchet,
+hook_cache, phase_mirror, test, test_dir, src) and their fnmatch globs; a
+repo adds globs to a class, or new classes, in .claude/config/path-policy.json.
+Both files compile into one regex with one optional lookahead per class,
+so classify() is a single match however many globs the classes hold:
+
+    >>> classify("/r/backend/src/intric/tests/test_a.py")
+    frozenset({'src', 'test'})
+
+The repo file is located through hook_trace.repo_root(), the lookup that
+never imports env.py. The compiled matcher is memoized against the stat
+of both files, which also lets the hook daemon pick up an edited policy
+without a restart.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from fnmatch import translate
+
+DEFAULT_POLICY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "path-policy.json")
+REPO_POLICY_RELPATH = os.path.join(".claude", "config", "path-policy.json")
+
+_memo: tuple[tuple, re.Pattern[str], tuple[str, ...]] | None = None
+
+
+def _repo_root() -> str | None:
+    import hook_trace
+
+    return hook_trace.repo_root()
+
+
+def _signature(path: str | None) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if st else None
+
+
+def _read_classes(path: str) -> dict[str, list[str]]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    classes = data.get("classes") if isinstance(data, dict) else None
+    if not isinstance(classes, dict):
+        return {}
+    return {
+        name: [glob for glob in globs if isinstance(glob, str)]
+        for name, globs in classes.items()
+        if isinstance(name, str) and name.isidentifier() and isinstance(globs, list)
+    }
+
+
+def load(root: str | None = None) -> dict[str, list[str]]:
+    """Plugin classes extended by the repo's overrides, in file order."""
+    classes = _read_classes(DEFAULT_POLICY)
+    root = root or _repo_root()
+    if root:
+        for name, globs in _read_classes(os.path.join(root, REPO_POLICY_RELPATH)).items():
+            classes[name] = classes.get(name, []) + [glob for glob in globs if glob not in classes.get(name, [])]
+    return classes
+
+
+def _compile(classes: dict[str, list[str]]) -> re.Pattern[str]:
+    lookaheads = "".join(
+        f"(?=(?P<{name}>{'|'.join(translate(glob) for glob in globs)}))?"
+        for name, globs in classes.items()
+        if globs
+    )
+    return re.compile(lookaheads)
+
+
+def matcher(root: str | None = None) -> tuple[re.Pattern[str], tuple[str, ...]]:
+    """The compiled class matcher and its class names for *root*'s policy."""
+    global _memo
+    root = root or _repo_root()
+    repo_policy = os.path.join(root, REPO_POLICY_RELPATH) if root else None
+    key = (_signature(DEFAULT_POLICY), repo_policy, _signature(repo_policy))
+    if _memo is None or _memo[0] != key:
+        classes = load(root)
+        _memo = (key, _compile(classes), tuple(name for name, globs in classes.items() if globs))
+    return _memo[1], _memo[2]
+
+
+def classify(path: str, root: str | None = None) -> frozenset[str]:
+    """Every class *path* belongs to."""
+    pattern, _names = matcher(root)
+    match = pattern.match(path)
+    if match is None:
+        return frozenset()
+    return frozenset(name for name, value in match.groupdict().items() if value is not None)
+
+
+def version(root: str | None = None) -> str:
+    """Changes whenever either policy file does."""
+    root = root or _repo_root()
+    repo_policy = os.path.join(root, REPO_POLICY_RELPATH) if root else None
+    return f"{_signature(DEFAULT_POLICY)}:{_signature(repo_policy)}"
@@ -0,0 +1,644 @@
+"""PreToolUse policies for the Eneo harness.
+
+One function per former hook script, each returning the stderr text of a
+block (exit 2) or None. The messages are the ones phase-gate.sh,
+protect-files.sh and bash-firewall.sh printed, line for line.
+
+hooks/dispatch.py (or the hook daemon, see hook_daemon.py) hands the raw
+payload to handle(), which parses it once and runs every policy registered
+for the tool in order; the first block wins. Phase and slug are read lazily
+through a state source (env.py by default), so a policy that never asks for
+them (protect-files) costs no repo-root lookup. Path classes (test, src,
+secret, ...) come from the shared table in path_policy.py.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+
+class PolicyContext:
+    """The payload plus lazily resolved task state.
+
+    *state* provides phase() and current_slug(); the env module by default,
+    the daemon's WarmState when served from hook_daemon.py.
+    """
+
+    def __init__(self, payload: dict, state=None) -> None:
+        self.payload = payload
+        self.state = state
+        tool_input = payload.get("tool_input")
+        self.tool_input = tool_input if isinstance(tool_input, dict) else {}
+        self._phase: str | None = None
+        self._slug: str | None = None
+        self._classes: dict[str, frozenset[str]] = {}
+
+    def _field(self, *keys: str) -> str:
+        # jq's `.a // .b // ""`: the first value that is not null/false.
+        for key in keys:
+            value = self.tool_input.get(key)
+            if value is not None and value is not False:
+                return value if isinstance(value, str) else str(value)
+        return ""
+
+    @property
+    def file_path(self) -> str:
+        return self._field("file_path", "path")
+
+    @property
+    def command(self) -> str:
+        return self._field("command")
+
+    def classes(self, path: str) -> frozenset[str]:
+        """path_policy classes of *path*, memoized per call."""
+        found = self._classes.get(path)
+        if found is None:
+            import path_policy
+
+            found = self._classes[path] = path_policy.classify(path)
+        return found
+
+    def _state(self):
+        if self.state is None:
+            import env
+
+            self.state = env
+        return self.state
+
+    @property
+    def phase(self) -> str:
+        if self._phase is None:
+            self._phase = self._state().phase()
+        return self._phase
+
+    @property
+    def slug(self) -> str:
+        if self._slug is None:
+            self._slug = self._state().current_slug() or "<slug>"
+        return self._slug
+
+
+def _block(*lines: str) -> str:
+    return "".join(f"{line}\n" for line in lines)
+
+
+# --- Edit | Write | MultiEdit ------------------------------------------------
+# Which paths are tests, src or protected is data: lib/path-policy.json plus
+# the repo's .claude/config/path-policy.json, compiled by path_policy.py
+# into one matcher that all three policies share.
+
+
+def phase_gate(ctx: PolicyContext) -> str | None:
+    """TDD phase gate: no test edits in GREEN, no intric src edits in RED."""
+    path = ctx.file_path
+    if not path:
+        return None
+    classes = ctx.classes(path)
+    is_test = "test" in classes
+    is_intric_src = not is_test and "src" in classes
+    if not is_test and not is_intric_src:
+        return None
+
+    phase = ctx.phase
+    if phase == "GREEN" and is_test:
+        return _block(
+            "✗ Blocked: attempted to edit test file during GREEN phase.",
+            "  Rule: tests are frozen during GREEN to prevent test-gaming under context pressure (.claude/rules/eneo-context.md#tdd).",
+            "  Fix:  edit src/ to make the failing test pass. If the test itself is genuinely wrong,",
+            f"        run '/eneo-start {ctx.slug} --phase red' to unfreeze. Run '/eneo-doctor' if the state feels stale.",
+        )
+    if phase == "RED" and is_intric_src:
+        return _block(
+            f"✗ Blocked: attempted to edit {path} during RED phase.",
+            "  Rule: RED phase requires a failing test before src/ edits (.claude/rules/eneo-context.md#tdd).",
+            f"  Fix:  add the failing test first. /eneo-start {ctx.slug} advances to GREEN automatically when the wave barrier clears.",
+            f"        Escape hatch: '/eneo-start {ctx.slug} --phase green'.",
+        )
+    return None
+
+
+_PROTECTED_FILES: tuple[tuple[str, str], ...] = (
+    (
+        "secret",
+        _block(
+            "Blocked: .env files contain secrets and must not be edited by the agent.",
+            "Fix: add the new variable to the appropriate .env.example template, then have the developer copy + fill in their local .env.",
+        ),
+    ),
+    (
+        "lockfile",
+        _block(
+            "Blocked: lockfiles are generated by the package manager, not hand-edited.",
+            "Fix: run the install command instead (e.g., 'uv add <pkg>' / 'bun add <pkg>' / 'bun install') and commit the resulting lockfile.",
+        ),
+    ),
+    (
+        "ratchet",
+        _block(
+            "Blocked: ratchet files are written by commit hooks, not by the agent.",
+            "Fix: if you intend to relax the floor, discuss with the team first; otherwise fix the regression in code instead.",
+        ),
+    ),
+    (
+        "hook_cache",
+        _block(
+            "Blocked: .claude/state/.cache/ holds the hooks' own caches (decisions, env detection).",
+            "Rule: those files are written only by the hooks; a doctored entry could waive a policy.",
+            "Fix: leave them alone; they are rebuilt on demand and dropped on every phase change.",
+        ),
+    ),
+    (
+        "phase_mirror",
+        _block(
+            "Blocked: direct edits to .claude/state/phase bypass the TDD phase mirror contract.",
+            "Rule: the phase file is owned by eneo_phase_set, which updates current-task.json first and the mirror second.",
+            "Fix: source hooks/lib/state.sh and call 'eneo_phase_set RED|GREEN|REFACTOR|FREE' instead of editing the file directly.",
+        ),
+    ),
+)
+
+
+def protect_files(ctx: PolicyContext) -> str | None:
+    """Secrets, lockfiles, ratchet baselines, hook caches and the phase mirror are off limits."""
+    path = ctx.file_path
+    if not path:
+        return None
+    classes = ctx.classes(path)
+    for name, message in _PROTECTED_FILES:
+        if name in classes:
+            return message
+    return None
+
+
+# --- Bash --------------------------------------------------------------------
+# The command is tokenized once (shlex, with pipes, `;`/`&&` chains, newlines,
+# redirections and heredocs as separators) into the paths it writes and the
+# paths it bulk-deletes. Each path is classified once by the shared
+# path_policy matcher, and the rules below test those classes, so adding a
+# glob or a rule does not add a pass over the command. Rules are in priority
+# order: when several paths hit different rules, the earliest rule's message
+# wins, and the phase is only read when a phase-dependent rule is hit.
+# hooks/dispatch.sh allows commands containing none of the command names
+# handled below without starting Python; add a new name to its WRITER_WORDS.
+
+_PUNCTUATION = "();<>|&`\n"
+_SEPARATOR_CHARS = frozenset(";&|()`\n")
+# Prefixes that run a later word as the command: the options of each that
+# take a separate value, and how many operands come before the command.
+_WRAPPERS: dict[str, tuple[frozenset[str], int]] = {
+    "sudo": (frozenset((
+        "-u", "-g", "-C", "-D", "-h", "-p", "-r", "-t", "-T", "-U", "-R", "--user", "--group",
+        "--close-from", "--chdir", "--host", "--prompt", "--role", "--type", "--command-timeout",
+        "--other-user", "--chroot",
+    )), 0),
+    "doas": (frozenset(("-u", "-C")), 0),
+    "env": (frozenset(("-u", "-C", "--unset", "--chdir")), 0),
+    "command": (frozenset(), 0),
+    "builtin": (frozenset(), 0),
+    "exec": (frozenset(("-a",)), 0),
+    "nohup": (frozenset(), 0),
+    "setsid": (frozenset(), 0),
+    "nice": (frozenset(("-n", "--adjustment")), 0),
+    "time": (frozenset(("-f", "-o", "--format", "--output")), 0),
+    "timeout": (frozenset(("-s", "-k", "--signal", "--kill-after")), 1),
+    "stdbuf": (frozenset(("-i", "-o", "-e")), 0),
+    "xargs": (frozenset((
+        "-a", "-d", "-E", "-I", "-L", "-n", "-P", "-s", "--arg-file", "--delimiter", "--eof",
+        "--replace", "--max-lines", "--max-args", "--max-procs", "--max-chars", "--process-slot-var",
+    )), 0),
+}
+# Reserved words that can precede a command: `for ...; do tee .env; done`.
+_KEYWORDS = frozenset(("!", "{", "if", "then", "elif", "else", "do", "while", "until"))
+_SHELLS = frozenset(("bash", "sh", "zsh", "dash", "ksh"))
+_SHELL_VALUE_OPTIONS = frozenset(("-o", "+o", "-O", "+O", "--rcfile", "--init-file"))
+_GIT_VALUE_OPTIONS = frozenset(("-C", "-c", "--git-dir", "--work-tree", "--namespace", "--exec-path"))
+_HEREDOC_RE = r"(?<!<)<<(-?)\s*(['\"]?)([A-Za-z_][\w.-]*)\2"
+_FALLBACK_TOKEN_RE = r"[();<>|&\n]+|[^\s();<>|&]+"
+_MAX_NESTING = 3  # bash -c "bash -c '...'"
+
+
+class ShellTargets:
+    """Paths a shell command writes to or bulk-deletes."""
+
+    def __init__(self) -> None:
+        self.writes: list[str] = []
+        self.deletes: list[str] = []
+
+
+def _split_heredocs(cmd: str) -> tuple[str, list[str]]:
+    """Cut heredoc bodies out of *cmd*; return (command text, bodies in order)."""
+    lines = cmd.split("\n")
+    kept: list[str] = []
+    bodies: list[str] = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        kept.append(line)
+        index += 1
+        for strip_tabs, _quote, delimiter in re.findall(_HEREDOC_RE, line):
+            body: list[str] = []
+            while index < len(lines):
+                candidate = lines[index]
+                index += 1
+                if (candidate.lstrip("\t") if strip_tabs else candidate) == delimiter:
+                    break
+                body.append(candidate)
+            bodies.append("\n".join(body))
+    return "\n".join(kept), bodies
+
+
+def _tokens(text: str) -> list[str]:
+    import shlex
+
+    lexer = shlex.shlex(text, posix=True, punctuation_chars=_PUNCTUATION)
+    lexer.whitespace = " \t\r"
+    lexer.whitespace_split = True
+    try:
+        return list(lexer)
+    except ValueError:
+        # Unbalanced quotes: bash would reject the command, but look for
+        # targets anyway rather than wave it through.
+        return [token.strip("'\"") for token in re.findall(_FALLBACK_TOKEN_RE, text)]
+
+
+def _is_operator(token: str) -> bool:
+    return token != "" and all(char in _PUNCTUATION for char in token)
+
+
+def _positional(args: list[str], takes_value: frozenset[str] = frozenset()) -> list[str]:
+    out: list[str] = []
+    values = iter(args)
+    for arg in values:
+        if arg == "--":
+            out.extend(values)
+            break
+        if arg.startswith("-") and arg != "-":
+            if arg in takes_value:
+                next(values, None)
+            continue
+        out.append(arg)
+    return out
+
+
+def _short_flag(args: list[str], letters: str) -> bool:
+    return any(
+        arg.startswith("-") and not arg.startswith("--") and any(letter in arg[1:] for letter in letters)
+        for arg in args
+    )
+
+
+_SED_VALUE_OPTIONS = frozenset(("-e", "-f", "-l", "--expression", "--file", "--line-length"))
+_COPY_VALUE_OPTIONS = frozenset(("-t", "-S", "-m", "-o", "-g", "--suffix", "--mode", "--owner", "--group"))
+
+
+def _is_assignment(word: str) -> bool:
+    return "=" in word and word.split("=", 1)[0].isidentifier()
+
+
+def _unwrap(name: str, args: list[str]) -> list[str]:
+    """Drop the options and operands of wrapper *name* from *args*."""
+    value_options, operands = _WRAPPERS[name]
+    while args:
+        arg = args[0]
+        if arg == "--":
+            args = args[1:]
+            break
+        if name == "env" and (arg == "-S" or arg.startswith("--split-string")):
+            # env -S 'tee .env' splits its value into the command line.
+            value, args = (arg.split("=", 1)[1], args[1:]) if "=" in arg else (" ".join(args[1:2]), args[2:])
+            return _tokens(value) + args
+        if _is_assignment(arg):
+            args = args[1:]  # env FOO=1 cmd
+        elif arg.startswith("-") and arg != "-":
+            args = args[2:] if arg in value_options else args[1:]
+        else:
+            break
+    return args[operands:]
+
+
+def _command_words(words: list[str]) -> list[str]:
+    """*words* from the command name on: assignments, keywords and wrappers dropped."""
+    args = words
+    while args:
+        if args[0] in _KEYWORDS or _is_assignment(args[0]):
+            args = args[1:]  # FOO=1 cmd, do cmd
+        elif args[0].rsplit("/", 1)[-1] in _WRAPPERS:
+            args = _unwrap(args[0].rsplit("/", 1)[-1], args[1:])
+        else:
+            break
+    return args
+
+
+def _shell_script(args: list[str]) -> str | None:
+    """The command string of `bash -c`, `bash -ec`, `bash -o pipefail -lc` ..."""
+    values = iter(args)
+    for arg in values:
+        if arg in _SHELL_VALUE_OPTIONS:
+            next(values, None)
+        elif re.fullmatch(r"-[A-Za-z]*c[A-Za-z]*", arg):
+            # Options may follow the cluster; the first operand is the script.
+            for operand in values:
+                if operand in _SHELL_VALUE_OPTIONS:
+                    next(values, None)
+                elif not operand.startswith(("-", "+")):
+                    return operand
+            return None
+        elif not arg.startswith(("-", "+")):
+            return None
+    return None
+
+
+def _command_targets(words: list[str], heredoc: str | None, targets: ShellTargets, depth: int) -> None:
+    args = _command_words(words)
+    if args and args[0].rsplit("/", 1)[-1] == "git":
+        git_args = _positional(args[1:], _GIT_VALUE_OPTIONS)
+        if git_args[:1] == ["rm"]:
+            args = args[args.index("rm", 1):]  # `git rm -r` deletes like rm -r
+    if not args:
+        return
+    name, rest = args[0].rsplit("/", 1)[-1], args[1:]
+
+    if name == "tee":
+        targets.writes.extend(_positional(rest))
+    elif name == "sed":
+        if _short_flag(rest, "i") or any(arg.startswith("--in-place") for arg in rest):
+            files = _positional(rest, _SED_VALUE_OPTIONS)
+            has_script = any(arg.split("=", 1)[0] in _SED_VALUE_OPTIONS for arg in rest)
+            targets.writes.extend(files if has_script else files[1:])
+    elif name in ("cp", "mv", "install", "ln"):
+        directory = [rest[i + 1] for i, arg in enumerate(rest[:-1]) if arg == "-t"]
+        directory += [arg.split("=", 1)[1] for arg in rest if arg.startswith("--target-directory=")]
+        if directory:
+            targets.writes.extend(directory)
+        else:
+            paths = _positional(rest, _COPY_VALUE_OPTIONS)
+            targets.writes.extend(paths[-1:] if len(paths) > 1 else [])
+    elif name == "dd":
+        targets.writes.extend(arg[3:] for arg in rest if arg.startswith("of="))
+    elif name == "truncate":
+        targets.writes.extend(_positional(rest, frozenset(("-s", "-r", "--size", "--reference"))))
+    elif name == "rm":
+        recursive = _short_flag(rest, "rR") or "--recursive" in rest
+        targets.deletes.extend(
+            path for path in _positional(rest) if recursive or any(char in path for char in "*?[")
+        )
+    elif depth < _MAX_NESTING and name in _SHELLS:
+        script = _shell_script(rest)
+        if script is not None:
+            _collect(script, targets, depth + 1)
+        elif heredoc is not None and not _positional(rest):
+            _collect(heredoc, targets, depth + 1)
+    elif depth < _MAX_NESTING and name == "eval":
+        _collect(" ".join(rest), targets, depth + 1)
+
+
+def _collect(cmd: str, targets: ShellTargets, depth: int = 0) -> ShellTargets:
+    text, bodies = _split_heredocs(cmd.replace("\\\n", ""))
+    words: list[str] = []
+    heredoc: str | None = None
+    tokens = iter(_tokens(text))
+    for token in tokens:
+        if not _is_operator(token):
+            if depth < _MAX_NESTING and ("$(" in token or "`" in token):
+                _collect(token, targets, depth + 1)  # substitutions inside "..."
+            words.append(token)
+            continue
+        # shlex merges adjacent punctuation: `(echo x)>uv.lock` gives ")>".
+        lead = re.match(r"(?:&&|[;|()`\n])*", token).group()
+        redirect = token[len(lead):]
+        if not ("<" in redirect or ">" in redirect) or "(" in redirect or ")" in redirect:
+            lead, redirect = token, ""
+        if any(char in _SEPARATOR_CHARS for char in lead):
+            _command_targets(words, heredoc, targets, depth)
+            words, heredoc = [], None
+        if not redirect:
+            continue
+        if words and words[-1].isdigit():
+            words.pop()  # the fd of `2>file`
+        operand = next(tokens, "")
+        if redirect in ("<<", "<<-"):
+            heredoc = bodies.pop(0) if bodies else ""
+        elif ">" in redirect and not (redirect.endswith("&") and (operand.isdigit() or operand == "-")):
+            targets.writes.append(operand)
+    _command_targets(words, heredoc, targets, depth)
+    return targets
+
+
+def shell_targets(cmd: str) -> ShellTargets:
+    """Write and bulk-delete targets of a shell command, relative paths as ./path."""
+    targets = _collect(cmd, ShellTargets())
+    targets.writes = [_as_path(path) for path in targets.writes if path]
+    targets.deletes = [_as_path(path) for path in targets.deletes if path]
+    return targets
+
+
+def _as_path(path: str) -> str:
+    # "./" lets the "*/name" globs shared with protect-files match bare names.
+    return path if path.startswith(("/", "./", "../", "~", "$")) else "./" + path
+
+
+# (op, phase or None, path classes, message); first applicable rule wins.
+_BASH_RULES: tuple[tuple[str, str | None, frozenset[str], str], ...] = (
+    (
+        "write", None, frozenset(("phase_mirror",)),
+        _block(
+            "✗ Blocked: bash modification of .claude/state/phase.",
+            "  Rule: the phase mirror must only be updated through eneo_phase_set so JSON state stays authoritative.",
+            "  Fix:  source hooks/lib/state.sh and call 'eneo_phase_set RED|GREEN|REFACTOR|FREE' instead of redirecting into the file.",
+        ),
+    ),
+    (
+        "write", None, frozenset(("secret", "lockfile", "ratchet")),
+        _block(
+            "✗ Blocked: bash write into a protected file.",
+            "  Rule: .env files, lockfiles, and ratchet baselines are owned by the developer, package manager, or commit hooks — not ad hoc bash redirects.",
+            "  Fix:  update .env.example for secrets, run the package manager for lockfiles, and let ratchet files be written by their owning workflow.",
+        ),
+    ),
+    (
+        "write", None, frozenset(("hook_cache",)),
+        _block(
+            "✗ Blocked: bash write into .claude/state/.cache/.",
+            "  Rule: the hooks' own caches are written only by the hooks; a doctored entry could waive a policy.",
+            "  Fix:  leave them alone; they are rebuilt on demand and dropped on every phase change.",
+        ),
+    ),
+    # Always-block destructive commands regardless of phase.
+    (
+        "delete", None, frozenset(("test", "test_dir")),
+        _block(
+            "✗ Blocked: bulk deletion of test files via bash.",
+            "  Rule: agents must not remove tests to bypass the phase-gate (.claude/rules/eneo-context.md#protected-paths).",
+            "  Fix:  if a test is obsolete, delete it through the Edit tool on a per-file basis during REFACTOR phase.",
+        ),
+    ),
+    (
+        "write", "GREEN", frozenset(("test",)),
+        _block(
+            "✗ Blocked: bash modification of a test file during GREEN.",
+            "  Rule: Edit hooks are bypassed by bash redirects; the firewall enforces the same rule through bash (GH issue anthropics/claude-code#29709).",
+            "  Fix:  if the test is genuinely wrong, run '/eneo-start {slug} --phase red' to unfreeze, then edit through the Edit tool.",
+        ),
+    ),
+    (
+        # "src" only counts when the path is not also a test, as in phase_gate.
+        "write", "RED", frozenset(("src",)),
+        _block(
+            "✗ Blocked: bash modification of backend/src/intric/ during RED.",
+            "  Rule: src edits require a failing test first (.claude/rules/eneo-context.md#tdd).",
+            "  Fix:  complete the failing test; /eneo-start {slug} flips to GREEN automatically when the wave barrier clears.",
+        ),
+    ),
+)
+
+
+def bash_firewall(ctx: PolicyContext) -> str | None:
+    """Blocks Bash-based bypasses of phase-gate and protect-files."""
+    cmd = ctx.command
+    if not cmd:
+        return None
+    targets = shell_targets(cmd)
+    hits: dict[str, set[str]] = {"write": set(), "delete": set()}
+    for op, paths in (("write", targets.writes), ("delete", targets.deletes)):
+        for path in paths:
+            classes = ctx.classes(path)
+            hits[op].update(classes - {"src"} if "test" in classes else classes)
+    for op, phase, classes, message in _BASH_RULES:
+        if hits[op] & classes and (phase is None or ctx.phase == phase):
+            return message.replace("{slug}", ctx.slug)
+    return None
+
+
+# --- Registry ----------------------------------------------------------------
+if TYPE_CHECKING:
+    Policy = Callable[[PolicyContext], "str | None"]
+
+POLICIES: dict[str, Policy] = {
+    "phase-gate": phase_gate,
+    "protect-files": protect_files,
+    "bash-firewall": bash_firewall,
+}
+
+_EDIT_POLICIES = ("phase-gate", "protect-files")
+TOOL_POLICIES: dict[str, tuple[str, ...]] = {
+    "Edit": _EDIT_POLICIES,
+    "Write": _EDIT_POLICIES,
+    "MultiEdit": _EDIT_POLICIES,
+    "Bash": ("bash-firewall",),
+}
+
+
+def policies_for(payload: dict) -> tuple[str, ...]:
+    """Policy names for the payload's tool, inferred from tool_input if unnamed."""
+    tool = payload.get("tool_name")
+    if isinstance(tool, str) and tool in TOOL_POLICIES:
+        return TOOL_POLICIES[tool]
+    tool_input = payload.get("tool_input")
+    if isinstance(tool_input, dict):
+        if "command" in tool_input:
+            return TOOL_POLICIES["Bash"]
+        if "file_path" in tool_input or "path" in tool_input:
+            return _EDIT_POLICIES
+    return ()
+
+
+def evaluate(payload: dict, names: tuple[str, ...] | None = None, state=None) -> tuple[str, str] | None:
+    """Run *names* (default: the tool's policies) in order.
+
+    Returns (policy name, stderr message) for the first block, else None.
+    """
+    return _evaluate(PolicyContext(payload, state), names if names is not None else policies_for(payload))
+
+
+def _evaluate(ctx: PolicyContext, names: tuple[str, ...]) -> tuple[str, str] | None:
+    for name in names:
+        message = POLICIES[name](ctx)
+        if message:
+            return name, message
+    return None
+
+
+def handle(raw: str | bytes, names: tuple[str, ...] = (), state=None) -> tuple[int, str]:
+    """Evaluate a raw hook payload; return (exit code, stderr text).
+
+    Unknown policy names and malformed payloads fail open (exit 0): a
+    misconfigured hook must not block the tool call.
+    """
+    unknown = [name for name in names if name not in POLICIES]
+    if unknown:
+        return 0, f"dispatch: unknown policy {unknown[0]!r} (known: {', '.join(POLICIES)})\n"
+    try:
+        payload = json.loads(raw or "{}")
+    except ValueError:
+        return 0, ""
+    if not isinstance(payload, dict):
+        return 0, ""
+    if state is None:
+        import decision_cache
+
+        if decision_cache.enabled():
+            return _memoized(payload, names, decision_cache)
+    blocked = evaluate(payload, names or None, state)
+    return (2, blocked[1]) if blocked else (0, "")
+
+
+def rules_version() -> str:
+    """Changes whenever the policy source or a path-policy file does; stamps cached decisions."""
+    import path_policy
+
+    try:
+        st = os.stat(__file__)
+    except OSError:
+        return "unknown"
+    return f"{st.st_mtime_ns}:{st.st_size}:{path_policy.version()}"
+
+
+def _cache_subject(ctx: PolicyContext, names: tuple[str, ...]) -> str | None:
+    """The one field *names* decide on, when the payload is plain enough to key on it.
+
+    A payload carrying a command and a path, a non-string field, or a path
+    that normpath() would rewrite is evaluated every time.
+    """
+    if names == TOOL_POLICIES["Bash"]:
+        field, other = "command", ("file_path", "path")
+    elif names == _EDIT_POLICIES:
+        field, other = "file_path", ("command", "path")
+    else:
+        return None
+    value = ctx.tool_input.get(field)
+    if not isinstance(value, str) or not value or any(key in ctx.tool_input for key in other):
+        return None
+    if field == "file_path" and os.path.normpath(value) != value:
+        return None
+    return value
+
+
+def _memoized(payload: dict, names: tuple[str, ...], decision_cache) -> tuple[int, str]:
+    # Same answer as evaluate(), remembered per (phase, policies, subject);
+    # see decision_cache.py for the file and its invalidation. The root and
+    # phase come from the cheap lookups so a hit never imports env.py.
+    import hook_trace
+
+    ctx = PolicyContext(payload)
+    policy_names = names or policies_for(payload)
+    subject = _cache_subject(ctx, policy_names)
+    root = hook_trace.repo_root() if subject else None
+    cache_key = None
+    if root:
+        ctx._phase = decision_cache.read_phase(root)
+        cache_key = decision_cache.key(ctx._phase, policy_names, subject)
+    rules = rules_version()
+    cached = decision_cache.lookup(root, rules, cache_key) if root and cache_key else None
+    if cached is not None:
+        return cached
+    blocked = _evaluate(ctx, policy_names)
+    decision = (2, blocked[1]) if blocked else (0, "")
+    if root and cache_key:
+        decision_cache.store(root, rules, cache_key, decision)
+    return decision
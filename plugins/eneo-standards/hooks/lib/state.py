@@ -0,0 +1,1235 @@
+"""Task-state helpers for Python hooks and bins (Python twin of state.sh).
+
+Same files, same JSON and the same .claude/state/.locks lock as state.sh,
+so bash and Python writers can interleave.
+Updates mutate the parsed JSON in-process and swap the file in with
+os.replace, without forking date, mktemp, jq or mv:
+
+    import state
+    state.update(".last_pr = $__pr | .next_hint = null", {"__pr": "42"})
+    state.phase_set("GREEN")
+
+Update and get expressions are jq programs. The subset the harness writes
+(pipes, `.a.b` / `.["k"]` / `.[$k]` paths, `=` assignment, `//`,
+parentheses, `$vars`, JSON literals and `tostring`) is evaluated here; anything else
+is handed to jq when it is installed, still under the lock.
+
+The CLI mirrors the bash helpers for bins and hooks that should not need jq:
+
+    python3 state.py get '<jq-expression>'
+    python3 state.py update '<jq-expression>' [arg-name arg-value]...
+    python3 state.py phase-set RED|GREEN|REFACTOR|FREE
+    python3 state.py next-hint-consume
+    python3 state.py init <slug> <lane> <bracket> <tenancy_impact> <audit_impact>
+    python3 state.py clear
+    python3 state.py patch set|remove <field> <value>
+    python3 state.py patch put <field> <key> <value>
+    python3 state.py compact
+    python3 state.py heartbeat
+    python3 state.py tx [--task '<jq-expression>' [arg-name arg-value]...]...
+                        [--patch set|put|remove <field> [key] <value>]...
+                        [--phase RED|GREEN|REFACTOR|FREE]
+                        [--wave '<jq-expression>' [arg-name arg-value]...]...
+
+As in state.sh, an arg name prefixed with "json:" is parsed as JSON, and so
+is a patch value written as json:<value>. Patches go to the journal (see
+fold()); every reader here folds it in. Every write also regenerates
+current-task.view (see render_view()). tx stages its clauses into one
+Transaction and commits them together.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import time
+
+TASK_RELPATH = os.path.join(".claude", "state", "current-task.json")
+JOURNAL_RELPATH = os.path.join(".claude", "state", "current-task.journal")
+JOURNAL_HISTORY_RELPATH = os.path.join(".claude", "stats", "task-journal.jsonl")
+VIEW_RELPATH = os.path.join(".claude", "state", "current-task.view")
+HEARTBEAT_RELPATH = os.path.join(".claude", "state", "heartbeat")
+PHASE_RELPATH = os.path.join(".claude", "state", "phase")
+GEN_RELPATH = os.path.join(".claude", "state", "gen")
+LOCKS_RELPATH = os.path.join(".claude", "state", ".locks")
+LOCK_TTL_SECONDS = 30
+PHASES = ("RED", "GREEN", "REFACTOR", "FREE")
+
+
+class StateError(Exception):
+    """A state write that could not be applied (the message is for stderr)."""
+
+
+def repo_root() -> str | None:
+    import hook_trace
+
+    root = hook_trace.repo_root()
+    if root:
+        return root
+    import env
+
+    return env.find_repo_root()
+
+
+def _root(root: str | None) -> str:
+    root = root or repo_root()
+    if not root:
+        raise StateError("[state] not inside an Eneo repo")
+    return root
+
+
+def task_file(root: str | None = None) -> str:
+    return os.path.join(_root(root), TASK_RELPATH)
+
+
+def phase_file(root: str | None = None) -> str:
+    return os.path.join(_root(root), PHASE_RELPATH)
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _invalidate_context() -> None:
+    """eneo_ctx_invalidate: phase and slug in ENEO_CTX may be about to change."""
+    env = sys.modules.get("env")
+    if env is not None:
+        env.invalidate_context()
+    else:
+        os.environ.pop("ENEO_CTX", None)
+
+
+def _bump_gen(root: str) -> None:
+    """_eneo_state_gen_bump: mark ENEO_CTX envelopes built before this write stale."""
+    try:
+        with open(os.path.join(root, GEN_RELPATH), "w", encoding="utf-8") as handle:
+            handle.write(f"{time.time_ns() // 1000}-{os.getpid()}\n")
+    except OSError:
+        pass
+
+
+def _invalidate(root: str) -> None:
+    """eneo_ctx_invalidate + eneo_decisions_invalidate."""
+    _invalidate_context()
+    import decision_cache
+
+    decision_cache.invalidate(root)
+
+
+# --- Lock helpers ------------------------------------------------------------
+# The lock from state.sh, chosen by the same rule so both sides exclude each
+# other: flock(2) on .locks/<name>.flock when the flock binary is on PATH,
+# else the mkdir lock on .locks/<name>.lock with a "<pid> <host>" owner file,
+# reclaimed as soon as that PID is gone from this host (or after
+# LOCK_TTL_SECONDS for an owner on another host). Waits that found the lock
+# held, timeouts and reclaims go to .claude/stats/lock-wait.jsonl.
+LOCK_WAIT_RELPATH = os.path.join(".claude", "stats", "lock-wait.jsonl")
+
+
+def lock_backend() -> str:
+    forced = os.environ.get("ENEO_STATE_LOCK", "")
+    if forced in ("flock", "mkdir"):
+        return forced
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if directory and os.access(os.path.join(directory, "flock"), os.X_OK):
+            return "flock"
+    return "mkdir"
+
+
+def _lock_timeout() -> float:
+    try:
+        return float(os.environ.get("ENEO_LOCK_TIMEOUT", "5"))
+    except ValueError:
+        return 5.0
+
+
+def _record_wait(root: str, name: str, backend: str, outcome: str, started: float) -> None:
+    stats = os.path.dirname(os.path.join(root, LOCK_WAIT_RELPATH))
+    if not os.path.isdir(stats):
+        return
+    line = json.dumps({
+        "lock": name,
+        "ts": _now(),
+        "backend": backend,
+        "outcome": outcome,
+        "wait_ms": round((time.monotonic() - started) * 1000, 3),
+        "hook": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "",
+        "pid": os.getpid(),
+    }, separators=(",", ":"))
+    try:
+        with open(os.path.join(root, LOCK_WAIT_RELPATH), "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+    except OSError:
+        pass
+
+
+def _flock_wait(fd: int, timeout: float) -> bool:
+    """Poll the flock for up to *timeout* seconds.
+
+    Polls with LOCK_NB rather than blocking under a SIGALRM timer, so a
+    caller's own alarm handler and interval timer are left alone.
+    """
+    import fcntl
+
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+def _owner_gone(lock_dir: str) -> bool:
+    try:
+        with open(os.path.join(lock_dir, "owner"), encoding="ascii") as handle:
+            fields = handle.read().split()
+    except (OSError, ValueError):
+        fields = []
+    if len(fields) == 2 and fields[0].isdigit() and fields[1] == os.uname().nodename:
+        try:
+            os.kill(int(fields[0]), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # EPERM: alive, owned by someone else
+        return False
+    for path in (os.path.join(lock_dir, "owner"), lock_dir):
+        try:
+            return time.time() - os.stat(path).st_mtime >= LOCK_TTL_SECONDS
+        except OSError:
+            continue
+    return False
+
+
+def acquire_lock(name: str, root: str | None = None) -> str:
+    """Take lock *name*; returns the handle for release_lock()."""
+    root = _root(root)
+    lock_root = os.path.join(root, LOCKS_RELPATH)
+    os.makedirs(lock_root, exist_ok=True)
+    started = time.monotonic()
+    timeout = _lock_timeout()
+    if lock_backend() == "flock":
+        import fcntl
+
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC
+        fd = os.open(os.path.join(lock_root, f"{name}.flock"), flags, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not _flock_wait(fd, timeout):
+                os.close(fd)
+                _record_wait(root, name, "flock", "timeout", started)
+                raise StateError(f"[state] timed out acquiring lock: {name}") from None
+            _record_wait(root, name, "flock", "contended", started)
+        return f"fd:{fd}"
+    lock_dir = os.path.join(lock_root, f"{name}.lock")
+    attempts = 0
+    while True:
+        try:
+            os.mkdir(lock_dir)
+            break
+        except FileExistsError:
+            pass
+        attempts += 1
+        if _owner_gone(lock_dir):
+            _remove_lock_dir(lock_dir)
+            _record_wait(root, name, "mkdir", "reclaimed", started)
+            attempts = 0
+            continue
+        if attempts * 0.05 >= timeout:
+            _record_wait(root, name, "mkdir", "timeout", started)
+            raise StateError(f"[state] timed out acquiring lock: {name}")
+        time.sleep(0.05)
+    with open(os.path.join(lock_dir, "owner"), "w", encoding="ascii") as handle:
+        handle.write(f"{os.getpid()} {os.uname().nodename}\n")
+    if attempts:
+        _record_wait(root, name, "mkdir", "contended", started)
+    return lock_dir
+
+
+def _remove_lock_dir(lock_dir: str) -> None:
+    try:
+        os.unlink(os.path.join(lock_dir, "owner"))
+    except OSError:
+        pass
+    try:
+        os.rmdir(lock_dir)
+    except OSError:
+        pass
+
+
+def release_lock(handle: str) -> None:
+    if handle.startswith("fd:"):
+        os.close(int(handle[3:]))  # closing the fd drops the flock
+        return
+    _remove_lock_dir(handle)
+    try:
+        os.rmdir(os.path.dirname(handle))
+    except OSError:
+        pass
+
+
+# --- jq subset ----------------------------------------------------------------
+# Parsed into closures taking (input, vars). Assignment copies the objects
+# along the path, so `.a = .b | .a.x = 1` leaves .b alone, as in jq.
+class Unsupported(Exception):
+    """The expression is outside the subset evaluated here."""
+
+
+_TOKEN_RE = re.compile(r'\s*(?:(//|\||=|\(|\)|\.\[|\[|\]|\.)|(\$[A-Za-z_]\w*)|([A-Za-z_]\w*)|(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)|("(?:[^"\\]|\\.)*"))')
+_DECODER = json.JSONDecoder()
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        match = _TOKEN_RE.match(self.text, self.pos)
+        return match.group(0).strip() if match else None
+
+    def take(self, expected: str | None = None) -> str:
+        match = _TOKEN_RE.match(self.text, self.pos)
+        if not match or (expected is not None and match.group(0).strip() != expected):
+            raise Unsupported(self.text[self.pos:])
+        self.pos = match.end()
+        return match.group(0).strip()
+
+    def at_end(self) -> bool:
+        return not self.text[self.pos:].strip()
+
+    def parse(self):
+        node = self.pipe()
+        if not self.at_end():
+            raise Unsupported(self.text[self.pos:])
+        return node
+
+    # Precedence as in jq's grammar, loosest first: `|`, then `//` (right
+    # associative), then `=` (non-associative). So `.a = .b // "x"` is
+    # `(.a = .b) // "x"`; the right side of `=` is a single term.
+    def pipe(self):
+        node = self.alternative()
+        while self.peek() == "|":
+            self.take("|")
+            left, right = node, self.alternative()
+            node = lambda data, env, left=left, right=right: right(left(data, env), env)
+        return node
+
+    def alternative(self):
+        left = self.assignment()
+        if self.peek() != "//":
+            return left
+        self.take("//")
+        right = self.alternative()
+        return lambda data, env: _or(left(data, env), lambda: right(data, env))
+
+    def assignment(self):
+        start = self.pos
+        path = self.path()
+        if path is not None and self.peek() == "=":
+            self.take("=")
+            value = self.term()
+            return lambda data, env: _setpath(data, [key(data, env) for key in path], value(data, env))
+        self.pos = start
+        return self.term()
+
+    def term(self):
+        token = self.peek()
+        if token == "(":
+            self.take("(")
+            node = self.pipe()
+            self.take(")")
+            return node
+        if token is not None and token.startswith("$"):
+            name = self.take()[1:]
+            return lambda data, env: _var(env, name)
+        if token in (".", ".["):
+            path = self.path()
+            return lambda data, env: _getpath(data, [key(data, env) for key in path])
+        if token == "tostring":
+            self.take()
+            return lambda data, env: _tostring(data)
+        return self.literal()
+
+    def literal(self):
+        rest = self.text[self.pos:]
+        stripped = rest.lstrip()
+        try:
+            value, end = _DECODER.raw_decode(stripped)
+        except ValueError:
+            raise Unsupported(rest) from None
+        self.pos += len(rest) - len(stripped) + end
+        return lambda data, env: value
+
+    def path(self) -> list | None:
+        """Path keys after a leading `.`; None when the next token is not a path."""
+        if self.peek() not in (".", ".["):
+            return None
+        keys: list = []
+        while True:
+            token = self.peek()
+            if token == ".":
+                self.take(".")
+                match = re.compile(r"[A-Za-z_]\w*").match(self.text, self.pos)
+                if match:
+                    self.pos = match.end()
+                    keys.append(lambda data, env, name=match.group(0): name)
+                    continue
+                if self.peek() == "[":
+                    self.take("[")
+                    keys.append(self.index())
+                    continue
+                return keys
+            if token == ".[":
+                self.take(".[")
+                keys.append(self.index())
+                continue
+            if token == "[" and keys:
+                self.take("[")
+                keys.append(self.index())
+                continue
+            return keys
+
+    def index(self):
+        node = self.pipe()
+        self.take("]")
+        return node
+
+
+def _var(env: dict, name: str):
+    if name not in env:
+        raise StateError(f"[state] ${name} is not defined")
+    return env[name]
+
+
+def _or(left, right):
+    return left if left is not None and left is not False else right()
+
+
+def _getpath(data, keys: list):
+    for key in keys:
+        if data is None:
+            return None
+        if isinstance(data, dict) and isinstance(key, str):
+            data = data.get(key)
+        elif isinstance(data, list) and isinstance(key, int) and not isinstance(key, bool):
+            data = data[key] if -len(data) <= key < len(data) else None
+        else:
+            raise StateError(f"[state] cannot index {type(data).__name__} with {key!r}")
+    return data
+
+
+def _setpath(data, keys: list, value):
+    if not keys:
+        return value
+    key, rest = keys[0], keys[1:]
+    if isinstance(key, str) and (data is None or isinstance(data, dict)):
+        copy = dict(data or {})
+        copy[key] = _setpath(copy.get(key), rest, value)
+        return copy
+    if isinstance(key, int) and not isinstance(key, bool) and (data is None or isinstance(data, list)):
+        copy = list(data or [])
+        if key < 0:
+            key += len(copy)
+        if key < 0:
+            raise StateError("[state] out of bounds negative array index")
+        copy.extend([None] * (key + 1 - len(copy)))
+        copy[key] = _setpath(copy[key], rest, value)
+        return copy
+    raise StateError(f"[state] cannot index {type(data).__name__} with {key!r}")
+
+
+def evaluate(expr: str, data, variables: dict | None = None):
+    """Run jq program *expr* on *data*; jq itself handles what the subset does not."""
+    try:
+        program = _Parser(expr).parse()
+    except Unsupported:
+        return _jq(expr, data, variables or {})
+    return program(data, variables or {})
+
+
+def _jq(expr: str, data, variables: dict):
+    import shutil
+    import subprocess
+
+    jq = shutil.which("jq")
+    if not jq:
+        raise StateError(f"[state] jq unavailable and expression unsupported: {expr}")
+    argv = [jq, "-c"]
+    for name, value in variables.items():
+        argv += ["--argjson", name, json.dumps(value)]
+    result = subprocess.run(
+        [*argv, expr], input=json.dumps(data), capture_output=True, text=True, check=False
+    )
+    outputs = result.stdout.splitlines()
+    if result.returncode != 0 or len(outputs) != 1:
+        raise StateError(f"[state] jq expression failed: {expr}")
+    return json.loads(outputs[0])
+
+
+# --- Journal ------------------------------------------------------------------
+# The patches eneo_task_patch appends to current-task.journal: a
+# {"gen": "<id>"} header, then one {"ts", "op", "field", ["key",] "value"}
+# record per line. fold() is ENEO_TASK_FOLD from env.sh: a snapshot whose
+# "_journal_gen" already names the header's generation skips the journal.
+PATCH_OPS = ("set", "put", "remove")
+
+
+def _read_journal(root: str) -> list[dict]:
+    """[header, record, ...], or [] when nothing is journaled."""
+    try:
+        with open(os.path.join(root, JOURNAL_RELPATH), encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # a writer killed mid-append leaves a torn line
+        if isinstance(record, dict):
+            records.append(record)
+    return records if records and "gen" in records[0] else []
+
+
+def _same(left, right) -> bool:
+    return left == right and isinstance(left, bool) == isinstance(right, bool)
+
+
+def _apply_record(data: dict, record: dict) -> dict:
+    """eneo_patch from env.sh: one journal record applied to *data* in place."""
+    op, field, value = record.get("op"), record.get("field"), record.get("value")
+    if not isinstance(field, str):
+        return data
+    if op == "set":
+        data[field] = value
+    elif op == "put":
+        entries = data.get(field)
+        if entries is None or entries is False:
+            entries = {}
+        if not isinstance(entries, dict):
+            raise StateError(f"[state] cannot put into {field}: not an object")
+        data[field] = {**entries, str(record.get("key")): value}
+    elif op == "remove":
+        items = data.get(field)
+        if items is None or items is False:
+            items = []
+        items = list(items) if isinstance(items, list) else []
+        for index, item in enumerate(items):
+            if _same(item, value):
+                del items[index]
+                break
+        data[field] = items
+    else:
+        return data
+    if "ts" in record:
+        data["last_update"] = record["ts"]
+    return data
+
+
+def fold(data: dict, journal: list[dict]) -> dict:
+    """*data* with the journal's records applied, as readers see it."""
+    gen = journal[0].get("gen") if journal else None
+    if gen is None or data.get("_journal_gen") == gen:
+        return data
+    data = dict(data)
+    for record in journal[1:]:
+        _apply_record(data, record)
+    data["_journal_gen"] = gen
+    return data
+
+
+def _retire_journal(root: str, journal: list[dict]) -> None:
+    """Drop a journal whose records are now in the snapshot, keeping its history."""
+    history = os.path.join(root, JOURNAL_HISTORY_RELPATH)
+    if os.path.isdir(os.path.dirname(history)):
+        try:
+            with open(history, "a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in journal[1:])
+        except OSError:
+            pass
+    try:
+        os.unlink(os.path.join(root, JOURNAL_RELPATH))
+    except OSError:
+        pass
+
+
+def _compact_unlocked(root: str) -> None:
+    journal = _read_journal(root)
+    if not journal:
+        return
+    path = os.path.join(root, TASK_RELPATH)
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        raise StateError(f"[state] could not fold {os.path.join(root, JOURNAL_RELPATH)}") from None
+    data = fold(data, journal)
+    _write_json(path, data)
+    _retire_journal(root, journal)
+    _write_view(root, data)
+
+
+def compact(root: str | None = None) -> None:
+    """Fold the journal into current-task.json now."""
+    root = _root(root)
+    lock = acquire_lock("state", root)
+    try:
+        _compact_unlocked(root)
+    finally:
+        release_lock(lock)
+
+
+def _journal_max() -> int:
+    try:
+        return max(1, int(os.environ.get("ENEO_STATE_JOURNAL_MAX", "64")))
+    except ValueError:
+        return 64
+
+
+def _patch_record(op: str, field: str, value, key: str | None = None) -> dict:
+    """The journal record for one patch; ValueError for an op or field state.sh refuses."""
+    if op not in PATCH_OPS:
+        raise ValueError(f"[state] unknown patch op: {op} (expected set|put|remove)")
+    if not field.isidentifier() or not field.isascii() or field == "slug":
+        raise ValueError(f"[state] cannot patch field: {field}")
+    record = {"ts": _now(), "op": op, "field": field}
+    if op == "put":
+        record["key"] = str(key)
+    record["value"] = value
+    return record
+
+
+def _patch_value(value: str):
+    """A patch value as state.sh takes it: json:<value> is parsed and must be one line."""
+    if not value.startswith("json:"):
+        return value
+    if "\n" in value or "\r" in value:
+        raise ValueError("[state] json: patch value must be on one line")
+    return parse_args(["json:value", value[5:]])["value"]
+
+
+def _journal_append(root: str, records: list[dict]) -> None:
+    """Append *records*, then compact at the threshold or refresh the view."""
+    lines = "".join(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n" for record in records)
+    path = os.path.join(root, JOURNAL_RELPATH)
+    try:
+        with open(path, "rb") as handle:
+            handle.seek(-1, os.SEEK_END)
+            last = handle.read(1)
+    except OSError:
+        last = b""  # missing or empty
+    if not last:
+        lines = f'{{"gen":"{time.time_ns() // 1000}-{os.getpid()}"}}\n' + lines
+    elif last != b"\n":
+        lines = "\n" + lines  # end a torn line left by a writer killed mid-append
+    _invalidate_context()
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(lines)
+    _bump_gen(root)
+    if os.environ.get("ENEO_STATE_JOURNAL", "1") != "0":
+        with open(path, "rb") as handle:
+            if sum(1 for _ in handle) < _journal_max():
+                _write_view(root, load(root))
+                return
+    _compact_unlocked(root)
+
+
+def _patch_unlocked(root: str, op: str, field: str, value, key: str | None = None) -> bool:
+    record = _patch_record(op, field, value, key)
+    if not os.path.isfile(os.path.join(root, TASK_RELPATH)):
+        return False  # nothing to update
+    _journal_append(root, [record])
+    return True
+
+
+def patch(op: str, field: str, value, key: str | None = None, root: str | None = None) -> bool:
+    """eneo_task_patch: journal one set/put/remove; False if there is no task."""
+    root = _root(root)
+    lock = acquire_lock("state", root)
+    try:
+        return _patch_unlocked(root, op, field, value, key)
+    finally:
+        release_lock(lock)
+
+
+# --- Read helpers --------------------------------------------------------------
+def load(root: str | None = None) -> dict | None:
+    """current-task.json with the journal folded in, or None when missing or unreadable."""
+    try:
+        root = _root(root)
+        journal = _read_journal(root)  # before the snapshot: see fold()
+        with open(os.path.join(root, TASK_RELPATH), encoding="utf-8") as handle:
+            data = json.load(handle)
+        return fold(data, journal) if isinstance(data, dict) else None
+    except (OSError, ValueError, StateError):
+        return None
+
+
+def get(expr: str, root: str | None = None):
+    """eneo_task_get: the value of *expr*, or None on any failure."""
+    data = load(root)
+    if data is None:
+        return None
+    try:
+        return evaluate(expr, data)
+    except StateError:
+        return None
+
+
+# --- Atomic write helper ---------------------------------------------------------
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# --- Reader view --------------------------------------------------------------
+# ENEO_TASK_VIEW from env.sh: the display fields flattened to shell-quoted
+# TASK_<FIELD>='...' lines that eneo_task_view sources without forking jq.
+_VIEW_FIELDS = (
+    ("SLUG", "slug"), ("LANE", "lane"), ("PHASE", "phase"), ("PHASE_TOTAL", "phase_total"),
+    ("PHASE_NAME", "phase_name"), ("TDD_PHASE", "tdd_phase"), ("WAVE", "wave"), ("WAVE_TOTAL", "wave_total"),
+    ("WAVE_BAR", None), ("STATUS", "status"), ("NEXT_HINT", "next_hint"), ("ACTIVE_AGENTS", "active_agents"),
+    ("LAST_UPDATE", "last_update"),
+)
+_WAVE_BLOCKS = {"done": "▓", "in_progress": "▒"}
+
+
+def _text(value) -> str:
+    """jq's string form of *value*: "" for null, tojson for non-scalars."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _wave_count(value) -> int:
+    try:
+        count = float(_text(value))
+    except ValueError:
+        return 0
+    return int(count // 1) if count == count and abs(count) != float("inf") else 0
+
+
+def render_view(data: dict) -> str:
+    """The current-task.view text for *data*, byte for byte what ENEO_TASK_VIEW prints."""
+    status = data.get("wave_status")
+    status = status if isinstance(status, dict) else {}
+    agents = data.get("active_agents")
+    lines = []
+    for name, field in _VIEW_FIELDS:
+        if name == "WAVE_BAR":
+            text = "".join(
+                _WAVE_BLOCKS.get(status.get(str(wave)), "░") for wave in range(1, _wave_count(data.get("wave_total")) + 1)
+            )
+        elif name == "ACTIVE_AGENTS":
+            text = ", ".join(_text(agent) for agent in agents) if isinstance(agents, list) else ""
+        elif name == "TDD_PHASE":
+            phase = data.get(field)
+            text = "FREE" if phase is None or phase is False else _text(phase)
+        else:
+            text = _text(data.get(field))
+        lines.append(f"TASK_{name}='" + text.replace("'", "'\\''") + "'\n")
+    return "".join(lines)
+
+
+def _write_view(root: str, data: dict | None) -> None:
+    """Regenerate current-task.view; drop it when there is nothing to render."""
+    path = os.path.join(root, VIEW_RELPATH)
+    tmp = f"{path}.{os.getpid()}"
+    try:
+        if data is None:
+            os.unlink(path)
+            return
+        with open(tmp, "w", encoding="utf-8") as handle:
+            handle.write(render_view(data))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _update_unlocked(root: str, expr: str, variables: dict | None) -> bool:
+    path = os.path.join(root, TASK_RELPATH)
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return False  # nothing to update
+    except (OSError, ValueError):
+        raise StateError(f"[state] jq expression failed: {expr}") from None
+    journal = _read_journal(root)
+    if journal and isinstance(data, dict):
+        data = fold(data, journal)  # a full rewrite folds and retires the journal
+    _invalidate_context()
+    variables = {"__now": _now(), **(variables or {})}
+    data = evaluate(expr, _setpath(data, ["last_update"], variables["__now"]), variables)
+    if not isinstance(data, dict):
+        raise StateError(f"[state] jq expression failed: {expr}")
+    _write_json(path, data)
+    _bump_gen(root)
+    if journal:
+        _retire_journal(root, journal)
+    _write_view(root, data)
+    return True
+
+
+def update(expr: str, variables: dict | None = None, root: str | None = None) -> bool:
+    """eneo_task_update: apply *expr* under the state lock; False if there is no task."""
+    root = _root(root)
+    lock = acquire_lock("state", root)
+    try:
+        return _update_unlocked(root, expr, variables)
+    finally:
+        release_lock(lock)
+
+
+def parse_args(pairs: list[str]) -> dict:
+    """[name value ...] as eneo_task_update takes them; json: names are parsed."""
+    variables = {}
+    for name, value in zip(pairs[::2], pairs[1::2]):
+        if name.startswith("json:"):
+            try:
+                variables[name[5:]] = json.loads(value)
+            except ValueError:
+                raise StateError(f"[state] invalid JSON for {name[5:]}: {value}") from None
+        else:
+            variables[name] = value
+    return variables
+
+
+# --- Activity heartbeat -------------------------------------------------------
+# eneo_task_heartbeat: "<epoch> <ISO8601>" in .claude/state/heartbeat, written
+# without the lock or a JSON rewrite, at most once per ENEO_HEARTBEAT_WINDOW
+# seconds. last_update() is the later of it and the task's last_update.
+def _heartbeat_window() -> int:
+    try:
+        return int(os.environ.get("ENEO_HEARTBEAT_WINDOW", "60"))
+    except ValueError:
+        return 60
+
+
+def _read_heartbeat(root: str) -> tuple[int, str] | None:
+    try:
+        with open(os.path.join(root, HEARTBEAT_RELPATH), encoding="utf-8") as handle:
+            epoch, stamp = handle.readline().split()
+        return int(epoch), stamp
+    except (OSError, ValueError):
+        return None
+
+
+def heartbeat(root: str | None = None) -> bool:
+    """Record activity on the current task; False when debounced or there is no task."""
+    root = _root(root)
+    if not os.path.isfile(os.path.join(root, TASK_RELPATH)):
+        return False
+    now = int(time.time())
+    last = _read_heartbeat(root)
+    if last is not None and now - last[0] < _heartbeat_window():
+        return False
+    try:
+        with open(os.path.join(root, HEARTBEAT_RELPATH), "w", encoding="utf-8") as handle:
+            handle.write(f"{now} {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))}\n")
+    except OSError:
+        return False
+    return True
+
+
+def last_update(root: str | None = None) -> str | None:
+    """The task's last_update, or its heartbeat when that is later."""
+    root = _root(root)
+    data = load(root)
+    if data is None:
+        return None
+    stamp = data.get("last_update")
+    stamp = stamp if isinstance(stamp, str) else ""
+    beat = _read_heartbeat(root)
+    if beat is not None and beat[1] > stamp:
+        stamp = beat[1]
+    return stamp or None
+
+
+# --- Phase mirror ----------------------------------------------------------------
+def phase_set(phase: str, root: str | None = None) -> None:
+    """JSON first, mirror second, as eneo_phase_set does."""
+    if phase not in PHASES:
+        raise ValueError(f"[state] invalid phase: {phase} (expected RED|GREEN|REFACTOR|FREE)")
+    root = _root(root)
+    _invalidate(root)
+    try:
+        update(".tdd_phase = $__phase", {"__phase": phase}, root)
+    except StateError:
+        pass
+    path = os.path.join(root, PHASE_RELPATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(f"{phase}\n")
+    _bump_gen(root)
+
+
+def next_hint_consume(root: str | None = None) -> str:
+    """Return next_hint and clear it under one lock ("" when unset)."""
+    root = _root(root)
+    if not os.path.isfile(os.path.join(root, TASK_RELPATH)):
+        return ""
+    lock = acquire_lock("state", root)
+    try:
+        hint = (load(root) or {}).get("next_hint")
+        _update_unlocked(root, ".next_hint = null", None)
+    finally:
+        release_lock(lock)
+    return hint if isinstance(hint, str) else "" if hint is None else json.dumps(hint)
+
+
+# --- Transactions ---------------------------------------------------------------
+WAVE_RELPATH = os.path.join(".claude", "state", "wave.json")
+
+
+class Transaction:
+    """eneo_tx_begin .. eneo_tx_commit: staged writes applied under one lock.
+
+        with state.Transaction() as tx:
+            tx.task(".wave = ($__w | tonumber)", {"__w": "2"})
+            tx.patch("put", "wave_status", "2", "in_progress")
+            tx.phase("RED")
+            tx.wave(".done = 0")
+
+    Leaving the block commits; an exception inside it commits nothing.
+    Everything is rendered before anything is written, in the order and
+    with the same one-write-per-file rules as state.sh.
+    """
+
+    def __init__(self, root: str | None = None) -> None:
+        self.root = _root(root)
+        self.abort()
+
+    def __enter__(self) -> Transaction:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def abort(self) -> None:
+        self._phase: str | None = None
+        self._task_steps: list[tuple[str, object]] = []
+        self._task_exprs = 0
+        self._patches: list[dict] = []
+        self._wave_steps: list[str] = []
+        self._vars: dict[str, dict] = {"task": {}, "wave": {}}
+
+    def _stage_vars(self, target: str, variables: dict | None) -> None:
+        staged = self._vars[target]
+        for name, value in (variables or {}).items():
+            if name in staged and not _same(staged[name], value):
+                raise ValueError(f"[state] transaction arg {name} staged twice with different values")
+        staged.update(variables or {})
+
+    def task(self, expr: str, variables: dict | None = None) -> None:
+        self._stage_vars("task", variables)
+        self._task_steps.append(("expr", expr))
+        self._task_exprs += 1
+
+    def patch(self, op: str, field: str, value, key: str | None = None) -> None:
+        record = _patch_record(op, field, value, key)
+        # Folded into a rewrite, a record keeps the rewrite's last_update.
+        self._task_steps.append(("patch", {k: v for k, v in record.items() if k != "ts"}))
+        self._patches.append(record)
+
+    def phase(self, phase: str) -> None:
+        if phase not in PHASES:
+            raise ValueError(f"[state] invalid phase: {phase} (expected RED|GREEN|REFACTOR|FREE)")
+        self._phase = phase
+
+    def wave(self, expr: str, variables: dict | None = None) -> None:
+        self._stage_vars("wave", variables)
+        self._wave_steps.append(expr)
+
+    def _render_task(self, path: str, journal: list[dict]) -> dict:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if journal and isinstance(data, dict):
+            data = fold(data, journal)
+        variables = {"__now": _now(), **self._vars["task"]}
+        data = _setpath(data, ["last_update"], variables["__now"])
+        for kind, step in self._task_steps:
+            if kind == "patch":
+                data = _apply_record(dict(data), step)
+            else:
+                data = evaluate(step, data, variables)
+            if not isinstance(data, dict):
+                raise StateError(f"[state] jq expression failed: {step}")
+        if self._phase:
+            data = {**data, "tdd_phase": self._phase}
+        return data
+
+    def _render_wave(self, path: str):
+        try:
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            data = {}
+        for expr in self._wave_steps:
+            data = evaluate(expr, data, self._vars["wave"])
+        return data
+
+    def commit_unlocked(self) -> None:
+        """Apply the staged writes; the caller holds the state lock."""
+        root = self.root
+        path = os.path.join(root, TASK_RELPATH)
+        wave_path = os.path.join(root, WAVE_RELPATH)
+        task = wave = None
+        journal: list[dict] = []
+        # Render first: a failed expression leaves every file untouched.
+        try:
+            if os.path.isfile(path) and (self._task_exprs or self._phase):
+                try:
+                    journal = _read_journal(root)
+                    task = self._render_task(path, journal)
+                except (OSError, ValueError, StateError):
+                    raise StateError("[state] transaction failed on current-task.json; nothing written") from None
+            if self._wave_steps:
+                try:
+                    wave = self._render_wave(wave_path)
+                except (OSError, ValueError, StateError):
+                    raise StateError("[state] transaction failed on wave.json; nothing written") from None
+
+            # Each write is checked; the first failure stops the commit and
+            # says which files already landed.
+            _invalidate_context()
+            written: list[str] = []
+            target = TASK_RELPATH
+            try:
+                if task is not None:
+                    _write_json(path, task)
+                    written.append(os.path.basename(TASK_RELPATH))
+                    if journal:
+                        _retire_journal(root, journal)
+                    _write_view(root, task)
+                elif self._patches and os.path.isfile(path):
+                    target = JOURNAL_RELPATH
+                    _journal_append(root, self._patches)
+                    written.append(os.path.basename(JOURNAL_RELPATH))
+                if self._wave_steps:
+                    target = WAVE_RELPATH
+                    _write_json(wave_path, wave)
+                    written.append(os.path.basename(WAVE_RELPATH))
+                if self._phase:
+                    target = PHASE_RELPATH
+                    _invalidate(root)
+                    phase_path = os.path.join(root, PHASE_RELPATH)
+                    os.makedirs(os.path.dirname(phase_path), exist_ok=True)
+                    with open(phase_path, "w", encoding="utf-8") as handle:
+                        handle.write(f"{self._phase}\n")
+            except OSError:
+                failed = os.path.basename(target)
+                if not written:
+                    raise StateError(f"[state] transaction failed writing {failed}; nothing written") from None
+                _bump_gen(root)
+                raise StateError(
+                    f"[state] transaction partly applied: wrote {' '.join(written)}; failed on {failed}"
+                ) from None
+            _bump_gen(root)
+        finally:
+            self.abort()
+
+    def commit(self) -> None:
+        """eneo_tx_commit: commit_unlocked() under the state lock."""
+        try:
+            lock = acquire_lock("state", self.root)
+        except StateError:
+            self.abort()
+            raise
+        try:
+            self.commit_unlocked()
+        finally:
+            release_lock(lock)
+
+
+# --- Initial creation and deletion ---------------------------------------------
+def init(slug: str, lane: str, bracket, tenancy: str, audit: str, root: str | None = None) -> None:
+    root = _root(root)
+    _invalidate(root)
+    now = _now()
+    path = os.path.join(root, TASK_RELPATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(os.path.join(root, JOURNAL_RELPATH))
+    except OSError:
+        pass
+    data = {
+        "slug": slug,
+        "lane": lane,
+        "bracket": bracket,
+        "tenancy_impact": tenancy,
+        "audit_impact": audit,
+        "phase": None,
+        "phase_total": None,
+        "phase_name": None,
+        "tdd_phase": "FREE",
+        "wave": None,
+        "wave_total": None,
+        "wave_status": {},
+        "active_agents": [],
+        "status": "in_progress",
+        "started_at": now,
+        "last_update": now,
+        "next_hint": None,
+        "prd_issue": None,
+        "last_pr": None,
+    }
+    _write_json(path, data)
+    _bump_gen(root)
+    _write_view(root, data)
+
+
+def clear(root: str | None = None) -> None:
+    root = _root(root)
+    _invalidate(root)
+    for relpath in (TASK_RELPATH, JOURNAL_RELPATH, VIEW_RELPATH, HEARTBEAT_RELPATH):
+        try:
+            os.unlink(os.path.join(root, relpath))
+        except OSError:
+            pass
+    try:
+        with open(os.path.join(root, PHASE_RELPATH), "w", encoding="utf-8") as handle:
+            handle.write("FREE\n")
+    except OSError:
+        pass
+    _bump_gen(root)
+
+
+# --- CLI ---------------------------------------------------------------------------
+_USAGE = {
+    "get": "get '<jq-expression>'",
+    "update": "update '<jq-expression>' [arg-name arg-value]...",
+    "phase-set": "phase-set RED|GREEN|REFACTOR|FREE",
+    "next-hint-consume": "next-hint-consume",
+    "init": "init <slug> <lane> <bracket> <tenancy_impact> <audit_impact>",
+    "clear": "clear",
+    "patch": "patch set|put|remove <field> [key] <value>",
+    "compact": "compact",
+    "heartbeat": "heartbeat",
+    "tx": "tx [--task EXPR ARGS...] [--patch OP FIELD [KEY] VALUE] [--phase PHASE] [--wave EXPR ARGS...]",
+}
+_TX_CLAUSES = ("--task", "--patch", "--phase", "--wave")
+
+
+def _tx_stage(tx: Transaction, rest: list[str]) -> bool:
+    """Stage `tx` CLI clauses on *tx*; False for a malformed command line."""
+    clauses: list[list[str]] = []
+    for arg in rest:
+        if arg in _TX_CLAUSES:
+            clauses.append([arg])
+        elif clauses:
+            clauses[-1].append(arg)
+        else:
+            return False
+    for clause, *args in clauses:
+        if clause in ("--task", "--wave"):
+            if not args or len(args) % 2 != 1:
+                return False
+            (tx.task if clause == "--task" else tx.wave)(args[0], parse_args(args[1:]))
+        elif clause == "--phase":
+            if len(args) != 1:
+                return False
+            tx.phase(args[0])
+        else:
+            if len(args) != (4 if args[:1] == ["put"] else 3):
+                return False
+            tx.patch(args[0], args[1], _patch_value(args[-1]), args[2] if args[0] == "put" else None)
+    return bool(clauses)
+
+
+def _raw(value) -> str:
+    """jq -r output: strings bare, everything else as JSON indented by 2."""
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, indent=2)
+
+
+def _tostring(value) -> str:
+    """jq's tostring: strings unchanged, everything else as compact JSON."""
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    command, rest = (args[0], args[1:]) if args else ("", [])
+    arity = {
+        "get": (1, 1), "update": (1, None), "phase-set": (1, 1),
+        "next-hint-consume": (0, 0), "init": (5, 5), "clear": (0, 0),
+        "patch": (3, 4), "compact": (0, 0), "heartbeat": (0, 0), "tx": (1, None),
+    }
+    low, high = arity.get(command, (-1, -1))
+    if low < 0 or len(rest) < low or (high is not None and len(rest) > high):
+        usage = _USAGE.get(command) or " | ".join(_USAGE.values())
+        print(f"usage: state.py {usage}", file=sys.stderr)
+        return 2
+    try:
+        if command == "get":
+            value = get(rest[0])
+            print("" if value is None or value is False else _raw(value))
+        elif command == "update":
+            update(rest[0], parse_args(rest[1:]))
+        elif command == "phase-set":
+            phase_set(rest[0])
+        elif command == "next-hint-consume":
+            print(next_hint_consume())
+        elif command == "init":
+            init(rest[0], rest[1], parse_args(["json:bracket", rest[2]])["bracket"], rest[3], rest[4])
+        elif command == "patch":
+            if len(rest) != (4 if rest[0] == "put" else 3):
+                print(f"usage: state.py {_USAGE['patch']}", file=sys.stderr)
+                return 2
+            patch(rest[0], rest[1], _patch_value(rest[-1]), rest[2] if rest[0] == "put" else None)
+        elif command == "compact":
+            compact()
+        elif command == "heartbeat":
+            heartbeat()
+        elif command == "tx":
+            tx = Transaction()
+            if not _tx_stage(tx, rest):
+                print(f"usage: state.py {_USAGE['tx']}", file=sys.stderr)
+                return 2
+            tx.commit()
+        else:
+            clear()
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    except StateError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,11 @@
 # and we cannot drift (e.g. one hook writing wave_status as an array, another
 # as an object — reviewer #5).
 #
+# Hot-path writers append typed patches to current-task.journal instead
+# (eneo_task_patch); readers fold them in through eneo_task_jq from env.sh.
+# Every write also regenerates current-task.view, the flattened display
+# fields that eneo_task_view sources without jq.
+#
 # Source after lib/env.sh:
 #   source "${BASH_SOURCE%/*}/lib/env.sh"
 #   source "${BASH_SOURCE%/*}/lib/state.sh"
@@ -12,12 +17,21 @@
 set -uo pipefail
 
 # Paths (functions so they re-resolve when CLAUDE_PROJECT_DIR changes between calls).
-eneo_task_file()  { echo "$(eneo_repo_root)/.claude/state/current-task.json"; }
-eneo_phase_file() { echo "$(eneo_repo_root)/.claude/state/phase"; }
-eneo_wave_file()  { echo "$(eneo_repo_root)/.claude/state/wave.json"; }
-eneo_state_lock_root() { echo "$(eneo_repo_root)/.claude/state/.locks"; }
+eneo_task_file()  { _eneo_repo_root_lookup; echo "$ENEO_REPO_ROOT/.claude/state/current-task.json"; }
+eneo_phase_file() { _eneo_repo_root_lookup; echo "$ENEO_REPO_ROOT/.claude/state/phase"; }
+eneo_wave_file()  { _eneo_repo_root_lookup; echo "$ENEO_REPO_ROOT/.claude/state/wave.json"; }
+eneo_state_lock_root() { _eneo_repo_root_lookup; echo "$ENEO_REPO_ROOT/.claude/state/.locks"; }
 eneo_lock_ttl_seconds() { echo 30; }
 
+# Rewrites .claude/state/gen after a state write so ENEO_CTX envelopes built
+# before it are recognised as stale (see "Hook context envelope" in env.sh).
+_eneo_state_gen_bump() {
+  _eneo_repo_root_lookup
+  local now
+  _eneo_now_us now
+  printf '%s\n' "$now-${BASHPID:-$$}" > "$ENEO_REPO_ROOT/.claude/state/gen" 2>/dev/null || true
+}
+
 eneo_file_mtime() {
   local path="$1"
   if stat -f %m "$path" >/dev/null 2>&1; then
@@ -28,45 +42,140 @@ eneo_file_mtime() {
 }
 
 # --- Lock helpers -------------------------------------------------------------
-# Use a directory lock instead of flock so this works on the host, inside the
-# devcontainer, and on macOS without extra tooling.
+# Usage: eneo_acquire_lock <name> || <give up>; ...; eneo_release_lock "$ENEO_LOCK"
+# The handle comes back in ENEO_LOCK rather than on stdout: an flock is held
+# by an open fd, which a $(...) subshell would close on exit. Commands run
+# while it is held inherit that fd, so keep them short-lived.
+#
+# Where the flock binary exists, the lock is flock(2) on .locks/<name>.flock:
+# the kernel drops it the moment its holder dies, and waiters block in
+# `flock -w` instead of polling. Elsewhere (stock macOS) it is the original
+# mkdir lock on .locks/<name>.lock, whose owner file holds "<pid> <host>";
+# a lock whose owner is gone from this host is reclaimed at once, and the
+# 30s TTL only covers owners on another host (the devcontainer vs the host).
+# state.py picks the backend by the same rule, so bash and Python writers
+# always exclude each other; ENEO_STATE_LOCK=flock|mkdir forces one.
+# Waiters give up after ENEO_LOCK_TIMEOUT whole seconds (default 5).
+#
+# Waits that found the lock held, timeouts and reclaims are appended to
+# .claude/stats/lock-wait.jsonl when .claude/stats/ exists:
+#   {"lock":"state","ts":"...","backend":"flock","outcome":"contended|timeout|reclaimed","wait_ms":N,"hook":"...","pid":N}
+# `eneo-hook-trace --locks` summarizes them.
+ENEO_LOCK=""
+ENEO_LOCK_BACKEND=""
+
+_eneo_lock_backend_lookup() {
+  case "${ENEO_STATE_LOCK:-}" in
+    flock|mkdir) ENEO_LOCK_BACKEND="$ENEO_STATE_LOCK" ;;
+    *) if type -P flock >/dev/null; then ENEO_LOCK_BACKEND=flock; else ENEO_LOCK_BACKEND=mkdir; fi ;;
+  esac
+}
+
+_eneo_lock_record() {
+  local name="$1" backend="$2" outcome="$3" t0="$4" now ts wait_us
+  _eneo_repo_root_lookup 2>/dev/null || return 0
+  local dir="$ENEO_REPO_ROOT/.claude/stats"
+  [[ -d "$dir" ]] || return 0
+  _eneo_now_us now
+  wait_us=$(( now - t0 ))
+  _eneo_utc_time ts '%Y-%m-%dT%H:%M:%SZ'
+  printf '{"lock":"%s","ts":"%s","backend":"%s","outcome":"%s","wait_ms":%d.%03d,"hook":"%s","pid":%s}\n' \
+    "$name" "$ts" "$backend" "$outcome" $(( wait_us / 1000 )) $(( wait_us % 1000 )) \
+    "${ENEO_TRACE_NAME:-}" "$$" >> "$dir/lock-wait.jsonl" 2>/dev/null || true
+}
+
+_eneo_lock_owner_gone() {
+  local lock_dir="$1" pid="" host="" now owner_mtime
+  read -r pid host < "$lock_dir/owner" 2>/dev/null || true
+  if [[ -n "$pid" && -n "$host" && "$host" == "${HOSTNAME:-}" ]]; then
+    ! kill -0 "$pid" 2>/dev/null && [[ ! -d "/proc/$pid" ]]
+    return
+  fi
+  now=$(date +%s)
+  owner_mtime=$(eneo_file_mtime "$lock_dir/owner" 2>/dev/null || eneo_file_mtime "$lock_dir" 2>/dev/null || echo 0)
+  [[ -n "$owner_mtime" && $((now - owner_mtime)) -ge $(eneo_lock_ttl_seconds) ]]
+}
+
+# _eneo_lock_fd_open FILE: sets fd to a new descriptor appending to FILE;
+# _eneo_lock_fd_close closes it. bash < 4.1 (stock macOS) has no {fd}>
+# allocation, so there the first free descriptor from 10 up is opened with
+# eval; fd is always numeric.
+_eneo_lock_fd_open() {
+  if (( BASH_VERSINFO[0] * 100 + BASH_VERSINFO[1] >= 401 )); then
+    exec {fd}>>"$1"
+    return
+  fi
+  fd=10
+  while [[ -e "/dev/fd/$fd" ]]; do fd=$((fd + 1)); done
+  eval "exec $fd>>\"\$1\""
+}
+
+_eneo_lock_fd_close() {
+  [[ "$1" =~ ^[0-9]+$ ]] || return 0
+  if (( BASH_VERSINFO[0] * 100 + BASH_VERSINFO[1] >= 401 )); then
+    local fd="$1"
+    exec {fd}>&-
+  else
+    eval "exec $1>&-"
+  fi
+}
+
 eneo_acquire_lock() {
   local name="$1"
-  local lock_root lock_dir attempts
-  lock_root=$(eneo_state_lock_root)
+  local lock_root lock_dir fd attempts t0 timeout="${ENEO_LOCK_TIMEOUT:-5}"
+  ENEO_LOCK=""
+  _eneo_now_us t0
+  _eneo_repo_root_lookup
+  lock_root="$ENEO_REPO_ROOT/.claude/state/.locks"
   mkdir -p "$lock_root" 2>/dev/null || true
+  _eneo_lock_backend_lookup
+  if [[ "$ENEO_LOCK_BACKEND" == flock ]]; then
+    _eneo_lock_fd_open "$lock_root/${name}.flock" || return 1
+    if ! flock -n "$fd"; then
+      if ! flock -w "$timeout" "$fd"; then
+        _eneo_lock_fd_close "$fd"
+        _eneo_lock_record "$name" flock timeout "$t0"
+        echo "[state] timed out acquiring lock: $name" >&2
+        return 1
+      fi
+      _eneo_lock_record "$name" flock contended "$t0"
+    fi
+    ENEO_LOCK="fd:$fd"
+    return 0
+  fi
   lock_dir="$lock_root/${name}.lock"
   attempts=0
   while ! mkdir "$lock_dir" 2>/dev/null; do
     attempts=$((attempts + 1))
-    local now owner_path owner_mtime ttl
-    owner_path="$lock_dir/owner"
-    ttl=$(eneo_lock_ttl_seconds)
-    now=$(date +%s)
-    owner_mtime=$(eneo_file_mtime "$owner_path" 2>/dev/null || eneo_file_mtime "$lock_dir" 2>/dev/null || echo 0)
-    if [[ -n "$owner_mtime" && $((now - owner_mtime)) -ge "$ttl" ]]; then
+    if _eneo_lock_owner_gone "$lock_dir"; then
       rm -rf "$lock_dir" 2>/dev/null || true
+      _eneo_lock_record "$name" mkdir reclaimed "$t0"
+      attempts=0
       continue
     fi
-    if [[ "$attempts" -ge 100 ]]; then
+    if (( attempts * 5 >= timeout * 100 )); then
+      _eneo_lock_record "$name" mkdir timeout "$t0"
       echo "[state] timed out acquiring lock: $name" >&2
       return 1
     fi
     sleep 0.05
   done
-  printf '%s\n' "$$" > "$lock_dir/owner"
-  echo "$lock_dir"
+  printf '%s %s\n' "$$" "${HOSTNAME:-}" > "$lock_dir/owner"
+  (( attempts == 0 )) || _eneo_lock_record "$name" mkdir contended "$t0"
+  ENEO_LOCK="$lock_dir"
 }
 
 eneo_release_lock() {
-  local lock_dir="${1:-}"
-  if [[ -n "$lock_dir" ]]; then
-    rm -f "$lock_dir/owner" 2>/dev/null || true
-    rmdir "$lock_dir" 2>/dev/null || true
-    local lock_root
-    lock_root=$(dirname "$lock_dir")
-    rmdir "$lock_root" 2>/dev/null || true
-  fi
+  local handle="${1:-}" fd
+  case "$handle" in
+    "") ;;
+    fd:*) _eneo_lock_fd_close "${handle#fd:}" ;;
+    *)
+      rm -f "$handle/owner" 2>/dev/null || true
+      rmdir "$handle" 2>/dev/null || true
+      rmdir "$(dirname "$handle")" 2>/dev/null || true
+      ;;
+  esac
 }
 
 # --- Read helpers -------------------------------------------------------------
@@ -82,7 +191,7 @@ eneo_task_get() {
     echo ""
     return
   fi
-  jq -re "$expr" "$file" 2>/dev/null || echo ""
+  eneo_task_jq -re "$expr" 2>/dev/null || echo ""
 }
 
 # --- Atomic write helper ------------------------------------------------------
@@ -117,13 +226,24 @@ _eneo_update_json_file() {
     fi
     shift 2
   done
-  local full_expr=".last_update = \$__now | ${expr}"
+  # A full rewrite folds and retires any journaled patches.
+  local journal="${file%.json}.journal" fold=""
+  if [[ -s "$journal" ]]; then
+    jq_args+=(--rawfile __journal "$journal")
+    fold="$ENEO_TASK_FOLD | "
+  fi
+  # Phase/slug in an inherited ENEO_CTX envelope may be about to change.
+  eneo_ctx_invalidate
+  local full_expr="${fold}.last_update = \$__now | ${expr}"
   if ! jq "${jq_args[@]}" "$full_expr" "$file" >"$tmp" 2>/dev/null; then
     rm -f "$tmp"
     echo "[state] jq expression failed: $expr" >&2
     return 1
   fi
   mv "$tmp" "$file"
+  _eneo_state_gen_bump
+  [[ -z "$fold" ]] || _eneo_task_journal_retire "$journal"
+  _eneo_task_view_write
 }
 
 eneo_task_update_unlocked() {
@@ -132,12 +252,185 @@ eneo_task_update_unlocked() {
 }
 
 eneo_task_update() {
-  local lock_dir
-  lock_dir=$(eneo_acquire_lock state) || return 1
-  trap 'eneo_release_lock "$lock_dir"' RETURN
+  eneo_acquire_lock state || return 1
+  local lock="$ENEO_LOCK"
+  trap 'eneo_release_lock "$lock"; trap - RETURN' RETURN
   eneo_task_update_unlocked "$@"
 }
 
+# --- Journal ------------------------------------------------------------------
+# Usage: eneo_task_patch set    <field> <value>
+#        eneo_task_patch put    <field> <key> <value>   # one entry of a map
+#        eneo_task_patch remove <field> <value>         # first match in a list
+# A value is a string, or raw JSON when prefixed "json:" (as eneo_task_update
+# args are). Instead of rewriting current-task.json, each call appends one
+# record to current-task.journal:
+#   {"ts":"...","op":"put","field":"wave_status","key":"2","value":"done"}
+# under the state lock; the record's ts becomes last_update when folded.
+# Once the journal holds ENEO_STATE_JOURNAL_MAX lines (default 64), or on any
+# eneo_task_update, it is folded into the JSON and retired, its records
+# appended to .claude/stats/task-journal.jsonl when .claude/stats/ exists.
+# ENEO_STATE_JOURNAL=0 folds after every patch. slug is never journaled, so
+# slug-only readers (eneo_current_slug, env.py, the hook daemon) can keep
+# reading the snapshot.
+_eneo_json_quote() {
+  local s="$2"
+  s="${s//\\/\\\\}"
+  s="${s//\"/\\\"}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\r'/\\r}"
+  s="${s//$'\t'/\\t}"
+  printf -v "$1" '"%s"' "$s"
+}
+
+_eneo_task_journal_retire() {
+  local journal="$1" history="$ENEO_REPO_ROOT/.claude/stats/task-journal.jsonl"
+  if [[ -d "${history%/*}" ]]; then
+    tail -n +2 "$journal" >> "$history" 2>/dev/null || true
+  fi
+  rm -f "$journal"
+}
+
+_eneo_task_compact_unlocked() {
+  _eneo_repo_root_lookup
+  local file="$ENEO_REPO_ROOT/.claude/state/current-task.json"
+  local journal="${file%.json}.journal" tmp
+  [[ -f "$file" && -s "$journal" ]] || return 0
+  tmp=$(mktemp)
+  if ! jq --rawfile __journal "$journal" "$ENEO_TASK_FOLD" "$file" >"$tmp" 2>/dev/null; then
+    rm -f "$tmp"
+    echo "[state] could not fold $journal" >&2
+    return 1
+  fi
+  mv "$tmp" "$file"
+  _eneo_task_journal_retire "$journal"
+  _eneo_task_view_write
+}
+
+# Renders ENEO_TASK_VIEW (env.sh) into current-task.view. The view is only
+# ever derived, so a failed render drops it and readers fall back to jq.
+_eneo_task_view_write() {
+  _eneo_repo_root_lookup
+  local view="$ENEO_REPO_ROOT/.claude/state/current-task.view"
+  if eneo_task_jq -r "$ENEO_TASK_VIEW" >"$view.$$" 2>/dev/null; then
+    mv -f "$view.$$" "$view"
+  else
+    rm -f "$view.$$" "$view"
+  fi
+}
+
+eneo_task_compact() {
+  eneo_acquire_lock state || return 1
+  local lock="$ENEO_LOCK"
+  trap 'eneo_release_lock "$lock"; trap - RETURN' RETURN
+  _eneo_task_compact_unlocked
+}
+
+# Sets ENEO_TASK_PATCH_RECORD to the journal record for one patch; returns 2
+# (after saying why) for an unknown op, a field that cannot be patched, or a
+# json: value that spans lines (the journal holds one record per line).
+ENEO_TASK_PATCH_RECORD=""
+_eneo_task_patch_record() {
+  local op="${1:-}" field="${2:-}" key="" value="" ts
+  case "$op" in
+    put) key="${3-}"; value="${4-}" ;;
+    set|remove) value="${3-}" ;;
+    *)
+      echo "[state] unknown patch op: $op (expected set|put|remove)" >&2
+      return 2
+      ;;
+  esac
+  if [[ ! "$field" =~ ^[A-Za-z_][A-Za-z0-9_]*$ || "$field" == slug ]]; then
+    echo "[state] cannot patch field: $field" >&2
+    return 2
+  fi
+  if [[ "$value" == json:* ]]; then
+    if [[ "$value" == *[$'\n\r']* ]]; then
+      echo "[state] json: patch value must be on one line" >&2
+      return 2
+    fi
+    value="${value#json:}"
+  else
+    _eneo_json_quote value "$value"
+  fi
+  _eneo_utc_time ts '%Y-%m-%dT%H:%M:%SZ'
+  ENEO_TASK_PATCH_RECORD="{\"ts\":\"$ts\",\"op\":\"$op\",\"field\":\"$field\""
+  if [[ "$op" == put ]]; then
+    _eneo_json_quote key "$key"
+    ENEO_TASK_PATCH_RECORD+=",\"key\":$key"
+  fi
+  ENEO_TASK_PATCH_RECORD+=",\"value\":$value}"
+}
+
+# Appends newline-separated records to the journal (with the generation
+# header when it starts one), then compacts at the threshold or refreshes
+# the view. A torn last line (a writer killed mid-append) is ended first so
+# the new records do not join it.
+_eneo_task_journal_append() {
+  local records="$1" journal lines=0 content="" now _
+  _eneo_repo_root_lookup
+  journal="$ENEO_REPO_ROOT/.claude/state/current-task.journal"
+  if [[ -s "$journal" ]]; then
+    IFS= read -r -d '' content < "$journal" || true
+    [[ "$content" == *$'\n' ]] || records=$'\n'"$records"
+  else
+    _eneo_now_us now
+    records="{\"gen\":\"$now-$$\"}"$'\n'"$records"
+  fi
+  eneo_ctx_invalidate
+  printf '%s\n' "$records" >> "$journal" || return 1
+  _eneo_state_gen_bump
+  if [[ "${ENEO_STATE_JOURNAL:-1}" != "0" ]]; then
+    while IFS= read -r _; do lines=$((lines + 1)); done < "$journal"
+    if (( lines < ${ENEO_STATE_JOURNAL_MAX:-64} )); then
+      _eneo_task_view_write
+      return 0
+    fi
+  fi
+  _eneo_task_compact_unlocked
+}
+
+eneo_task_patch_unlocked() {
+  _eneo_task_patch_record "$@" || return
+  _eneo_repo_root_lookup
+  [[ -f "$ENEO_REPO_ROOT/.claude/state/current-task.json" ]] || return 0  # nothing to update
+  _eneo_task_journal_append "$ENEO_TASK_PATCH_RECORD"
+}
+
+eneo_task_patch() {
+  eneo_acquire_lock state || return 1
+  local lock="$ENEO_LOCK"
+  trap 'eneo_release_lock "$lock"; trap - RETURN' RETURN
+  eneo_task_patch_unlocked "$@"
+}
+
+# --- Activity heartbeat -------------------------------------------------------
+# Usage: eneo_task_heartbeat
+# Records activity on the current task in .claude/state/heartbeat as
+# "<epoch> <ISO8601>" instead of bumping last_update: no lock, no jq, no
+# rewrite of the JSON or the view, and at most one write per
+# ENEO_HEARTBEAT_WINDOW seconds (default 60). Readers take the later of the
+# two (eneo_task_view, state.last_update). No-op without a task.
+eneo_task_heartbeat() {
+  _eneo_repo_root_lookup
+  local dir="$ENEO_REPO_ROOT/.claude/state" now last="" ts _
+  [[ -f "$dir/current-task.json" ]] || return 0
+  _eneo_utc_time now '%s'
+  { read -r last _ < "$dir/heartbeat"; } 2>/dev/null || true
+  if [[ "$last" =~ ^[0-9]+$ ]] && (( now - last < ${ENEO_HEARTBEAT_WINDOW:-60} )); then
+    return 0
+  fi
+  _eneo_utc_time ts '%Y-%m-%dT%H:%M:%SZ' "$now"
+  printf '%s %s\n' "$now" "$ts" > "$dir/heartbeat" 2>/dev/null || true
+}
+
+# PreToolUse decisions memoized by lib/decision_cache.py are keyed on the
+# phase and carry the task slug in their messages; drop them on any change.
+eneo_decisions_invalidate() {
+  _eneo_repo_root_lookup
+  rm -f "$ENEO_REPO_ROOT/.claude/state/.cache/decisions.json" 2>/dev/null || true
+}
+
 # --- Phase mirror -------------------------------------------------------------
 # Writes the phase string to both .claude/state/phase (fast cat-able single-word
 # file) AND to current-task.json.tdd_phase. JSON is authoritative if mirror
@@ -151,10 +444,13 @@ eneo_phase_set() {
       return 2
       ;;
   esac
+  eneo_ctx_invalidate
+  eneo_decisions_invalidate
   eneo_task_update '.tdd_phase = $__phase' __phase "$phase" || true
   local pf; pf=$(eneo_phase_file)
   mkdir -p "$(dirname "$pf")" 2>/dev/null || true
   printf '%s\n' "$phase" > "$pf"
+  _eneo_state_gen_bump
 }
 
 eneo_next_hint_consume() {
@@ -168,20 +464,262 @@ eneo_next_hint_consume() {
     return 0
   fi
 
-  local lock_dir hint
-  lock_dir=$(eneo_acquire_lock state) || return 1
-  trap 'eneo_release_lock "$lock_dir"' RETURN
-  hint=$(jq -re '.next_hint // empty' "$file" 2>/dev/null || echo "")
+  local lock hint
+  eneo_acquire_lock state || return 1
+  lock="$ENEO_LOCK"
+  trap 'eneo_release_lock "$lock"; trap - RETURN' RETURN
+  hint=$(eneo_task_jq -re '.next_hint // empty' 2>/dev/null || echo "")
   _eneo_update_json_file "$file" '.next_hint = null' || return 1
   printf '%s\n' "$hint"
 }
 
+# --- Transactions ---------------------------------------------------------------
+# Usage: eneo_tx_begin
+#        eneo_tx_task  '<jq-expression>' [arg-name arg-value]...   # current-task.json
+#        eneo_tx_patch set|remove <field> <value>                   # journaled, as eneo_task_patch
+#        eneo_tx_patch put <field> <key> <value>
+#        eneo_tx_phase RED|GREEN|REFACTOR|FREE                      # tdd_phase + mirror
+#        eneo_tx_wave  '<jq-expression>' [arg-name arg-value]...   # wave.json ({} if missing)
+#        eneo_tx_commit                  # or eneo_tx_commit_unlocked under the state lock
+# Stages several changes and applies them under one lock with one write per
+# file: every staged expression for a file runs in a single jq call, in
+# staging order, and nothing is written unless all of them succeed. The task
+# JSON is written before wave.json and the mirror last, as eneo_phase_set
+# does. Patches alone go to the journal in one append; next to a task
+# expression or a phase they are folded into that one rewrite. Arg names are
+# shared by a file's expressions, so staging one name twice with different
+# values is refused (rc 2). eneo_tx_abort drops whatever is staged; a commit
+# always closes the transaction.
+ENEO_TX_OPEN=0
+ENEO_TX_PHASE=""
+ENEO_TX_TASK_EXPRS=0
+ENEO_TX_TASK_STEPS=()
+ENEO_TX_TASK_ARGS=()
+ENEO_TX_PATCHES=()
+ENEO_TX_WAVE_STEPS=()
+ENEO_TX_WAVE_ARGS=()
+ENEO_TX_VARS=()  # "<target>:<name>\n<arg-name>=<value>" per staged arg
+
+eneo_tx_abort() {
+  ENEO_TX_OPEN=0
+  ENEO_TX_PHASE=""
+  ENEO_TX_TASK_EXPRS=0
+  ENEO_TX_TASK_STEPS=()
+  ENEO_TX_TASK_ARGS=()
+  ENEO_TX_PATCHES=()
+  ENEO_TX_WAVE_STEPS=()
+  ENEO_TX_WAVE_ARGS=()
+  ENEO_TX_VARS=()
+}
+
+eneo_tx_begin() {
+  eneo_tx_abort
+  ENEO_TX_OPEN=1
+}
+
+_eneo_tx_check_open() {
+  (( ENEO_TX_OPEN )) && return 0
+  echo "[state] no transaction open (eneo_tx_begin)" >&2
+  return 2
+}
+
+# _eneo_tx_args <task|wave> [arg-name arg-value]...
+# Indexed arrays only, so staging runs on the stock macOS bash 3.2 as well.
+_eneo_tx_args() {
+  local target="$1" name value key staged seen
+  local -a pair
+  shift
+  if (( $# % 2 )); then
+    echo "[state] arg names and values must come in pairs" >&2
+    return 2
+  fi
+  while (( $# >= 2 )); do
+    name="$1" value="$2"
+    shift 2
+    key="$target:${name#json:}"
+    seen=0
+    for staged in ${ENEO_TX_VARS[@]+"${ENEO_TX_VARS[@]}"}; do
+      [[ "${staged%%$'\n'*}" == "$key" ]] || continue
+      if [[ "${staged#*$'\n'}" != "$name=$value" ]]; then
+        echo "[state] transaction arg ${name#json:} staged twice with different values" >&2
+        return 2
+      fi
+      seen=1
+    done
+    (( seen )) && continue
+    ENEO_TX_VARS+=("$key"$'\n'"$name=$value")
+    if [[ "$name" == json:* ]]; then
+      pair=(--argjson "${name#json:}" "$value")
+    else
+      pair=(--arg "$name" "$value")
+    fi
+    if [[ "$target" == task ]]; then
+      ENEO_TX_TASK_ARGS+=("${pair[@]}")
+    else
+      ENEO_TX_WAVE_ARGS+=("${pair[@]}")
+    fi
+  done
+}
+
+eneo_tx_task() {
+  _eneo_tx_check_open || return
+  (( $# )) || { echo "usage: eneo_tx_task '<jq-expression>' [arg-name arg-value]..." >&2; return 2; }
+  _eneo_tx_args task "${@:2}" || return
+  ENEO_TX_TASK_STEPS+=("($1)")
+  ENEO_TX_TASK_EXPRS=$((ENEO_TX_TASK_EXPRS + 1))
+}
+
+eneo_tx_patch() {
+  _eneo_tx_check_open || return
+  _eneo_task_patch_record "$@" || return
+  # Folded into a rewrite, a record keeps the rewrite's last_update.
+  ENEO_TX_TASK_STEPS+=("eneo_patch(\$__tx_patches[${#ENEO_TX_PATCHES[@]}] | del(.ts))")
+  ENEO_TX_PATCHES+=("$ENEO_TASK_PATCH_RECORD")
+}
+
+eneo_tx_phase() {
+  _eneo_tx_check_open || return
+  case "${1:-}" in
+    RED|GREEN|REFACTOR|FREE) ENEO_TX_PHASE="$1" ;;
+    *)
+      echo "[state] invalid phase: ${1:-} (expected RED|GREEN|REFACTOR|FREE)" >&2
+      return 2
+      ;;
+  esac
+}
+
+eneo_tx_wave() {
+  _eneo_tx_check_open || return
+  (( $# )) || { echo "usage: eneo_tx_wave '<jq-expression>' [arg-name arg-value]..." >&2; return 2; }
+  _eneo_tx_args wave "${@:2}" || return
+  ENEO_TX_WAVE_STEPS+=("($1)")
+}
+
+# _eneo_tx_partial <failed file> [written file]...: report a commit that
+# stopped on a failed write, bump the generation if anything landed, and
+# close the transaction.
+_eneo_tx_partial() {
+  local failed="$1"
+  shift
+  if (( $# )); then
+    echo "[state] transaction partly applied: wrote $*; failed on $failed" >&2
+    _eneo_state_gen_bump
+  else
+    echo "[state] transaction failed writing $failed; nothing written" >&2
+  fi
+  eneo_tx_abort
+  return 1
+}
+
+eneo_tx_commit_unlocked() {
+  _eneo_tx_check_open || return
+  _eneo_repo_root_lookup
+  local dir="$ENEO_REPO_ROOT/.claude/state"
+  local file="$dir/current-task.json" journal="$dir/current-task.journal" wave="$dir/wave.json"
+  local task_tmp="" wave_tmp="" fold="" program now step records=""
+  local -a jq_args=() written=()
+  (( ${#ENEO_TX_PATCHES[@]} == 0 )) || printf -v records '%s\n' "${ENEO_TX_PATCHES[@]}"
+  # Render first: a failed expression leaves every file untouched.
+  if [[ -f "$file" && ( $ENEO_TX_TASK_EXPRS -gt 0 || -n "$ENEO_TX_PHASE" ) ]]; then
+    _eneo_utc_time now '%Y-%m-%dT%H:%M:%SZ'
+    jq_args=(--arg __now "$now" --arg __tx_phase "$ENEO_TX_PHASE" ${ENEO_TX_TASK_ARGS[@]+"${ENEO_TX_TASK_ARGS[@]}"})
+    step="${records//$'\n'/,}"
+    jq_args+=(--argjson __tx_patches "[${step%,}]")
+    if [[ -s "$journal" ]]; then
+      jq_args+=(--rawfile __journal "$journal")
+      fold="$ENEO_TASK_FOLD | "
+    fi
+    program="$ENEO_TASK_PATCH ${fold}.last_update = \$__now"
+    for step in ${ENEO_TX_TASK_STEPS[@]+"${ENEO_TX_TASK_STEPS[@]}"}; do
+      program+=" | $step"
+    done
+    [[ -z "$ENEO_TX_PHASE" ]] || program+=' | .tdd_phase = $__tx_phase'
+    task_tmp="$file.tx.$$"
+    if ! jq "${jq_args[@]}" "$program" "$file" >"$task_tmp" 2>/dev/null; then
+      rm -f "$task_tmp"
+      echo "[state] transaction failed on current-task.json; nothing written" >&2
+      eneo_tx_abort
+      return 1
+    fi
+  fi
+  if (( ${#ENEO_TX_WAVE_STEPS[@]} )); then
+    program="."
+    for step in "${ENEO_TX_WAVE_STEPS[@]}"; do
+      program+=" | $step"
+    done
+    wave_tmp="$wave.tx.$$"
+    if [[ -f "$wave" ]]; then
+      jq ${ENEO_TX_WAVE_ARGS[@]+"${ENEO_TX_WAVE_ARGS[@]}"} "$program" "$wave" >"$wave_tmp" 2>/dev/null
+    else
+      jq -n ${ENEO_TX_WAVE_ARGS[@]+"${ENEO_TX_WAVE_ARGS[@]}"} "{} | $program" >"$wave_tmp" 2>/dev/null
+    fi || {
+      rm -f "$wave_tmp" "$task_tmp"
+      echo "[state] transaction failed on wave.json; nothing written" >&2
+      eneo_tx_abort
+      return 1
+    }
+  fi
+
+  # Each write is checked; the first failure stops the commit and says which
+  # files already landed.
+  eneo_ctx_invalidate
+  if [[ -n "$task_tmp" ]]; then
+    if ! mv "$task_tmp" "$file" 2>/dev/null; then
+      rm -f "$task_tmp" "$wave_tmp"
+      _eneo_tx_partial current-task.json
+      return
+    fi
+    written+=(current-task.json)
+    [[ -z "$fold" ]] || _eneo_task_journal_retire "$journal"
+    _eneo_task_view_write
+  elif [[ -n "$records" && -f "$file" ]]; then
+    if ! _eneo_task_journal_append "${records%$'\n'}" 2>/dev/null; then
+      rm -f "$wave_tmp"
+      _eneo_tx_partial current-task.journal
+      return
+    fi
+    written+=(current-task.journal)
+  fi
+  if [[ -n "$wave_tmp" ]]; then
+    if ! mv "$wave_tmp" "$wave" 2>/dev/null; then
+      rm -f "$wave_tmp"
+      _eneo_tx_partial wave.json ${written[@]+"${written[@]}"}
+      return
+    fi
+    written+=(wave.json)
+  fi
+  if [[ -n "$ENEO_TX_PHASE" ]]; then
+    eneo_decisions_invalidate
+    mkdir -p "$dir" 2>/dev/null || true
+    if ! { printf '%s\n' "$ENEO_TX_PHASE" > "$dir/phase"; } 2>/dev/null; then
+      _eneo_tx_partial phase ${written[@]+"${written[@]}"}
+      return
+    fi
+  fi
+  _eneo_state_gen_bump
+  eneo_tx_abort
+}
+
+eneo_tx_commit() {
+  _eneo_tx_check_open || return
+  if ! eneo_acquire_lock state; then
+    eneo_tx_abort
+    return 1
+  fi
+  local lock="$ENEO_LOCK"
+  trap 'eneo_release_lock "$lock"; trap - RETURN' RETURN
+  eneo_tx_commit_unlocked
+}
+
 # --- Initial creation (called only by /eneo-new) -----------------------------
 # Usage: eneo_task_init <slug> <lane> <bracket> <tenancy_impact> <audit_impact>
 eneo_task_init() {
   local slug="$1" lane="$2" bracket="$3" tenancy="$4" audit="$5"
   local file; file=$(eneo_task_file)
+  eneo_ctx_invalidate
+  eneo_decisions_invalidate
   mkdir -p "$(dirname "$file")"
+  rm -f "${file%.json}.journal"
   local now; now=$(date -u +%Y-%m-%dT%H:%M:%SZ)
   local tmp; tmp=$(mktemp)
   jq -n \
@@ -209,12 +747,17 @@ eneo_task_init() {
       last_pr: null
     }' > "$tmp"
   mv "$tmp" "$file"
+  _eneo_state_gen_bump
+  _eneo_task_view_write
 }
 
 # --- Deletion (called only by /eneo-recap) -----------------------------------
 eneo_task_clear() {
   local file; file=$(eneo_task_file)
-  rm -f "$file"
+  eneo_ctx_invalidate
+  eneo_decisions_invalidate
+  rm -f "$file" "${file%.json}.journal" "${file%.json}.view" "${file%/*}/heartbeat"
   local pf; pf=$(eneo_phase_file)
   printf 'FREE\n' > "$pf" 2>/dev/null || true
+  _eneo_state_gen_bump
 }
@@ -6,8 +6,10 @@
 
 set -euo pipefail
 source "$(dirname "${BASH_SOURCE[0]}")/lib/env.sh"
+eneo_trace_begin pre-compact-snapshot PreCompact
 
-ROOT=$(eneo_repo_root)
+_eneo_repo_root_lookup
+ROOT="$ENEO_REPO_ROOT"
 SLUG=$(eneo_current_slug)
 TIMESTAMP=$(date -u +%Y%m%dT%H%M%SZ)
 
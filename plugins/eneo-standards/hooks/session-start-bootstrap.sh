@@ -4,6 +4,7 @@
 # Always exits 0; this is informational only.
 
 set -euo pipefail
+source "$(dirname "${BASH_SOURCE[0]}")/lib/env.sh" 2>/dev/null && eneo_trace_begin session-start-bootstrap SessionStart
 
 # List plugins (works whether we're on host or in-container because
 # Claude Code is the one running us).
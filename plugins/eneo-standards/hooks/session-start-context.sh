@@ -4,34 +4,28 @@
 
 set -euo pipefail
 source "$(dirname "${BASH_SOURCE[0]}")/lib/env.sh"
+eneo_trace_begin session-start-context SessionStart
 
-ROOT=$(eneo_repo_root)
-STATE="$ROOT/.claude/state/current-task.json"
+_eneo_repo_root_lookup
+ROOT="$ENEO_REPO_ROOT"
 RULES="$ROOT/.claude/rules/eneo-context.md"
 
-if [[ -f "$STATE" ]]; then
-  if command -v jq >/dev/null 2>&1; then
-    SUMMARY=$(jq -r '[.slug // "", (.phase // ""), (.phase_total // ""), (.wave // ""), (.wave_total // ""), (.tdd_phase // "FREE"), (.next_hint // "")] | @tsv' "$STATE" 2>/dev/null || echo "")
-    if [[ -n "$SUMMARY" ]]; then
-      IFS=$'\t' read -r SLUG PHASE PHASE_TOTAL WAVE WAVE_TOTAL TDD_PHASE NEXT_HINT <<<"$SUMMARY"
-      if [[ -n "$SLUG" ]]; then
-        LINE="Resume: $SLUG"
-        if [[ -n "$PHASE" && -n "$PHASE_TOTAL" ]]; then
-          LINE+=" · Phase $PHASE/$PHASE_TOTAL"
-        fi
-        if [[ -n "$WAVE" && -n "$WAVE_TOTAL" ]]; then
-          LINE+=" · Wave $WAVE/$WAVE_TOTAL"
-        fi
-        if [[ -n "$TDD_PHASE" && "$TDD_PHASE" != "FREE" ]]; then
-          LINE+=" · $TDD_PHASE"
-        fi
-        if [[ -n "$NEXT_HINT" ]]; then
-          LINE+=" · Next: $NEXT_HINT"
-        fi
-        printf '%s\n' "$LINE"
-      fi
-    fi
+# eneo_task_view sources the precomputed fields from current-task.view.
+if eneo_task_view 2>/dev/null && [[ -n "$TASK_SLUG" ]]; then
+  LINE="Resume: $TASK_SLUG"
+  if [[ -n "$TASK_PHASE" && -n "$TASK_PHASE_TOTAL" ]]; then
+    LINE+=" · Phase $TASK_PHASE/$TASK_PHASE_TOTAL"
   fi
+  if [[ -n "$TASK_WAVE" && -n "$TASK_WAVE_TOTAL" ]]; then
+    LINE+=" · Wave $TASK_WAVE/$TASK_WAVE_TOTAL"
+  fi
+  if [[ -n "$TASK_TDD_PHASE" && "$TASK_TDD_PHASE" != "FREE" ]]; then
+    LINE+=" · $TASK_TDD_PHASE"
+  fi
+  if [[ -n "$TASK_NEXT_HINT" ]]; then
+    LINE+=" · Next: $TASK_NEXT_HINT"
+  fi
+  printf '%s\n' "$LINE"
 fi
 
 if [[ -f "$RULES" ]]; then
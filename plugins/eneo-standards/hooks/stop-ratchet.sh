@@ -6,8 +6,11 @@
 
 set -euo pipefail
 source "$(dirname "${BASH_SOURCE[0]}")/lib/env.sh"
+eneo_trace_begin stop-ratchet Stop
+eneo_budget_start 300 stop-ratchet  # the timeout hooks.json gives this hook
 
-ROOT=$(eneo_repo_root)
+_eneo_repo_root_lookup
+ROOT="$ENEO_REPO_ROOT"
 COV="$ROOT/.claude/ratchet/coverage.json"
 MUT="$ROOT/.claude/ratchet/mutation.json"
 CURRENT_DIR="$ROOT/.claude/ratchet/.current"
@@ -19,8 +22,7 @@ if [[ ! -f "$COV" && ! -f "$MUT" ]]; then
   exit 0
 fi
 
-TASK_FILE="$ROOT/.claude/state/current-task.json"
-TASK_STATUS=$(jq -r '.status // ""' "$TASK_FILE" 2>/dev/null || echo "")
+eneo_task_view 2>/dev/null || TASK_STATUS=""
 
 # Compare the committed baselines to current artifacts.
 # This wrapper is intentionally pure-Python-safe: ratchet_check.py only reads
@@ -28,8 +30,8 @@ TASK_STATUS=$(jq -r '.status // ""' "$TASK_FILE" 2>/dev/null || echo "")
 # directly does not bypass eneo_exec-sensitive toolchains.
 # Before /eneo-verify the hook stays soft on missing current artifacts; after a
 # phase is marked verified it blocks ship on missing or regressed artifacts.
-VALIDATOR="$(dirname "${BASH_SOURCE[0]}")/validators/ratchet_check.py"
-if [[ -f "$VALIDATOR" ]]; then
+VALIDATE="$(dirname "${BASH_SOURCE[0]}")/../bin/eneo-validate"
+if [[ -f "$VALIDATE" ]]; then
   VALIDATOR_ARGS=(--coverage "$COV" --mutation "$MUT" --repo-root "$ROOT")
   if [[ -f "$CURRENT_COV" ]]; then
     VALIDATOR_ARGS+=(--current-coverage "$CURRENT_COV")
@@ -40,7 +42,9 @@ if [[ -f "$VALIDATOR" ]]; then
   if [[ "$TASK_STATUS" != "verified" ]]; then
     VALIDATOR_ARGS+=(--allow-missing-current)
   fi
-  if ! python3 "$VALIDATOR" "${VALIDATOR_ARGS[@]}"; then
+  # Hand the validator what this hook already resolved (root, mode, phase).
+  eneo_ctx_export 2>/dev/null || true
+  if ! python3 "$VALIDATE" ratchet-check "${VALIDATOR_ARGS[@]}"; then
     echo "[stop-ratchet] coverage or mutation regression detected — see above." >&2
     exit 2
   fi
@@ -20,6 +20,11 @@ from pathlib import Path
 # Make the shared env library importable (runtime path)
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
 import env  # type: ignore[import-not-found]  # noqa: E402
+import hook_trace  # type: ignore[import-not-found]  # noqa: E402
+
+MAX_ERRORS = 15
+HOOK_BUDGET = 180  # seconds; the timeout hooks.json gives this hook
+PYRIGHT_MIN_SECONDS = 15  # not worth starting pyright with less than this left
 
 
 def run_typecheck(repo_root: str) -> tuple[bool, str]:
@@ -33,30 +38,54 @@ def run_typecheck(repo_root: str) -> tuple[bool, str]:
     warn_only = os.environ.get("TYPECHECK_WARN_ONLY", "").lower() in ("1", "true")
 
     # Soft-fail if uv or pyright are unavailable in the selected environment
+    # Probe results are cached until uv.lock, pyproject.toml or the container
+    # changes; misses share one container entry via eneo_exec_many.
     mode = env.detect_env()
-    uv_check = env.eneo_exec("backend", ["uv", "--version"], capture=True)
+    uv_check, pyright_check = env.eneo_probe_many(
+        [
+            ("uv", "backend", ["uv", "--version"]),
+            ("pyright", "backend", ["uv", "run", "pyright", "--version"]),
+        ],
+        timeout=20,
+    )
+    if 124 in (uv_check.returncode, pyright_check.returncode):
+        return True, "[typecheck] Warning: probes timed out or hook time budget spent; skipping"
     if uv_check.returncode != 0:
         return True, f"[typecheck] Warning: uv not available in mode={mode}; skipping"
 
-    pyright_check = env.eneo_exec(
-        "backend", ["uv", "run", "pyright", "--version"], capture=True, timeout=20
-    )
     if pyright_check.returncode != 0:
         return True, f"[typecheck] Warning: pyright not installed in mode={mode}; skipping"
 
+    if not env.budget_allows(PYRIGHT_MIN_SECONDS, "skipped pyright"):
+        return True, "[typecheck] Warning: skipped, hook time budget nearly spent"
+
+    # Stream the run so memory stays flat however much pyright prints: only
+    # the first MAX_ERRORS lines are kept, the full log is teed to disk.
+    log_path = Path(repo_root) / ".claude" / "state" / ".cache" / "typecheck.log"
+    try:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        log_path = None
     try:
         # typecheck_changed.sh lives in the Eneo repo and is the team's
         # canonical entry point — call it through eneo_exec to respect mode.
-        result = env.eneo_exec(
+        result = env.eneo_exec_stream(
             "backend",
             ["bash", str(script)],
-            capture=True,
+            head=MAX_ERRORS,
+            tail=0,
+            tee=log_path,
             timeout=120,
         )
-    except subprocess.TimeoutExpired:
-        return True, "[typecheck] Warning: timed out after 120s"
+    except subprocess.TimeoutExpired as exc:
+        # The limit is 120s or whatever the hook budget had left.
+        return True, f"[typecheck] Warning: timed out after {exc.timeout:.0f}s"
 
-    output = result.stderr or result.stdout or ""
+    output = "\n".join(result.head)
+    if result.omitted:
+        output += f"\n... and {result.omitted} more errors"
+        if result.log_path:
+            output += f" (full log: {result.log_path})"
 
     if warn_only:
         return True, output if result.returncode != 0 else ""
@@ -65,6 +94,7 @@ def run_typecheck(repo_root: str) -> tuple[bool, str]:
 
 
 def main() -> int:
+    env.budget_start(HOOK_BUDGET, "typecheck-stop")
     input_data = json.load(sys.stdin)
 
     # Avoid infinite loops if a Stop hook fires from inside another Stop hook
@@ -81,12 +111,7 @@ def main() -> int:
 
     success, output = run_typecheck(repo_root)
     if not success and output:
-        lines = output.strip().splitlines()
-        max_errors = 15
-        truncated = len(lines) > max_errors
-        display = "\n".join(lines[:max_errors])
-        if truncated:
-            display += f"\n... and {len(lines) - max_errors} more errors"
+        display = output.strip()
 
         print(json.dumps({
             "decision": "block",
@@ -102,4 +127,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(hook_trace.run("typecheck-stop", "Stop", main))
@@ -1,5 +1,5 @@
 #!/usr/bin/env bash
-# UserPromptSubmit — log the prompt, refresh current-task.last_update, and
+# UserPromptSubmit — log the prompt, record an activity heartbeat, and
 # surface the current slug/phase to Claude via stderr.
 
 set -uo pipefail
@@ -8,8 +8,10 @@ HOOK_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 source "$HOOK_DIR/lib/env.sh" 2>/dev/null || true
 # shellcheck source=lib/state.sh
 source "$HOOK_DIR/lib/state.sh" 2>/dev/null || true
+eneo_trace_begin user-prompt-audit UserPromptSubmit 2>/dev/null || true
 
-ROOT=$(eneo_repo_root)
+_eneo_repo_root_lookup 2>/dev/null || true
+ROOT="${ENEO_REPO_ROOT:-}"
 SLUG=$(eneo_current_slug)
 TS=$(date -u +%Y-%m-%dT%H:%M:%SZ)
 
@@ -43,8 +45,9 @@ if [[ -n "$PROMPT" ]]; then
   fi
 fi
 
-# Refresh current-task.json.last_update so the status line reflects activity.
-# eneo_task_update is a no-op when the file does not exist.
-eneo_task_update '.' || true
+# Record activity for the status line and /eneo-doctor. The heartbeat skips
+# the state lock and the JSON, so prompts never contend with wave-barrier.sh;
+# readers derive last_update from it. No-op when there is no task.
+eneo_task_heartbeat || true
 
 exit 0
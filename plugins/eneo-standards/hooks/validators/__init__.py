@@ -0,0 +1,42 @@
+"""Stdlib-only validators behind one entry point.
+
+    eneo-validate <validator> [args...]      # bin/eneo-validate
+    python3 -m validators <validator> ...    # with hooks/ on sys.path
+
+Each module keeps its own CLI (``python3 validators/ratchet_check.py``);
+this package maps subcommand names to modules and imports only the one that
+was asked for, so a call is one interpreter launch with no uv resolve step.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+
+VALIDATORS = {
+    "pr-metadata-check": "pr_metadata_check",
+    "ratchet-check": "ratchet_check",
+    "trivial-test-detector": "trivial_test_detector",
+    "validate-file-contains": "validate_file_contains",
+    "validate-new-file": "validate_new_file",
+}
+
+
+def usage() -> str:
+    return "usage: eneo-validate {" + ",".join(VALIDATORS) + "} [args...]"
+
+
+def run(argv: list[str]) -> int:
+    """Run the validator named by argv[0] with the remaining arguments."""
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage(), file=sys.stderr if not argv else sys.stdout)
+        return 2 if not argv else 0
+    name = argv[0]
+    module_name = VALIDATORS.get(name) or (name if name in VALIDATORS.values() else None)
+    if module_name is None:
+        print(f"eneo-validate: unknown validator {name!r}\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    # argparse derives prog from argv[0]; keep help output pointing at the subcommand.
+    sys.argv = [f"eneo-validate {name}", *argv[1:]]
+    return module.main(argv[1:])
@@ -1,7 +1,4 @@
-#!/usr/bin/env -S uv run --script
-# /// script
-# requires-python = ">=3.11"
-# ///
+#!/usr/bin/env python3
 """Enforce required PR metadata on /eneo-ship output.
 
 Per Section F /eneo-ship: PR body MUST include tenancy:*, audit:*, PRD:#<n>,
@@ -12,8 +9,8 @@ Reads the PR body via `gh pr view <n> --json body`.
 
 Usage:
 
-    uv run pr_metadata_check.py --pr 1234
-    uv run pr_metadata_check.py --body-file /tmp/pr-body.md   # for testing
+    eneo-validate pr-metadata-check --pr 1234
+    eneo-validate pr-metadata-check --body-file /tmp/pr-body.md   # for testing
 """
 
 from __future__ import annotations
@@ -64,12 +61,12 @@ def fetch_body(pr: str) -> str:
         sys.exit(2)
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--pr", help="PR number to fetch via gh")
     group.add_argument("--body-file", type=Path, help="Local file with PR body (testing)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.pr:
         body = fetch_body(args.pr)
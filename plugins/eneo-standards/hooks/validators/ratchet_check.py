@@ -1,7 +1,4 @@
-#!/usr/bin/env -S uv run --script
-# /// script
-# requires-python = ">=3.11"
-# ///
+#!/usr/bin/env python3
 """Coverage + mutation ratchet check, invoked by stop-ratchet.sh.
 
 Section D Mechanism 4: stack coverage (weak floor) with mutation testing
@@ -101,7 +98,7 @@ def _init(repo_root: Path, coverage_path: Path | None, mutation_path: Path | Non
             print(f"[ratchet_check] exists, leaving untouched: {path}")
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--coverage", type=Path)
     parser.add_argument("--mutation", type=Path)
@@ -119,7 +116,7 @@ def main() -> int:
         help="Create empty coverage.json and mutation.json baselines under .claude/ratchet/. "
              "Run once per clone to quiet 'ratchet file missing' diagnostics.",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     repo_root = args.repo_root.resolve()
     if args.init:
@@ -1,7 +1,4 @@
-#!/usr/bin/env -S uv run --script
-# /// script
-# requires-python = ">=3.11"
-# ///
+#!/usr/bin/env python3
 """Reject tests where more than 30% of assertions are trivial.
 
 Covers Section D Mechanism 4 anti-sycophancy clause: tests that assert `True`,
@@ -13,8 +10,8 @@ pressure.
 
 Usage:
 
-    uv run trivial_test_detector.py path/to/test_*.py ...
-    uv run trivial_test_detector.py --threshold 0.2 tests/
+    eneo-validate trivial-test-detector path/to/test_*.py ...
+    eneo-validate trivial-test-detector --threshold 0.2 tests/
 
 Exit code 2 when any file exceeds the threshold.
 """
@@ -99,7 +96,7 @@ def analyze(path: Path) -> tuple[int, int, list[tuple[int, str]]]:
     return total, trivial, offenders
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("paths", nargs="+", type=Path, help="Test files or directories")
     parser.add_argument(
@@ -114,7 +111,7 @@ def main() -> int:
         default=3,
         help="Skip files with fewer than N assertions (default 3) — too small to judge",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     files: list[Path] = []
     for p in args.paths:
@@ -1,7 +1,4 @@
-#!/usr/bin/env -S uv run --script
-# /// script
-# requires-python = ">=3.11"
-# ///
+#!/usr/bin/env python3
 """Assert that a file contains every required string.
 
 Used by disler-style embedded Stop-hook validators on slash commands to ensure
@@ -13,7 +10,7 @@ so it can re-loop and add the missing section.
 
 Example:
 
-    uv run validate_file_contains.py \\
+    eneo-validate validate-file-contains \\
       --file .claude/plans/revoke-api-keys.md \\
       --contains '## Phase 1: Tracer Bullet' \\
       --contains '## Out of scope' \\
@@ -28,7 +25,7 @@ import sys
 from pathlib import Path
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--file", required=True, type=Path, help="File to check")
     parser.add_argument(
@@ -51,7 +48,7 @@ def main() -> int:
         default=None,
         help="If set, fail when the file exceeds this many lines (e.g., CLAUDE.md cap)",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     path: Path = args.file
     if not path.exists():
@@ -1,7 +1,4 @@
-#!/usr/bin/env -S uv run --script
-# /// script
-# requires-python = ">=3.11"
-# ///
+#!/usr/bin/env python3
 """Guard against clobbering an existing artifact.
 
 Used by /eneo-milestone and /eneo-spec to ensure the new PRD/SPEC/plan does not
@@ -18,7 +15,7 @@ import sys
 from pathlib import Path
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--path", required=True, type=Path, help="Target path")
     parser.add_argument(
@@ -31,7 +28,7 @@ def main() -> int:
         action="store_true",
         help="If path is a directory, fail if it is not empty",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     path: Path = args.path
     if args.must_not_exist and path.exists():
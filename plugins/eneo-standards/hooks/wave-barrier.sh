@@ -7,9 +7,11 @@
 # but non-counting return. Duplicate stop events for the same agent_id are
 # ignored so re-dispatches cannot double-count.
 #
-# Two pieces of state:
+# Two pieces of state, staged into one transaction (eneo_tx_*) and committed
+# together under the state lock:
 # 1. .claude/state/wave.json           — authoritative counter
-# 2. .claude/state/current-task.json   — DX source of truth
+# 2. .claude/state/current-task.json   — DX source of truth, patched through
+#    its journal rather than rewritten per stop
 #
 # Soft-fails on everything; never blocks.
 
@@ -19,6 +21,7 @@ HOOK_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 source "$HOOK_DIR/lib/env.sh" 2>/dev/null || true
 # shellcheck source=lib/state.sh
 source "$HOOK_DIR/lib/state.sh" 2>/dev/null || true
+eneo_trace_begin wave-barrier SubagentStop 2>/dev/null || true
 
 WAVE=$(eneo_wave_file)
 
@@ -57,10 +60,11 @@ case "$LAST_MESSAGE" in
     ;;
 esac
 
-LOCK_DIR=$(eneo_acquire_lock state) || exit 0
-trap 'eneo_release_lock "$LOCK_DIR"' EXIT
+eneo_acquire_lock state || exit 0
+LOCK="$ENEO_LOCK"
+trap 'rc=$?; eneo_release_lock "$LOCK"; eneo_on_exit "$rc"' EXIT
 
-# ---- 1. Advance wave.json (authoritative counter) ---------------------------
+# ---- 1. Stage the wave.json advance (authoritative counter) --------------
 CURRENT=$(cat "$WAVE" 2>/dev/null || echo '{}')
 WAVE_NO=$(echo "$CURRENT" | jq -r '.wave // 1')
 
@@ -72,6 +76,7 @@ fi
 DONE=$(echo "$CURRENT" | jq '.done // 0')
 EXPECTED=$(echo "$CURRENT" | jq '.expected // 0')
 
+eneo_tx_begin
 if [[ "$RESULT" == "done" ]]; then
   NEW_DONE=$((DONE + 1))
   if [[ "$EXPECTED" -gt 0 && "$NEW_DONE" -ge "$EXPECTED" ]]; then
@@ -80,63 +85,34 @@ if [[ "$RESULT" == "done" ]]; then
     STATUS="in-progress"
   fi
 
-  TMP=$(mktemp)
-  echo "$CURRENT" | jq \
-    --argjson d "$NEW_DONE" \
-    --arg s "$STATUS" \
-    --arg agent "$AGENT_ID" \
-    --arg artifact "$ARTIFACT" \
+  eneo_tx_wave \
     '.done = $d
      | .status = $s
      | .seen_agents = ((.seen_agents // []) + (if $agent == "" then [] else [$agent] end))
-     | .completed_artifacts = ((.completed_artifacts // []) + (if $artifact == "" then [] else [$artifact] end))' > "$TMP"
-  mv "$TMP" "$WAVE"
-
-  echo "[wave-barrier] wave $WAVE_NO: $NEW_DONE/$EXPECTED ($STATUS)" >&2
+     | .completed_artifacts = ((.completed_artifacts // []) + (if $artifact == "" then [] else [$artifact] end))' \
+    json:d "$NEW_DONE" s "$STATUS" agent "$AGENT_ID" artifact "$ARTIFACT"
 
   if [[ "$STATUS" == "ready-for-next-wave" ]]; then
-    eneo_task_update_unlocked \
-      '.wave_status = ((.wave_status // {}) | .[($__wave|tostring)] = "done") | .active_agents = []' \
-      __wave "$WAVE_NO" || true
+    eneo_tx_patch put wave_status "$WAVE_NO" done
+    eneo_tx_patch set active_agents 'json:[]'
   else
-    eneo_task_update_unlocked \
-      '.wave_status = ((.wave_status // {}) | .[($__wave|tostring)] = "in_progress")
-       | .active_agents = (
-           if ((.active_agents // []) | type) == "array"
-           then
-             (.active_agents // []) as $agents
-             | ($agents | index($__agent_type)) as $idx
-             | if $idx == null then $agents else ($agents[0:$idx] + $agents[$idx + 1:]) end
-           else []
-           end
-         )' \
-      __wave "$WAVE_NO" \
-      __agent_type "$AGENT_TYPE" || true
+    eneo_tx_patch put wave_status "$WAVE_NO" in_progress
+    [[ -z "$AGENT_TYPE" ]] || eneo_tx_patch remove active_agents "$AGENT_TYPE"
   fi
+  MESSAGE="wave $WAVE_NO: $NEW_DONE/$EXPECTED ($STATUS)"
 else
-  TMP=$(mktemp)
-  echo "$CURRENT" | jq \
-    --arg agent "$AGENT_ID" \
+  eneo_tx_wave \
     '.status = "in-progress"
      | .seen_agents = ((.seen_agents // []) + (if $agent == "" then [] else [$agent] end))
-     | .blocked_agents = ((.blocked_agents // []) + (if $agent == "" then [] else [$agent] end))' > "$TMP"
-  mv "$TMP" "$WAVE"
-
-  echo "[wave-barrier] wave $WAVE_NO: blocked result from ${AGENT_TYPE:-unknown}; not advancing" >&2
-
-  eneo_task_update_unlocked \
-    '.wave_status = ((.wave_status // {}) | .[($__wave|tostring)] = "in_progress")
-     | .active_agents = (
-         if ((.active_agents // []) | type) == "array"
-         then
-           (.active_agents // []) as $agents
-           | ($agents | index($__agent_type)) as $idx
-           | if $idx == null then $agents else ($agents[0:$idx] + $agents[$idx + 1:]) end
-         else []
-         end
-       )' \
-    __wave "$WAVE_NO" \
-    __agent_type "$AGENT_TYPE" || true
+     | .blocked_agents = ((.blocked_agents // []) + (if $agent == "" then [] else [$agent] end))' \
+    agent "$AGENT_ID"
+
+  eneo_tx_patch put wave_status "$WAVE_NO" in_progress
+  [[ -z "$AGENT_TYPE" ]] || eneo_tx_patch remove active_agents "$AGENT_TYPE"
+  MESSAGE="wave $WAVE_NO: blocked result from ${AGENT_TYPE:-unknown}; not advancing"
 fi
 
+# ---- 2. Commit the counter and the task patches together ----------------
+eneo_tx_commit_unlocked && echo "[wave-barrier] $MESSAGE" >&2
+
 exit 0
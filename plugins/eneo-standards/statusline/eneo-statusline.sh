@@ -1,8 +1,8 @@
 #!/usr/bin/env bash
 # Eneo harness custom status line — Claude Code-compatible.
-# Reads Claude Code's JSON input on stdin AND .claude/state/current-task.json
-# for harness state. Prints two lines; line 2 is omitted when no milestone is
-# in flight.
+# Reads Claude Code's JSON input on stdin AND the harness state view
+# (.claude/state/current-task.view, via eneo_task_view). Prints two lines;
+# line 2 is omitted when no milestone is in flight.
 #
 # Enable by adding this to .claude/settings.json:
 #   "statusLine": {
@@ -187,63 +187,30 @@ fi
 printf '%s\n' "$LINE1"
 
 # --- Line 2 — harness state (optional) --------------------------------------
-# Find current-task.json via the env helper if available, otherwise best-effort.
-STATE_FILE=""
-if declare -f eneo_repo_root >/dev/null 2>&1; then
-  ROOT=$(eneo_repo_root 2>/dev/null || echo "")
-  [[ -n "$ROOT" ]] && STATE_FILE="$ROOT/.claude/state/current-task.json"
+# eneo_task_view (env.sh) reads the precomputed display fields, wave bar
+# included, from current-task.view; a refresh forks no jq while it is fresh.
+# Without env.sh, one jq call reads $CWD/.claude/state/current-task.json
+# directly (journaled updates not yet compacted into it are not shown).
+if declare -f eneo_task_view >/dev/null 2>&1; then
+  eneo_task_view 2>/dev/null || exit 0
 else
   STATE_FILE="$CWD/.claude/state/current-task.json"
+  [[ -f "$STATE_FILE" ]] || exit 0
+  # Fields are joined with US (0x1f): unlike tab, it does not collapse empties.
+  IFS=$'\x1f' read -r TASK_SLUG TASK_PHASE TASK_PHASE_TOTAL TASK_WAVE TASK_WAVE_TOTAL \
+    TASK_WAVE_BAR TASK_TDD_PHASE TASK_STATUS TASK_NEXT_HINT TASK_ACTIVE_AGENTS < <(
+    jq -r 'def text: if . == null then "" elif type == "string" then . elif type == "number" then tostring else tojson end;
+      ((.wave_total | text | tonumber? // 0) | floor) as $waves
+      | (.wave_status | if type == "object" then . else {} end) as $status
+      | [.slug, .phase, .phase_total, .wave, .wave_total,
+         ([range(1; $waves + 1) | $status[tostring]
+           | if . == "done" then "▓" elif . == "in_progress" then "▒" else "░" end] | join("")),
+         (.tdd_phase // "FREE"), .status, .next_hint,
+         (.active_agents | if type == "array" then map(text) | join(", ") else "" end)]
+      | map(text | gsub("[\n\u001f]"; " ")) | join("\u001f")' "$STATE_FILE" 2>/dev/null
+  )
 fi
-
-if [[ -z "$STATE_FILE" || ! -f "$STATE_FILE" ]]; then
-  exit 0  # no milestone in flight → line 2 hidden
-fi
-
-# Parse state defensively with a single jq call.
-STATE_FIELDS="$(jq -r '
-  [
-    .slug // "",
-    (.phase // ""),
-    (.phase_total // ""),
-    (.wave // ""),
-    (.wave_total // ""),
-    .tdd_phase // "",
-    .status // "",
-    .next_hint // "",
-    (
-      if ((.active_agents // []) | type) == "array"
-      then (.active_agents // [])
-      else []
-      end
-    ) | join(", "),
-    (.wave_status // {}) | tojson
-  ] | @tsv
-' "$STATE_FILE" 2>/dev/null || echo "")"
-
-IFS=$'\t' read -r SLUG PHASE PHASE_TOTAL WAVE WAVE_TOTAL TDD_PHASE STATUS NEXT_HINT ACTIVE_AGENTS WAVE_STATUS_JSON <<<"$STATE_FIELDS"
-if [[ -z "$SLUG" ]]; then
-  exit 0  # malformed or empty → fall back to line 1
-fi
-
-# Wave-completion bar
-bar() {
-  local total="$1"
-  # Build per-wave block from wave_status object
-  local blocks=""
-  if [[ -n "$total" ]]; then
-    for ((i=1; i<=total; i++)); do
-      local s
-      s="$(echo "${WAVE_STATUS_JSON:-{}}" | jq -r --arg key "$i" '.[$key] // "pending"' 2>/dev/null || echo "pending")"
-      case "$s" in
-        done)        blocks+="▓" ;;
-        in_progress) blocks+="▒" ;;
-        *)           blocks+="░" ;;
-      esac
-    done
-  fi
-  echo "$blocks"
-}
+[[ -n "${TASK_SLUG:-}" ]] || exit 0  # no milestone in flight → line 2 hidden
 
 # Color the TDD phase
 tdd_color() {
@@ -255,22 +222,21 @@ tdd_color() {
   esac
 }
 
-LINE2="${C_BOLD}${SLUG}${C_RESET}"
-if [[ -n "$PHASE" && -n "$PHASE_TOTAL" ]]; then
-  LINE2+=" · ${C_DIM}p${C_RESET}${PHASE}/${PHASE_TOTAL}"
+LINE2="${C_BOLD}${TASK_SLUG}${C_RESET}"
+if [[ -n "$TASK_PHASE" && -n "$TASK_PHASE_TOTAL" ]]; then
+  LINE2+=" · ${C_DIM}p${C_RESET}${TASK_PHASE}/${TASK_PHASE_TOTAL}"
 fi
-if [[ -n "$WAVE" && -n "$WAVE_TOTAL" ]]; then
-  BAR=$(bar "$WAVE_TOTAL")
-  LINE2+=" · ${C_DIM}w${C_RESET}${WAVE}/${WAVE_TOTAL} [${BAR}]"
+if [[ -n "$TASK_WAVE" && -n "$TASK_WAVE_TOTAL" ]]; then
+  LINE2+=" · ${C_DIM}w${C_RESET}${TASK_WAVE}/${TASK_WAVE_TOTAL} [${TASK_WAVE_BAR}]"
 fi
-if [[ -n "$TDD_PHASE" && "$TDD_PHASE" != "FREE" ]]; then
-  LINE2+=" · $(tdd_color "$TDD_PHASE")"
+if [[ -n "$TASK_TDD_PHASE" && "$TASK_TDD_PHASE" != "FREE" ]]; then
+  LINE2+=" · $(tdd_color "$TASK_TDD_PHASE")"
 fi
-if [[ -n "$ACTIVE_AGENTS" ]]; then
-  LINE2+=" · ${C_CYAN}↻${C_RESET} ${ACTIVE_AGENTS}"
-elif [[ -n "$NEXT_HINT" ]]; then
-  LINE2+=" · ${C_DIM}→${C_RESET} ${NEXT_HINT}"
-elif [[ "$STATUS" == "in_progress" ]]; then
+if [[ -n "$TASK_ACTIVE_AGENTS" ]]; then
+  LINE2+=" · ${C_CYAN}↻${C_RESET} ${TASK_ACTIVE_AGENTS}"
+elif [[ -n "$TASK_NEXT_HINT" ]]; then
+  LINE2+=" · ${C_DIM}→${C_RESET} ${TASK_NEXT_HINT}"
+elif [[ "$TASK_STATUS" == "in_progress" ]]; then
   LINE2+=" · ${C_DIM}…${C_RESET}"
 fi
 
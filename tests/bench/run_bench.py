@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Replay recorded hook payloads and compare latency against a baseline.
+
+Each file in tests/bench/corpus/ is one case:
+
+    {"hook": "hooks/dispatch.sh", "event": "PreToolUse", "exit": 2,
+     "files": {".claude/state/phase": "GREEN\\n", ...},
+     "payload": {...}}
+
+"hook" is relative to plugins/eneo-standards/; "files" are written into a
+fresh Eneo-shaped temp repo (strings verbatim, objects as JSON) before every
+run, so stateful hooks (wave-barrier, user-prompt-audit) replay the same
+input each time; "{root}" in the payload is replaced by that repo's path.
+"exit" is the expected exit code, which keeps a case from silently timing
+an error path. An optional "threshold_pct" widens the allowed regression of
+a case whose hook is dominated by process start-up (the status line forks
+~50 times).
+
+Per case the runner reports wall-time p50/p95/p99/max and the median number
+of processes the hook spawned (growth of /proc/sys/kernel/ns_last_pid, minus
+the hook process itself). Docker detection is pinned to "native", hook
+tracing and the PreToolUse decision cache are off, so numbers only depend on
+the hook code and the machine.
+
+--plugin-dir replays the corpus against another checkout of the plugin. A
+case whose "hook" does not exist there is replayed through the commands that
+checkout's hooks/hooks.json registers for the event and tool, started
+together as Claude Code starts them, so the baseline can be recorded from
+the tree before the PreToolUse dispatcher existed:
+
+    git worktree add /tmp/eneo-pre 7e2e456
+    python3 tests/bench/run_bench.py --update-baseline \
+        --plugin-dir /tmp/eneo-pre/plugins/eneo-standards
+
+Every run also times a bare `bash -c :` and `python3 -c pass`. The baseline
+stores those as "calibration", and a case's limit is scaled by how much
+slower the matching interpreter starts now than when the baseline was
+recorded, so a loaded machine does not read as a regression.
+
+    python3 tests/bench/run_bench.py                  # compare with baseline.json
+    python3 tests/bench/run_bench.py --runs 50 --only pre_tool_use_edit_src_green
+    python3 tests/bench/run_bench.py --update-baseline
+
+A case regresses when its p50 exceeds the calibrated baseline by more than
+the threshold (--threshold, else baseline.json's "threshold_pct", widened
+by the case's own) or its median spawn count grows by more than
+--spawn-slack. Latency baselines are machine
+specific: refresh baseline.json on the machine that gates on it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = BENCH_DIR / "corpus"
+BASELINE = BENCH_DIR / "baseline.json"
+PLUGIN_DIR = BENCH_DIR.parents[1] / "plugins" / "eneo-standards"
+DEFAULT_THRESHOLD_PCT = 25.0
+_LAST_PID = Path("/proc/sys/kernel/ns_last_pid")
+
+
+def load_corpus(only: list[str] | None = None) -> dict[str, dict]:
+    cases = {}
+    for path in sorted(CORPUS_DIR.glob("*.json")):
+        if only and path.stem not in only:
+            continue
+        cases[path.stem] = json.loads(path.read_text(encoding="utf-8"))
+    return cases
+
+
+def make_repo() -> Path:
+    root = Path(tempfile.mkdtemp(prefix="eneo-bench-"))
+    (root / "backend" / "src" / "intric").mkdir(parents=True)
+    (root / ".claude" / "state").mkdir(parents=True)
+    return root
+
+
+def write_files(root: Path, files: dict[str, object]) -> None:
+    for relpath, content in files.items():
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+
+
+def _last_pid() -> int | None:
+    try:
+        return int(_LAST_PID.read_text(encoding="ascii"))
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _argv(hook: Path) -> list[str]:
+    return [sys.executable, str(hook)] if hook.suffix == ".py" else ["bash", str(hook)]
+
+
+def case_commands(case: dict, plugin_dir: Path = PLUGIN_DIR) -> list[list[str]]:
+    """The command lines that answer *case* in the plugin at *plugin_dir*."""
+    hook = plugin_dir / case["hook"]
+    if hook.is_file():
+        return [_argv(hook)]
+    event = case.get("event", "")
+    tool = case.get("payload", {}).get("tool_name", "")
+    try:
+        registered = json.loads((plugin_dir / "hooks" / "hooks.json").read_text(encoding="utf-8"))["hooks"]
+    except (OSError, ValueError, KeyError) as exc:
+        raise RuntimeError(f"{case['hook']} is not in {plugin_dir} and its hooks.json is unreadable: {exc}") from exc
+    commands = []
+    for entry in registered.get(event, []):
+        matcher = entry.get("matcher", "")
+        if matcher and not re.fullmatch(matcher, tool):
+            continue
+        for hook_entry in entry.get("hooks", []):
+            command = hook_entry["command"].replace("${CLAUDE_PLUGIN_ROOT}", str(plugin_dir))
+            script, *args = shlex.split(command)
+            commands.append([*_argv(Path(script)), *args])
+    if not commands:
+        raise RuntimeError(f"{case['hook']} is not in {plugin_dir} and its hooks.json registers nothing for {event}")
+    return commands
+
+
+def runtime(commands: list[list[str]]) -> str:
+    """Which interpreter start-up dominates *commands*: "python" or "bash"."""
+    return "python" if any(argv[0] == sys.executable for argv in commands) else "bash"
+
+
+def calibrate(runs: int) -> dict[str, float]:
+    """p50 start-up of a bare bash and Python process on this machine, now."""
+    probes = {"bash": ["bash", "-c", ":"], "python": [sys.executable, "-c", "pass"]}
+    calibration = {}
+    for name, argv in probes.items():
+        durations = []
+        for index in range(max(runs, 5) + 1):
+            started = time.perf_counter()
+            subprocess.run(argv, check=False)
+            if index:
+                durations.append((time.perf_counter() - started) * 1000)
+        calibration[name] = round(statistics.median(durations), 2)
+    return calibration
+
+
+def run_case(name: str, case: dict, runs: int, plugin_dir: Path = PLUGIN_DIR) -> dict:
+    commands = case_commands(case, plugin_dir)
+    root = make_repo()
+    env = {
+        **os.environ,
+        "CLAUDE_PROJECT_DIR": str(root),
+        "TMPDIR": str(root / ".tmp"),
+        "ENEO_SESSION_ID": "bench",
+        "ENEO_DEVCONTAINER_MODE": "native",
+        "ENEO_TRACE": "0",
+        "ENEO_DECISION_CACHE": "0",
+    }
+    for var in ("ENEO_CTX", "ENEO_HOOK_DAEMON"):
+        env.pop(var, None)
+    (root / ".tmp").mkdir()
+    payload = json.dumps(case.get("payload", {})).replace("{root}", str(root))
+
+    durations: list[float] = []
+    spawns: list[int] = []
+    try:
+        for index in range(runs + 1):  # run 0 warms the page cache and is dropped
+            write_files(root, case.get("files", {}))
+            pid0 = _last_pid()
+            started = time.perf_counter()
+            procs = [
+                subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 text=True, env=env, cwd=root)
+                for argv in commands
+            ]
+            stderr = "".join(proc.communicate(payload)[1] for proc in procs)
+            elapsed = (time.perf_counter() - started) * 1000
+            pid1 = _last_pid()
+            returncode = max(proc.returncode for proc in procs)
+            if returncode != case.get("exit", 0):
+                raise RuntimeError(
+                    f"{name}: {case['hook']} exited {returncode}, expected {case.get('exit', 0)}\n{stderr}"
+                )
+            if index:
+                durations.append(elapsed)
+                if pid0 is not None and pid1 is not None:
+                    spawns.append(max(0, pid1 - pid0 - len(procs)))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    durations.sort()
+    result = {
+        "hook": ", ".join(os.path.relpath(argv[1], plugin_dir) for argv in commands),
+        "event": case.get("event", ""),
+        "runtime": runtime(commands),
+        "runs": runs,
+        "p50_ms": round(percentile(durations, 50), 2),
+        "p95_ms": round(percentile(durations, 95), 2),
+        "p99_ms": round(percentile(durations, 99), 2),
+        "max_ms": round(durations[-1], 2),
+        "spawns": int(statistics.median(spawns)) if spawns else None,
+    }
+    if "threshold_pct" in case:
+        result["threshold_pct"] = float(case["threshold_pct"])
+    return result
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict,
+    threshold_pct: float,
+    spawn_slack: int,
+    calibration: dict[str, float] | None = None,
+) -> list[str]:
+    """Human-readable regressions of *results* against *baseline*.
+
+    With *calibration* (this run's calibrate()) and a calibrated baseline,
+    each limit is scaled by the start-up ratio of the case's interpreter.
+    """
+    regressions = []
+    base_calibration = baseline.get("calibration") or {}
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        pct = max(threshold_pct, result.get("threshold_pct", 0.0))
+        kind = result.get("runtime", "bash")
+        scale = 1.0
+        if calibration and base_calibration.get(kind) and calibration.get(kind):
+            scale = calibration[kind] / base_calibration[kind]
+        limit = base["p50_ms"] * scale * (1 + pct / 100)
+        if result["p50_ms"] > limit:
+            scaled = f" x{scale:.2f} {kind} start-up" if scale != 1.0 else ""
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.1f}ms > {limit:.1f}ms "
+                f"(baseline {base['p50_ms']:.1f}ms{scaled} + {pct:g}%)"
+            )
+        if result["spawns"] is not None and base.get("spawns") is not None \
+                and result["spawns"] > base["spawns"] + spawn_slack:
+            regressions.append(f"{name}: spawns {result['spawns']} > baseline {base['spawns']} + {spawn_slack}")
+    return regressions
+
+
+def print_table(results: dict[str, dict], baseline: dict) -> None:
+    header = f"{'case':<34} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'spawns':>6} {'base p50':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        base = baseline.get("cases", {}).get(name, {})
+        spawns = "-" if row["spawns"] is None else str(row["spawns"])
+        base_p50 = f"{base['p50_ms']:.1f}" if base else "-"
+        print(
+            f"{name:<34} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['max_ms']:>8.1f} {spawns:>6} {base_p50:>9}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--only", action="append", metavar="CASE", help="run one corpus case (repeatable)")
+    parser.add_argument("--threshold", type=float, help="allowed p50 regression in percent")
+    parser.add_argument("--spawn-slack", type=int, default=1, help="allowed growth of the median spawn count")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--plugin-dir", type=Path, default=PLUGIN_DIR,
+                        help="replay against this checkout of plugins/eneo-standards")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    cases = load_corpus(args.only)
+    if not cases:
+        print("run_bench: no matching corpus cases", file=sys.stderr)
+        return 2
+    try:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        baseline = {}
+    threshold = args.threshold if args.threshold is not None \
+        else float(baseline.get("threshold_pct", DEFAULT_THRESHOLD_PCT))
+
+    plugin_dir = args.plugin_dir.resolve()
+    try:
+        results = {name: run_case(name, case, args.runs, plugin_dir) for name, case in cases.items()}
+    except RuntimeError as exc:
+        print(f"run_bench: {exc}", file=sys.stderr)
+        return 2
+    calibration = calibrate(args.runs)
+
+    if args.update_baseline:
+        merged = {**baseline.get("cases", {}), **results}
+        args.baseline.write_text(
+            json.dumps(
+                {"threshold_pct": threshold, "calibration": calibration, "cases": dict(sorted(merged.items()))},
+                indent=2,
+            ) + "\n",
+            encoding="utf-8",
+        )
+        print(f"run_bench: wrote {len(results)} case(s) to {args.baseline}")
+        return 0
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, baseline)
+    regressions = compare(results, baseline, threshold, args.spawn_slack, calibration)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
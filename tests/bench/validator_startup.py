@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Startup time of the validators: uv script shebang vs eneo-validate.
+
+Runs `<validator> --help` through each launch path and reports p50/p95 wall
+time per path:
+
+    uv-script   uv run --script hooks/validators/<module>.py   (the old shebang)
+    python3     python3 hooks/validators/<module>.py
+    entrypoint  python3 bin/eneo-validate <validator>
+
+The uv path is skipped when uv is not on PATH. uv caches the script
+environment after the first call, so its numbers are the warm per-call cost.
+
+    python3 tests/bench/validator_startup.py [--runs 20] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parents[2] / "plugins" / "eneo-standards"
+VALIDATORS_DIR = PLUGIN_DIR / "hooks" / "validators"
+ENTRYPOINT = PLUGIN_DIR / "bin" / "eneo-validate"
+
+sys.path.insert(0, str(PLUGIN_DIR / "hooks"))
+import validators  # noqa: E402
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def launch_paths(name: str, module: str) -> dict[str, list[str] | None]:
+    script = str(VALIDATORS_DIR / f"{module}.py")
+    uv = shutil.which("uv")
+    return {
+        "uv-script": [uv, "run", "--quiet", "--script", script] if uv else None,
+        "python3": [sys.executable, script],
+        "entrypoint": [sys.executable, str(ENTRYPOINT), name],
+    }
+
+
+def time_command(argv: list[str], runs: int) -> dict[str, float]:
+    durations = []
+    for index in range(runs + 1):  # the first run warms caches and is dropped
+        started = time.perf_counter()
+        result = subprocess.run([*argv, "--help"], capture_output=True, check=False)
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} --help exited {result.returncode}: {result.stderr.decode()}")
+        if index:
+            durations.append(elapsed)
+    durations.sort()
+    return {"p50_ms": round(percentile(durations, 50), 2), "p95_ms": round(percentile(durations, 95), 2)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict[str, dict[str, float] | None]] = {}
+    for name, module in validators.VALIDATORS.items():
+        results[name] = {
+            path: time_command(command, args.runs) if command else None
+            for path, command in launch_paths(name, module).items()
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    paths = ("uv-script", "python3", "entrypoint")
+    print(f"{'validator':<24}" + "".join(f"{path + ' p50':>18}" for path in paths))
+    for name, row in results.items():
+        cells = "".join(
+            f"{'skipped':>18}" if row[path] is None else f"{row[path]['p50_ms']:>16.1f}ms" for path in paths
+        )
+        print(f"{name:<24}{cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,17 @@
+import asyncio
 import json
 import os
+import socketserver
+import shutil
+import signal
+import struct
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler
 from pathlib import Path
 from unittest import mock
 import re
@@ -13,6 +21,13 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 FIXTURES = REPO_ROOT / "tests" / "fixtures"
 sys.path.insert(0, str(REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib"))
 import env as eneo_env  # type: ignore[import-not-found]
+import docker_api  # type: ignore[import-not-found]
+import exec_agent  # type: ignore[import-not-found]
+import hook_daemon  # type: ignore[import-not-found]
+import policies  # type: ignore[import-not-found]
+import decision_cache  # type: ignore[import-not-found]
+import path_policy  # type: ignore[import-not-found]
+import state as eneo_state  # type: ignore[import-not-found]
 
 
 def write_json(path: Path, payload: dict) -> None:
@@ -62,6 +77,91 @@ def run_executable(script: Path, *args: str, cwd: Path | None = None) -> subproc
     )
 
 
+def write_fake_docker(bin_dir: Path, names: list[str]) -> Path:
+    """Install a `docker` stub that logs each invocation and lists *names*."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    log = bin_dir / "docker.log"
+    script = bin_dir / "docker"
+    listing = "\\n".join(names)
+    script.write_text(
+        "#!/usr/bin/env bash\n"
+        f"echo \"$*\" >> {log}\n"
+        f"printf '{listing}\\n'\n",
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return log
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    """Just enough of the Docker Engine API for env.py's socket client."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+    def _reply(self, status: int, payload: object) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.server.requests.append(("GET", self.path, None))  # type: ignore[attr-defined]
+        if self.path == "/containers/json":
+            names = self.server.names  # type: ignore[attr-defined]
+            self._reply(200, [{"Names": [f"/{name}"], "Id": f"{index:064x}"} for index, name in enumerate(names)])
+        elif self.path == "/exec/exec-1/json":
+            self._reply(200, {"ExitCode": 3})
+        else:
+            self._reply(404, {"message": "not found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null")
+        self.server.requests.append(("POST", self.path, body))  # type: ignore[attr-defined]
+        if self.path.endswith("/exec") and self.path.startswith("/containers/"):
+            self._reply(201, {"Id": "exec-1"})
+        elif self.path == "/exec/exec-1/start":
+            frames = b""
+            for kind, chunk in ((1, b"hello\n"), (2, b"warn\n")):
+                frames += struct.pack(">BxxxL", kind, len(chunk)) + chunk
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+            self.end_headers()
+            self.wfile.write(frames)
+            self.close_connection = True
+        else:
+            self._reply(404, {"message": "not found"})
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, names: list[str]) -> None:
+        super().__init__(path, FakeDockerHandler)
+        self.names = names
+        self.requests: list[tuple[str, str, object]] = []
+
+
+ENV_SH = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "env.sh"
+
+
+def run_env_sh(snippet: str, *, env: dict[str, str]) -> subprocess.CompletedProcess[str]:
+    merged_env = os.environ.copy()
+    merged_env.update(env)
+    return subprocess.run(
+        ["bash", "-c", f"source {ENV_SH}; {snippet}"],
+        text=True,
+        capture_output=True,
+        env=merged_env,
+        check=False,
+    )
+
+
 class HarnessRegressionTests(unittest.TestCase):
     def test_eneo_new_fast_lane_prompt_avoids_redundant_question_for_bracket_one(self) -> None:
         command = (REPO_ROOT / "plugins" / "eneo-core" / "commands" / "eneo-new.md").read_text(encoding="utf-8")
@@ -100,9 +200,559 @@ class HarnessRegressionTests(unittest.TestCase):
         with mock.patch.dict(os.environ, {}, clear=False):
             self.assertEqual(eneo_env.detect_env(), "host-with-docker")
 
+    def test_env_cache_is_shared_across_processes_and_languages(self) -> None:
+        root = self.make_repo_root()
+        bin_dir = root / "fakebin"
+        log = write_fake_docker(bin_dir, ["eneo-41ae93-db-1", "eneo-41ae93-eneo-1"])
+        env = {
+            "CLAUDE_PROJECT_DIR": str(root),
+            "PATH": f"{bin_dir}:{os.environ['PATH']}",
+            "ENEO_SESSION_ID": "session-a",
+        }
+
+        cache = root / ".claude" / "state" / ".cache" / "env.json"
+        (root / ".claude" / "stats").mkdir()
+        result = run_env_sh("eneo_container_name", env=env)
+        self.assertEqual(result.stdout.strip(), "eneo-41ae93-eneo-1", result.stderr)
+        written = (cache.read_bytes(), cache.stat().st_mtime_ns)
+        for _ in range(2):
+            result = run_env_sh("eneo_container_name", env=env)
+            self.assertEqual(result.stdout.strip(), "eneo-41ae93-eneo-1", result.stderr)
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 1)
+        self.assertEqual(run_env_sh("eneo_env_cache_stats", env=env).stdout.strip(), "hits=2 misses=1")
+
+        with mock.patch.dict(os.environ, env), mock.patch.object(eneo_env, "_docker_probe_memo", None):
+            self.assertEqual(eneo_env.eneo_container_name(), "eneo-41ae93-eneo-1")
+            self.assertEqual(eneo_env.env_cache_stats(), {"hits": 3, "misses": 1})
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 1)
+        # Hits only read the entry.
+        self.assertEqual((cache.read_bytes(), cache.stat().st_mtime_ns), written)
+
+    def test_env_cache_invalidates_on_session_change_and_ttl(self) -> None:
+        root = self.make_repo_root()
+        bin_dir = root / "fakebin"
+        log = write_fake_docker(bin_dir, ["eneo-41ae93-eneo-1"])
+        env = {
+            "CLAUDE_PROJECT_DIR": str(root),
+            "PATH": f"{bin_dir}:{os.environ['PATH']}",
+            "ENEO_SESSION_ID": "session-a",
+        }
+
+        run_env_sh("eneo_container_name", env=env)
+        run_env_sh("eneo_container_name", env={**env, "ENEO_SESSION_ID": "session-b"})
+        run_env_sh("eneo_container_name", env={**env, "ENEO_SESSION_ID": "session-b", "ENEO_ENV_CACHE_TTL": "0"})
+
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 3)
+        cache = read_json(root / ".claude" / "state" / ".cache" / "env.json")
+        self.assertEqual(cache["session"], "session-b")
+        self.assertEqual(cache["misses"], 3)
+
+    def test_probe_fingerprint_matches_across_languages_and_tracks_container_id(self) -> None:
+        root = self.make_repo_root()
+        (root / "backend" / "uv.lock").write_text("version = 1\n", encoding="utf-8")
+        bin_dir = root / "fakebin"
+        write_fake_docker(bin_dir, ["eneo-41ae93-eneo-1\\tc0ffee123456"])
+        env = {
+            "CLAUDE_PROJECT_DIR": str(root),
+            "PATH": f"{bin_dir}:{os.environ['PATH']}",
+            "ENEO_DEVCONTAINER_MODE": "host-with-docker",
+        }
+
+        result = run_env_sh("eneo_container_id; eneo_probe_fingerprint", env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        container_id, bash_fingerprint = result.stdout.split()
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(eneo_env, "_docker_probe_memo", None), \
+                mock.patch.object(eneo_env, "_probe_fingerprint_memo", None):
+            self.assertEqual(eneo_env.eneo_container_id(), "c0ffee123456")
+            self.assertEqual(eneo_env.probe_fingerprint(), bash_fingerprint)
+        self.assertEqual(container_id, "c0ffee123456")
+
+        write_fake_docker(bin_dir, ["eneo-41ae93-eneo-1\\tdeadbeef0000"])
+        result = run_env_sh("eneo_probe_fingerprint", env={**env, "ENEO_ENV_CACHE_TTL": "0"})
+        self.assertNotEqual(result.stdout.strip(), bash_fingerprint)
+
+    def test_probe_cache_is_shared_and_reruns_when_lockfile_changes(self) -> None:
+        root = self.make_repo_root()
+        lock = root / "backend" / "uv.lock"
+        lock.write_text("version = 1\n", encoding="utf-8")
+        runs = root / "runs.log"
+        probe = [sys.executable, "-c", f"open({str(runs)!r}, 'a').write('x'); print('tool 1.0')"]
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native"}
+
+        def run_python_probe() -> eneo_env.ExecResult:
+            with mock.patch.dict(os.environ, env), \
+                    mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                    mock.patch.object(eneo_env, "_probe_fingerprint_memo", None):
+                return eneo_env.eneo_probe_many([("tool", "backend", probe)])[0]
+
+        self.assertEqual(run_python_probe().output, "tool 1.0\n")
+        cached = run_python_probe()
+        self.assertEqual((cached.returncode, cached.output, cached.duration), (0, "tool 1.0\n", 0.0))
+        result = run_env_sh(
+            'eneo_probe_many tool backend false ::: missing backend sh -c "exit 4"; '
+            'printf "%s|%s|%s\\n" "${ENEO_PROBE_CACHED[@]}" "${ENEO_EXEC_RC[@]}" "${ENEO_EXEC_OUT[@]}"',
+            env=env,
+        )
+        self.assertEqual(result.stdout.splitlines(), ["1|0|0", "4|tool 1.0|"], result.stderr)
+        self.assertFalse((root / ".claude" / "state" / ".cache" / "probes" / "missing").exists())
+        self.assertEqual(runs.read_text(encoding="utf-8"), "x")
+
+        lock.write_text("version = 2\n", encoding="utf-8")
+        run_python_probe()
+        self.assertEqual(runs.read_text(encoding="utf-8"), "xx")
+
+    def test_hook_budget_clips_timeouts_and_degrades_probes_when_spent(self) -> None:
+        hooks = read_json(REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "hooks.json")["hooks"]["Stop"][0]["hooks"]
+        timeouts = {hook["command"].rsplit("/", 1)[-1]: hook["timeout"] for hook in hooks}
+        typecheck = (REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "typecheck-stop.py").read_text(encoding="utf-8")
+        self.assertIn(f"HOOK_BUDGET = {timeouts['typecheck-stop.py']}", typecheck)
+        ratchet = (REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "stop-ratchet.sh").read_text(encoding="utf-8")
+        self.assertIn(f"eneo_budget_start {timeouts['stop-ratchet.sh']} ", ratchet)
+
+        root = self.make_repo_root()
+        probes = root / ".claude" / "state" / ".cache" / "probes"
+        probes.mkdir(parents=True)
+        (probes / "uv").write_text("old-fingerprint\nuv 0.4\n", encoding="utf-8")
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native"}
+        log = root / ".claude" / "stats" / "hook-budget.jsonl"
+
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                mock.patch.object(eneo_env, "_probe_fingerprint_memo", None), \
+                mock.patch("sys.stderr", new_callable=lambda: open(os.devnull, "w")):
+            self.assertEqual(eneo_env.budget_timeout(120), 120)
+            eneo_env.budget_start(30, "demo")  # 3s reserve: 27s left
+            self.assertTrue(eneo_env.budget_allows(10, "optional work"))
+            self.assertLessEqual(eneo_env.budget_timeout(120), 27.001)
+            self.assertEqual(eneo_env.budget_timeout(5), 5)
+            os.environ["ENEO_BUDGET_DEADLINE"] = f"{time.time() - 1:.3f}"
+            self.assertFalse(eneo_env.budget_allows(1, "skipped lint"))
+            served = eneo_env.eneo_probe_many(
+                [("uv", "backend", ["uv", "--version"]), ("pyright", "backend", ["pyright", "--version"])]
+            )
+        self.assertEqual([(r.returncode, r.output) for r in served][0], (0, "uv 0.4\n"))
+        self.assertEqual(served[1].returncode, 124)
+        actions = [json.loads(line)["action"] for line in log.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(actions[0], "clipped command timeout")
+        self.assertIn("skipped lint", actions)
+        self.assertIn("served stale probe uv", actions)
+
+        result = run_env_sh(
+            'eneo_budget_start 1 demo; rc=0; eneo_exec backend sleep 5 || rc=$?; echo "rc=$rc"; '
+            'eneo_budget_allows 1 "skipped extra" || echo refused',
+            env={**env, "ENEO_BUDGET_DEADLINE": ""},
+        )
+        self.assertEqual(result.stdout.split(), ["rc=124", "refused"], result.stderr)
+        self.assertIn("[eneo-budget] demo: skipped sleep (spent)", result.stderr)
+        self.assertEqual(json.loads(log.read_text(encoding="utf-8").splitlines()[-1])["action"], "skipped extra")
+
+    def test_repo_root_cache_skips_git_until_git_dir_changes(self) -> None:
+        root = self.make_repo_root()
+        (root / ".git").mkdir()
+        bin_dir = root / "fakebin"
+        bin_dir.mkdir()
+        log = bin_dir / "git.log"
+        fake_git = bin_dir / "git"
+        fake_git.write_text(f"#!/usr/bin/env bash\necho \"$*\" >> {log}\necho {root}\n", encoding="utf-8")
+        fake_git.chmod(0o755)
+        env = {
+            "CLAUDE_PROJECT_DIR": str(root / "backend"),
+            "PATH": f"{bin_dir}:{os.environ['PATH']}",
+            "TMPDIR": tempfile.mkdtemp(prefix="eneo-tmp-"),
+        }
+
+        result = run_env_sh("eneo_repo_root; echo \"$(eneo_repo_root)\"; eneo_phase", env=env)
+        self.assertEqual(result.stdout.splitlines(), [str(root), str(root), "FREE"], result.stderr)
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 1)
+
+        with mock.patch.dict(os.environ, env), mock.patch("env.subprocess.run") as mock_run:
+            self.assertEqual(eneo_env.find_repo_root(), str(root))
+            self.assertEqual(eneo_env.find_repo_root(), str(root))
+        mock_run.assert_not_called()
+
+        later = time.time() + 5
+        os.utime(root / ".git", (later, later))
+        run_env_sh("eneo_repo_root", env=env)
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 2)
+
+    def test_repo_root_cache_ignores_untrusted_dirs_and_memoizes_in_the_calling_shell(self) -> None:
+        root = self.make_repo_root()
+        (root / ".git").mkdir()
+        bin_dir = root / "fakebin"
+        bin_dir.mkdir()
+        log = bin_dir / "git.log"
+        fake_git = bin_dir / "git"
+        fake_git.write_text(f"#!/usr/bin/env bash\necho \"$*\" >> {log}\necho {root}\n", encoding="utf-8")
+        fake_git.chmod(0o755)
+        tmp = Path(tempfile.mkdtemp(prefix="eneo-tmp-"))
+        env = {"CLAUDE_PROJECT_DIR": str(root / "backend"), "PATH": f"{bin_dir}:{os.environ['PATH']}", "TMPDIR": str(tmp)}
+
+        # Helpers called in one shell share the memo: one resolution in all.
+        result = run_env_sh("eneo_env_cache_file; eneo_phase; eneo_repo_root", env={**env, "ENEO_ROOT_CACHE": "0"})
+        self.assertEqual(result.stdout.splitlines()[-1], str(root), result.stderr)
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 1)
+
+        # A world-writable cache dir, or an entry someone else owns, is ignored.
+        planted = root.parent / f"{root.name}-planted"
+        (planted / "backend" / "src" / "intric").mkdir(parents=True)
+        cache_dir = tmp / f"eneo-root-cache.{os.getuid()}"
+        cache_dir.mkdir(mode=0o777)
+        cache_dir.chmod(0o777)
+        entry = cache_dir / str(root / "backend").replace("/", "%")
+        entry.write_text(f"{planted}\n", encoding="utf-8")
+        with mock.patch.dict(os.environ, env), mock.patch.object(eneo_env, "_repo_root_memo", {}):
+            self.assertEqual(eneo_env.find_repo_root(), str(root))
+        self.assertEqual(entry.read_text(encoding="utf-8"), f"{root}\n")
+        self.assertEqual(cache_dir.stat().st_mode & 0o777, 0o700)
+        if os.getuid() == 0:
+            entry.write_text(f"{planted}\n", encoding="utf-8")
+            os.chown(entry, 4242, -1)
+            result = run_env_sh("eneo_repo_root", env=env)
+            self.assertEqual(result.stdout.strip(), str(root), result.stderr)
+            with mock.patch.dict(os.environ, env), mock.patch.object(eneo_env, "_repo_root_memo", {}):
+                self.assertEqual(eneo_env.find_repo_root(), str(root))
+
+    def test_context_envelope_round_trips_between_languages(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / "phase").write_text("RED\n", encoding="utf-8")
+        write_json(root / ".claude" / "state" / "current-task.json", {"slug": "demo"})
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native"}
+
+        bash_ctx = run_env_sh("eneo_ctx", env=env).stdout.strip()
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(eneo_env.env_context(), bash_ctx)
+        with mock.patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(root), "ENEO_CTX": bash_ctx}), \
+                mock.patch("env.subprocess.run") as mock_run:
+            self.assertEqual(eneo_env.find_repo_root(), str(root))
+            self.assertEqual((eneo_env.phase(), eneo_env.current_slug()), ("RED", "demo"))
+        mock_run.assert_not_called()
+
+    def test_context_envelope_is_trusted_only_when_checksum_and_key_match(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / "phase").write_text("RED\n", encoding="utf-8")
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native"}
+        with mock.patch.dict(os.environ, env):
+            ctx = eneo_env.env_context()
+        assert ctx is not None
+        green = ctx.replace('"phase":"RED"', '"phase":"GREEN"')
+        body = green.rsplit(',"sum"', 1)[0] + "}"
+        resigned = f'{body[:-1]},"sum":"{eneo_env._fnv1a(body)}"}}'
+
+        def phase_with(envelope: str, project_dir: Path = root) -> str:
+            return run_env_sh("eneo_phase", env={"CLAUDE_PROJECT_DIR": str(project_dir), "ENEO_CTX": envelope}).stdout.strip()
+
+        self.assertEqual(phase_with(resigned), "GREEN")
+        self.assertEqual(phase_with(green), "RED")  # checksum mismatch
+        other = self.make_repo_root()
+        self.assertEqual(phase_with(resigned, other), "FREE")  # made for another project dir
+        result = run_env_sh(
+            "eneo_phase; eneo_ctx_invalidate; eneo_phase",
+            env={"CLAUDE_PROJECT_DIR": str(root), "ENEO_CTX": resigned},
+        )
+        self.assertEqual(result.stdout.split(), ["GREEN", "RED"])
+
+    def test_context_envelope_goes_stale_after_any_state_write(self) -> None:
+        root = self.make_repo_root()
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native"}
+        run_env_sh(f"source {state_sh}; eneo_task_init demo fast 1 none none; eneo_phase_set RED", env=env)
+        ctx = run_env_sh("eneo_ctx", env=env).stdout.strip()
+        self.assertIn('"phase":"RED"', ctx)
+        inherited = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_CTX": ctx}
+        self.assertEqual(run_env_sh("echo $ENEO_CTX_VALID", env=inherited).stdout.strip(), "1")
+
+        # A writer in another process (here Python) leaves the envelope stale.
+        eneo_state.phase_set("GREEN", str(root))
+        self.assertEqual(run_env_sh("echo $ENEO_CTX_VALID; eneo_phase", env=inherited).stdout.split(), ["0", "GREEN"])
+        with mock.patch.dict(os.environ, inherited), mock.patch.object(eneo_env, "_ctx_memo", None):
+            self.assertEqual(eneo_env.phase(), "GREEN")
+
+        ctx = run_env_sh("eneo_ctx", env=env).stdout.strip()
+        run_env_sh(f"source {state_sh}; eneo_task_patch set phase_name Build", env=env)
+        result = run_env_sh("echo $ENEO_CTX_VALID", env={**inherited, "ENEO_CTX": ctx})
+        self.assertEqual(result.stdout.strip(), "0")
+
+        # The Stop hook hands eneo-validate a fresh envelope.
+        stop_ratchet = (REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "stop-ratchet.sh").read_text(encoding="utf-8")
+        self.assertLess(stop_ratchet.index("eneo_ctx_export"), stop_ratchet.index('python3 "$VALIDATE"'))
+
+    def start_fake_docker(self, names: list[str]) -> tuple[FakeDockerServer, str]:
+        sock_dir = Path(tempfile.mkdtemp(prefix="eneo-docker-"))
+        sock_path = str(sock_dir / "docker.sock")
+        server = FakeDockerServer(sock_path, names)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, sock_path
+
+    def test_docker_api_lists_containers_and_runs_exec_over_socket(self) -> None:
+        server, sock_path = self.start_fake_docker(["eneo-41ae93-db-1", "eneo-41ae93-eneo-1"])
+        env = {"DOCKER_HOST": f"unix://{sock_path}", "ENEO_DOCKER_API": "1"}
+
+        with mock.patch.dict(os.environ, env):
+            self.assertTrue(docker_api.available())
+            self.assertEqual(docker_api.list_container_names(), ["eneo-41ae93-db-1", "eneo-41ae93-eneo-1"])
+            self.assertEqual(docker_api.list_containers()[1], ("eneo-41ae93-eneo-1", "000000000000"))
+            returncode, stdout, stderr = docker_api.exec_run(
+                "eneo-41ae93-eneo-1", ["uv", "--version"], workdir="/workspace/backend"
+            )
+
+        self.assertEqual((returncode, stdout, stderr), (3, "hello\n", "warn\n"))
+        create = next(body for method, path, body in server.requests if path.endswith("/exec"))
+        self.assertEqual(create["Cmd"], ["uv", "--version"])
+        self.assertEqual(create["WorkingDir"], "/workspace/backend")
+
+    @mock.patch("env.subprocess.run")
+    def test_eneo_exec_uses_docker_socket_without_forking_cli(self, mock_run: mock.Mock) -> None:
+        server, sock_path = self.start_fake_docker(["eneo-41ae93-eneo-1"])
+        env = {
+            "DOCKER_HOST": f"unix://{sock_path}",
+            "ENEO_DOCKER_API": "1",
+            "ENEO_DEVCONTAINER_MODE": "host-with-docker",
+            "ENEO_ENV_CACHE": "0",
+        }
+
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(eneo_env, "_docker_probe_memo", None), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=None):
+            result = eneo_env.eneo_exec("backend", ["uv", "--version"], capture=True)
+
+        mock_run.assert_not_called()
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, "hello\n")
+        create = next(body for method, path, body in server.requests if path.endswith("/exec"))
+        self.assertEqual(create["Cmd"][-2:], ["uv", "--version"])
+
+    @mock.patch("env.subprocess.run")
+    def test_container_listing_falls_back_to_cli_without_socket(self, mock_run: mock.Mock) -> None:
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "eneo-41ae93-eneo-1\n", "")
+        missing = Path(tempfile.mkdtemp(prefix="eneo-docker-")) / "missing.sock"
+        with mock.patch.dict(os.environ, {"DOCKER_HOST": f"unix://{missing}", "ENEO_DOCKER_API": "1"}):
+            self.assertFalse(docker_api.available())
+            self.assertEqual(eneo_env._running_container_names(), ["eneo-41ae93-eneo-1"])
+        self.assertEqual(mock_run.call_args.args[0][:2], ["docker", "ps"])
+
+    def start_exec_agent(self, sock_path: Path) -> None:
+        sock_path.parent.mkdir(parents=True, exist_ok=True)
+        thread = threading.Thread(target=exec_agent.serve, args=(str(sock_path), 5), daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not sock_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_exec_agent_streams_output_and_enforces_timeout(self) -> None:
+        sock_path = Path(tempfile.mkdtemp(prefix="eneo-agent-")) / "agent.sock"
+        self.start_exec_agent(sock_path)
+
+        chunks: list[tuple[str, str]] = []
+        returncode, stdout, stderr, timed_out = exec_agent.request(
+            str(sock_path),
+            [sys.executable, "-c", "import os, sys; print(os.getcwd()); print(os.environ['DEMO'], file=sys.stderr); sys.exit(4)"],
+            cwd="/",
+            env={"DEMO": "from-request"},
+            on_output=lambda name, text: chunks.append((name, text)),
+        )
+        self.assertEqual((returncode, stdout, stderr, timed_out), (4, "/\n", "from-request\n", False))
+        self.assertEqual("".join(text for name, text in chunks if name == "stdout"), "/\n")
+
+        returncode, _, _, timed_out = exec_agent.request(
+            str(sock_path), [sys.executable, "-c", "import time; time.sleep(5)"], timeout=0.2
+        )
+        self.assertEqual((returncode, timed_out), (124, True))
+
+    def test_eneo_exec_dispatches_through_running_exec_agent(self) -> None:
+        root = self.make_repo_root()
+        self.start_exec_agent(exec_agent.socket_path(str(root)))
+        env = {"ENEO_EXEC_AGENT": "1", "ENEO_DEVCONTAINER_MODE": "host-with-docker"}
+
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(exec_agent, "CONTAINER_ROOT", str(root)), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                mock.patch.object(eneo_env, "eneo_container_name", return_value="eneo-41ae93-eneo-1"), \
+                mock.patch("env.subprocess.run") as mock_run:
+            result = eneo_env.eneo_exec(
+                "backend", [sys.executable, "-c", "import os; print(os.getcwd())"], capture=True
+            )
+
+        mock_run.assert_not_called()
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(Path(result.stdout.strip()), root / "backend")
+
+    def test_exec_agent_cli_reports_unavailable_agent_with_tempfail(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / ".cache").mkdir(parents=True)
+        (root / ".claude" / "state" / ".cache" / "exec-agent.disabled").touch()
+
+        result = run_python_script(
+            REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "exec_agent.py",
+            "run", "--root", str(root), "--container", "eneo-1", "--workdir", "backend", "--", "true",
+        )
+
+        self.assertEqual(result.returncode, exec_agent.EX_TEMPFAIL)
+
+    def test_exec_agent_unavailable_is_signalled_apart_from_a_command_exiting_75(self) -> None:
+        root = self.make_repo_root()
+        marker = root / "unavailable"
+        self.start_exec_agent(exec_agent.socket_path(str(root)))
+        with mock.patch.object(exec_agent, "CONTAINER_ROOT", str(root)):
+            code = exec_agent.main([
+                "run", "--root", str(root), "--container", "eneo-1", "--workdir", "backend",
+                "--unavailable-marker", str(marker), "--", sys.executable, "-c", "raise SystemExit(75)",
+            ])
+        self.assertEqual(code, exec_agent.EX_TEMPFAIL)
+        self.assertFalse(marker.exists())
+
+        (root / ".claude" / "state" / ".cache" / "exec-agent.disabled").touch()
+        exec_agent.socket_path(str(root)).unlink()
+        code = exec_agent.main([
+            "run", "--root", str(root), "--container", "eneo-1", "--unavailable-marker", str(marker), "--", "true",
+        ])
+        self.assertEqual(code, exec_agent.EX_TEMPFAIL)
+        self.assertTrue(marker.exists())
+
+        # Something that is not the agent answers on the socket.
+        garbage = Path(tempfile.mkdtemp(prefix="eneo-agent-")) / "garbage.sock"
+        server = socketserver.UnixStreamServer(str(garbage), lambda request, *_: request.sendall(request.recv(65536) and b"HTTP/1.1 400\n"))
+        threading.Thread(target=server.handle_request, daemon=True).start()
+        with self.assertRaises(exec_agent.AgentUnavailable):
+            exec_agent.request(str(garbage), ["true"])
+        server.server_close()
+
+    def test_eneo_exec_many_runs_native_jobs_and_reports_each_result(self) -> None:
+        root = self.make_repo_root()
+        jobs = [
+            ("backend", [sys.executable, "-c", "import os; print(os.path.basename(os.getcwd()))"]),
+            ("", [sys.executable, "-c", "import sys; print('boom', file=sys.stderr); sys.exit(3)"]),
+            ("backend", ["definitely-not-a-real-binary"]),
+        ]
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)):
+            results = eneo_env.eneo_exec_many(jobs)
+
+        self.assertEqual([r.returncode for r in results], [0, 3, 127])
+        self.assertEqual(results[0].output, "backend\n")
+        self.assertEqual(results[1].output, "boom\n")
+        self.assertTrue(all(r.duration >= 0 for r in results))
+
+    def test_eneo_exec_many_uses_single_container_entry(self) -> None:
+        root = self.make_repo_root()
+        calls: list[list[str]] = []
+
+        def fake_exec(workdir: str, cmd: list[str], **kwargs: object) -> subprocess.CompletedProcess[str]:
+            calls.append(cmd)
+            script = cmd[-1].replace("/workspace", str(root))
+            return subprocess.run(["bash", "-c", script], capture_output=True, text=True)
+
+        jobs = [("backend", ["pwd"]), ("", ["sh", "-c", "printf 'no newline'; exit 5"])]
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "host-with-docker"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                mock.patch.object(eneo_env, "eneo_container_name", return_value="eneo-41ae93-eneo-1"), \
+                mock.patch.object(eneo_env, "eneo_exec", side_effect=fake_exec):
+            results = eneo_env.eneo_exec_many(jobs)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.returncode for r in results], [0, 5])
+        self.assertEqual(results[0].output, f"{root / 'backend'}\n")
+        self.assertEqual(results[1].output, "no newline")
+
+    def test_env_sh_exec_many_fills_result_arrays(self) -> None:
+        root = self.make_repo_root()
+        scratch = root / "tmp"
+        scratch.mkdir()
+        result = run_env_sh(
+            'eneo_exec_many backend pwd ::: "" sh -c "echo err >&2; exit 3"; '
+            'printf "%s|%s\\n" "${ENEO_EXEC_RC[@]}" "${ENEO_EXEC_OUT[@]}"',
+            env={"CLAUDE_PROJECT_DIR": str(root), "ENEO_DEVCONTAINER_MODE": "native", "TMPDIR": str(scratch)},
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines(), ["0|3", f"{root / 'backend'}|err"])
+        self.assertEqual(list(scratch.glob("eneo-exec-many.*")), [])  # the per-call mktemp -d dir is removed
+
+    def test_eneo_exec_stream_keeps_head_and_tail_and_tees_full_log(self) -> None:
+        root = self.make_repo_root()
+        log = root / "full.log"
+        seen: list[str] = []
+        cmd = [sys.executable, "-c", "import sys\nfor i in range(1000): print(i, file=sys.stderr if i % 2 else sys.stdout)\nsys.exit(1)"]
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)):
+            result = eneo_env.eneo_exec_stream("backend", cmd, on_line=seen.append, head=3, tail=2, tee=log)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.total_lines, 1000)
+        self.assertEqual(len(seen), 1000)
+        self.assertEqual(result.head, ["0", "1", "2"])
+        self.assertEqual(result.tail, ["998", "999"])
+        self.assertEqual(result.omitted, 995)
+        self.assertIn("... 995 lines omitted ...", result.text())
+        self.assertEqual(len(log.read_text(encoding="utf-8").splitlines()), 1000)
+
+        # A command that cannot be spawned must not leak the tee handle.
+        opened: list = []
+        real_open = open
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                mock.patch("builtins.open", lambda *a, **k: opened.append(real_open(*a, **k)) or opened[-1]), \
+                self.assertRaises(FileNotFoundError):
+            eneo_env.eneo_exec_stream("backend", ["definitely-not-a-real-binary"], tee=log)
+        self.assertTrue(opened and all(handle.closed for handle in opened))
+
+    def test_eneo_exec_stream_kills_process_group_on_timeout(self) -> None:
+        root = self.make_repo_root()
+        cmd = ["bash", "-c", "echo started; sleep 10 & wait"]
+        started = time.monotonic()
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)), \
+                self.assertRaises(subprocess.TimeoutExpired) as ctx:
+            eneo_env.eneo_exec_stream("backend", cmd, timeout=0.5)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(ctx.exception.output, "started")
+
+    def test_exec_scheduler_caps_concurrency_per_tool(self) -> None:
+        root = self.make_repo_root()
+        running = root / "running"
+        running.mkdir()
+        job = (
+            "import os, sys, time\n"
+            "marker = os.path.join(sys.argv[1], str(os.getpid()))\n"
+            "open(marker, 'w').close()\n"
+            "print(len(os.listdir(sys.argv[1])))\n"
+            "time.sleep(0.2)\n"
+            "os.remove(marker)\n"
+        )
+        tool = os.path.basename(sys.executable)
+        scheduler = eneo_env.ExecScheduler({tool: 1})
+        jobs = [("backend", [sys.executable, "-c", job, str(running)]) for _ in range(3)]
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)):
+            results = asyncio.run(scheduler.run_all(jobs))
+
+        self.assertEqual([r.returncode for r in results], [0, 0, 0])
+        self.assertEqual([r.stdout.strip() for r in results], ["1", "1", "1"])
+        self.assertEqual(eneo_env._tool_name(["uv", "run", "pytest", "-q"]), "pytest")
+
+    def test_exec_scheduler_fail_fast_cancels_siblings(self) -> None:
+        root = self.make_repo_root()
+        jobs = [
+            ("backend", [sys.executable, "-c", "import time; time.sleep(10)"]),
+            ("backend", [sys.executable, "-c", "import sys; sys.exit(2)"]),
+        ]
+        started = time.monotonic()
+        with mock.patch.dict(os.environ, {"ENEO_DEVCONTAINER_MODE": "native"}), \
+                mock.patch.object(eneo_env, "find_repo_root", return_value=str(root)):
+            results = asyncio.run(eneo_env.ExecScheduler().run_all(jobs, fail_fast=True))
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1].returncode, 2)
+
     def test_required_hook_and_bin_files_are_executable(self) -> None:
         required = [
             REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "bash-firewall.sh",
+            REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "dispatch.py",
+            REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "dispatch.sh",
             REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "phase-gate.sh",
             REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "protect-files.sh",
             REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "session-start-bootstrap.sh",
@@ -118,9 +768,12 @@ class HarnessRegressionTests(unittest.TestCase):
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-ratchet-check",
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-task-init",
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-task-update",
+            REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-task-tx",
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-doctor-report",
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-commit-preflight",
             REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-commit-message-check",
+            REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-hook-trace",
+            REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-validate",
         ]
         for path in required:
             self.assertTrue(path.exists(), str(path))
@@ -315,6 +968,929 @@ All checks pass.
         self.assertEqual(result.returncode, 2)
         self.assertIn("eneo_phase_set", result.stderr)
 
+    def test_bash_firewall_matches_tokenized_write_targets_only(self) -> None:
+        targets = policies.shell_targets(
+            "FOO=1 sudo tee -a .env.local < in; cat <<'EOF' > backend/tests/test_a.py\nrm -rf tests\nEOF\n"
+            "sed -e s/a/b/ -i x.py 2>&1 | grep -v warn && rm -rf backend/tests"
+        )
+        self.assertEqual(targets.writes, ["./.env.local", "./backend/tests/test_a.py", "./x.py"])
+        self.assertEqual(targets.deletes, ["./backend/tests"])
+
+        class State:
+            def __init__(self, phase: str) -> None:
+                self._phase = phase
+
+            def phase(self) -> str:
+                return self._phase
+
+            def current_slug(self) -> str:
+                return "demo"
+
+        def blocked(command: str, phase: str = "FREE") -> str | None:
+            result = policies.evaluate({"tool_input": {"command": command}}, ("bash-firewall",), State(phase))
+            return result and result[1].splitlines()[0]
+
+        self.assertIn("protected file", blocked("bash -c 'echo 1 > uv.lock'"))
+        self.assertIn("phase", blocked("bash <<EOF\necho GREEN > .claude/state/phase\nEOF"))
+        self.assertIn("bulk deletion", blocked("rm -r backend/tests"))
+        self.assertIn("during GREEN", blocked("cp /tmp/t.py backend/tests/test_b.py", "GREEN"))
+        self.assertIn("during RED", blocked("sed -i s/a/b/ backend/src/intric/a.py", "RED"))
+        # Shell option clusters, substitutions, wrappers, keywords and `)>`.
+        for command in (
+            'bash -ec "echo x > uv.lock"', "bash -lc 'echo x > uv.lock'", "bash -o pipefail -c 'tee .env'",
+            "echo `tee .env </dev/null`", 'echo "$(tee .env </dev/null)"', "sudo -u root tee .env",
+            "timeout 5 tee .env", "env -S 'tee .env'", "for f in a; do tee .env; done",
+            "if true; then :; else tee uv.lock; fi", "(echo x)>uv.lock", "{ echo x; }>.env",
+        ):
+            self.assertIn("protected file", blocked(command), command)
+        self.assertIn("bulk deletion", blocked("git rm -rf backend/tests/"))
+        self.assertIn("bulk deletion", blocked("git -C . rm -r backend/tests"))
+        self.assertIsNone(blocked("git status --short && ls backend/tests/"))
+        # The old per-rule regexes matched these through quotes and across `;`.
+        self.assertIsNone(blocked("echo 'tee .env'"))
+        self.assertIsNone(blocked("echo done > /tmp/log; pytest backend/tests/", "GREEN"))
+        self.assertIsNone(blocked("tee backend/src/intric/tests/test_a.py", "RED"))
+
+    def test_decision_cache_serves_repeats_until_phase_set(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / "phase").write_text("GREEN\n", encoding="utf-8")
+        write_json(root / ".claude" / "state" / "current-task.json", {"slug": "demo", "tdd_phase": "GREEN"})
+        firewall = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "bash-firewall.sh"
+        blocked = {"tool_name": "Bash", "tool_input": {"command": "echo x > backend/tests/test_a.py"}}
+        allowed = {"tool_name": "Bash", "tool_input": {"command": "echo x > /tmp/out"}}
+        tmpdir = tempfile.mkdtemp(prefix="eneo-decisions-")
+        env = {"CLAUDE_PROJECT_DIR": str(root), "TMPDIR": tmpdir}
+        cache = root / ".claude" / "state" / ".cache" / "decisions.json"
+
+        # Only allows are stored.
+        self.assertEqual(run_shell_script(firewall, blocked, env=env).returncode, 2)
+        self.assertFalse(cache.exists())
+        self.assertEqual(run_shell_script(firewall, allowed, env=env).returncode, 0)
+        mac, body = cache.read_text(encoding="utf-8").split("\n", 1)
+        self.assertEqual(list(json.loads(body)["entries"].values()), [[0, ""]])
+
+        # A hit is served without evaluating: prove it with an allow stored
+        # through the API for the blocked command.
+        with mock.patch.dict(os.environ, env):
+            rules = policies.rules_version()
+            key = decision_cache.key("GREEN", ("bash-firewall",), blocked["tool_input"]["command"])
+            decision_cache.store(str(root), rules, key, (0, ""))
+        self.assertEqual(run_shell_script(firewall, blocked, env=env).returncode, 0)
+        bypass = run_shell_script(firewall, blocked, env={**env, "ENEO_DECISION_CACHE": "0"})
+        self.assertEqual(bypass.returncode, 2)
+
+        # Anything else that writes the file fails the MAC and is ignored,
+        # and the agent's own writes to it are blocked.
+        forged = json.loads(body)
+        forged["entries"][key] = [0, ""]
+        cache.write_text(f"{mac}\n{json.dumps(forged, separators=(',', ':'))}", encoding="utf-8")
+        self.assertEqual(run_shell_script(firewall, blocked, env=env).returncode, 2)
+        forge = {"tool_name": "Bash", "tool_input": {"command": "echo '{}' > .claude/state/.cache/decisions.json"}}
+        self.assertEqual(run_shell_script(firewall, forge, env={**env, "ENEO_DECISION_CACHE": "0"}).returncode, 2)
+        self.assertIsNotNone(policies.evaluate({"tool_name": "Write", "tool_input": {"file_path": str(cache)}}))
+
+        # Ambiguous payloads are evaluated every time.
+        ctx = policies.PolicyContext({"tool_input": {"command": "ls", "file_path": "README.md"}})
+        self.assertIsNone(policies._cache_subject(ctx, ("bash-firewall",)))
+        ctx = policies.PolicyContext({"tool_input": {"file_path": "backend/src/../tests/test_a.py"}})
+        self.assertIsNone(policies._cache_subject(ctx, ("phase-gate", "protect-files")))
+
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        run_env_sh(f"source {state_sh}; eneo_phase_set RED", env=env)
+        self.assertFalse(cache.exists())
+
+        with mock.patch.dict(os.environ, {"ENEO_DECISION_CACHE_SIZE": "2", "TMPDIR": tmpdir}):
+            for key in ("a", "b", "c"):
+                decision_cache.store(str(root), "r1", key, (0, ""))
+            decision_cache.store(str(root), "r1", "d", (2, "blocked\n"))
+            self.assertIsNone(decision_cache.lookup(str(root), "r1", "a"))
+            self.assertIsNone(decision_cache.lookup(str(root), "r1", "d"))
+            self.assertEqual(decision_cache.lookup(str(root), "r1", "c"), (0, ""))
+            self.assertIsNone(decision_cache.lookup(str(root), "r2", "c"))
+
+    def test_path_policy_classes_are_shared_and_extended_per_repo(self) -> None:
+        root = self.make_repo_root()
+        self.assertEqual(
+            path_policy.classify(f"{root}/backend/src/intric/tests/test_a.py", str(root)), {"src", "test"}
+        )
+        self.assertEqual(path_policy.classify(f"{root}/README.md", str(root)), frozenset())
+
+        write_json(
+            root / ".claude" / "config" / "path-policy.json",
+            {"classes": {"secret": ["*/deploy/credentials.yml"], "vendored": ["*/vendor/*"]}},
+        )
+        self.assertEqual(path_policy.classify(f"{root}/deploy/credentials.yml", str(root)), {"secret"})
+        self.assertEqual(path_policy.classify(f"{root}/vendor/x.py", str(root)), {"vendored"})
+        self.assertIn("secret", path_policy.classify(f"{root}/.env", str(root)))
+
+        dispatch = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "dispatch.py"
+        env = {**os.environ, "CLAUDE_PROJECT_DIR": str(root), "ENEO_DECISION_CACHE": "0"}
+
+        def run(tool_input: dict) -> subprocess.CompletedProcess[str]:
+            return subprocess.run(
+                [sys.executable, str(dispatch)], input=json.dumps({"tool_input": tool_input}),
+                text=True, capture_output=True, env=env, cwd=root, check=False,
+            )
+
+        edit = run({"file_path": f"{root}/deploy/credentials.yml"})
+        self.assertEqual(edit.returncode, 2)
+        self.assertIn(".env files contain secrets", edit.stderr)
+        bash = run({"command": "echo token > deploy/credentials.yml"})
+        self.assertEqual(bash.returncode, 2)
+        self.assertIn("protected file", bash.stderr)
+
+    def test_python_state_twin_matches_state_sh_and_shares_its_lock(self) -> None:
+        root = self.make_repo_root()
+        task = root / ".claude" / "state" / "current-task.json"
+        expr = '.wave_status = ((.wave_status // {}) | .[($__wave|tostring)] = "done") | .active_agents = $__agents'
+        args = ["__wave", "2", "json:__agents", '["architect"]']
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0"}
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+
+        run_env_sh(f"source {state_sh}; eneo_task_init demo fast 1 none none", env=env)
+        run_env_sh(f"source {state_sh}; eneo_task_update '{expr}' {' '.join(repr(arg) for arg in args)}", env=env)
+        via_bash = read_json(task)
+
+        eneo_state.init("demo", "fast", 1, "none", "none", root=str(root))
+        # Without flock on PATH this is the mkdir lock; an owner file without a
+        # host (written before PIDs were checked) is reclaimed once stale.
+        lock = root / ".claude" / "state" / ".locks" / "state.lock"
+        lock.mkdir(parents=True)
+        (lock / "owner").write_text("99999\n", encoding="utf-8")
+        os.utime(lock / "owner", (time.time() - 60, time.time() - 60))
+        update = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-task-update"), expr, *args],
+            text=True, capture_output=True, env={**env, "PATH": "/nonexistent"}, check=False,
+        )
+        self.assertEqual(update.returncode, 0, update.stderr)
+        self.assertFalse(lock.exists())
+        via_python = read_json(task)
+        for data in (via_bash, via_python):
+            data.pop("started_at"), data.pop("last_update")
+        self.assertEqual(via_python, via_bash)
+
+        eneo_state.update(".next_hint = $h", {"h": "/eneo-verify"}, root=str(root))
+        self.assertEqual(eneo_state.next_hint_consume(root=str(root)), "/eneo-verify")
+        self.assertIsNone(eneo_state.get(".next_hint", root=str(root)))
+        eneo_state.phase_set("GREEN", root=str(root))
+        self.assertEqual((root / ".claude" / "state" / "phase").read_text(encoding="utf-8"), "GREEN\n")
+        self.assertEqual(eneo_state.get(".tdd_phase", root=str(root)), "GREEN")
+        with self.assertRaises(ValueError):
+            eneo_state.phase_set("BLUE", root=str(root))
+
+    @unittest.skipUnless(shutil.which("jq"), "jq is not installed")
+    def test_python_jq_subset_agrees_with_jq(self) -> None:
+        data = {"a": 1, "b": None, "c": {"d": [1, "x", {"e": False}]}, "f": "s", "g": {}}
+        variables = {"k": "c", "v": {"n": [1, 2]}, "s": "it's"}
+        exprs = [
+            '.a = .b // "x"', '.b // .a = 5', '.b // .missing // "z"', '(.a = .b) // "x"', '.a = (.b // "x")',
+            ".c.d[2].e // .f", ".[$k].d[0]", '.g[$s] = $v | .g | tostring', ".c | tostring", ".f | tostring",
+            '.c.d[1] = "y" | .c', ".x.y = 1", '.a = $v | .a.n[1]', ".c.d[-1]", ".nope[3]", "$v | tostring",
+            '.g = {"a": [1, {"b": null}]} | .g | tostring', "(.b // .a) | tostring",
+        ]
+        for expr in exprs:
+            eneo_state._Parser(expr).parse()  # evaluated natively, not handed to jq
+            argv = ["jq", "-c"]
+            for name, value in variables.items():
+                argv += ["--argjson", name, json.dumps(value)]
+            jq = subprocess.run([*argv, expr], input=json.dumps(data), text=True, capture_output=True, check=True)
+            self.assertEqual(eneo_state.evaluate(expr, data, variables), json.loads(jq.stdout), expr)
+
+        # state.py get prints what `jq -r` prints.
+        for value in ({"a": [1, {"b": "é"}], "c": {}}, "text", 3, [True, None]):
+            jq = subprocess.run(["jq", "-r", "."], input=json.dumps(value), text=True, capture_output=True, check=True)
+            self.assertEqual(eneo_state._raw(value) + "\n", jq.stdout)
+
+    def test_state_lock_is_released_by_a_dead_holder_and_records_waits(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "stats").mkdir()
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0", "ENEO_LOCK_TIMEOUT": "1"}
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        hold = f"source {ENV_SH}; source {state_sh}; eneo_acquire_lock state && echo held && exec sleep 30"
+
+        for backend in ("flock", "mkdir"):
+            with mock.patch.dict(os.environ, {**env, "ENEO_STATE_LOCK": backend}):
+                holder = subprocess.Popen(
+                    ["bash", "-c", hold], stdout=subprocess.PIPE, text=True, env={**os.environ}, start_new_session=True
+                )
+                self.assertEqual(holder.stdout.readline(), "held\n")
+                # The caller's SIGALRM handler and interval timer survive a wait.
+                def ours(signum, frame) -> None:
+                    pass
+
+                handler = signal.signal(signal.SIGALRM, ours)
+                signal.setitimer(signal.ITIMER_REAL, 100)
+                try:
+                    with self.assertRaises(eneo_state.StateError):
+                        eneo_state.acquire_lock("state", str(root))
+                    self.assertGreater(signal.getitimer(signal.ITIMER_REAL)[0], 90)
+                    self.assertIs(signal.getsignal(signal.SIGALRM), ours)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                    signal.signal(signal.SIGALRM, handler)
+                # The holder execs sleep, so wait() returns only once the
+                # process holding the flock fd (and owning the mkdir lock) is gone.
+                os.killpg(holder.pid, 9)
+                holder.wait()
+                started = time.monotonic()
+                eneo_state.release_lock(eneo_state.acquire_lock("state", str(root)))
+                self.assertLess(time.monotonic() - started, 0.5, backend)
+                holder.stdout.close()
+
+        waits = [json.loads(line) for line in (root / ".claude" / "stats" / "lock-wait.jsonl").read_text().splitlines()]
+        self.assertEqual(
+            [(wait["backend"], wait["outcome"]) for wait in waits],
+            [("flock", "timeout"), ("mkdir", "timeout"), ("mkdir", "reclaimed")],
+        )
+        self.assertGreaterEqual(waits[0]["wait_ms"], 900)
+
+    def test_task_patches_are_journaled_folded_by_readers_and_compacted(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "stats").mkdir()
+        state_dir = root / ".claude" / "state"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0"}
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+
+        eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+        eneo_state.update(".active_agents = $a", {"a": ["Explore", "Plan", "Explore"]}, root=str(root))
+        patched = run_env_sh(
+            f"source {state_sh}; eneo_task_patch put wave_status 1 done && eneo_task_patch remove active_agents Explore",
+            env=env,
+        )
+        self.assertEqual(patched.returncode, 0, patched.stderr)
+        eneo_state.patch("set", "note", 'say "hi"', root=str(root))
+        with self.assertRaises(ValueError):
+            eneo_state.patch("set", "slug", "other", root=str(root))
+
+        snapshot = read_json(state_dir / "current-task.json")
+        self.assertEqual((snapshot["wave_status"], snapshot["active_agents"]), ({}, ["Explore", "Plan", "Explore"]))
+        folded = run_env_sh(f"source {state_sh}; eneo_task_get '[.wave_status, .active_agents, .note] | tostring'", env=env)
+        self.assertEqual(json.loads(folded.stdout), [{"1": "done"}, ["Plan", "Explore"], 'say "hi"'])
+        task = eneo_state.load(str(root))
+        self.assertEqual([task["wave_status"], task["active_agents"], task["note"]], json.loads(folded.stdout))
+
+        # A reader that read the journal just before a compaction must not
+        # apply the remove a second time to the compacted snapshot.
+        journal = [json.loads(line) for line in (state_dir / "current-task.journal").read_text().splitlines()]
+        eneo_state.compact(root=str(root))
+        self.assertFalse((state_dir / "current-task.journal").exists())
+        compacted = read_json(state_dir / "current-task.json")
+        self.assertEqual(eneo_state.fold(compacted, journal), compacted)
+        self.assertEqual(compacted["active_agents"], ["Plan", "Explore"])
+
+        run_env_sh(
+            f"source {state_sh}; eneo_task_patch set status blocked; eneo_task_patch set status in_progress",
+            env={**env, "ENEO_STATE_JOURNAL_MAX": "3"},
+        )
+        self.assertFalse((state_dir / "current-task.journal").exists())
+        self.assertEqual(read_json(state_dir / "current-task.json")["status"], "in_progress")
+        history = (root / ".claude" / "stats" / "task-journal.jsonl").read_text().splitlines()
+        self.assertEqual([json.loads(line)["op"] for line in history], ["put", "remove", "set", "set", "set"])
+
+    def test_eneo_task_jq_reads_a_journal_compacted_under_it(self) -> None:
+        root = self.make_repo_root()
+        state_dir = root / ".claude" / "state"
+        bin_dir = root / "bin"
+        bin_dir.mkdir()
+        state_py = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.py"
+        # Compact between eneo_task_jq's journal check and jq's read.
+        (bin_dir / "jq").write_text(
+            f'#!/usr/bin/env bash\n{sys.executable} {state_py} compact\nexec {shutil.which("jq")} "$@"\n', encoding="utf-8"
+        )
+        (bin_dir / "jq").chmod(0o755)
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0", "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+
+        eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+        eneo_state.patch("set", "status", "blocked", root=str(root))
+        self.assertTrue((state_dir / "current-task.journal").exists())
+        result = run_env_sh(f"source {state_sh}; eneo_task_jq -r .status", env=env)
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (0, "blocked\n", ""))
+        self.assertFalse((state_dir / "current-task.journal").exists())
+
+    def test_torn_journal_line_is_skipped_by_both_languages(self) -> None:
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        for writer in ("bash", "python"):
+            root = self.make_repo_root()
+            journal = root / ".claude" / "state" / "current-task.journal"
+            env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0"}
+            eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+            eneo_state.update('.status = "verified"', root=str(root))
+            eneo_state.patch("set", "wave", 2, root=str(root))
+            # A writer killed mid-append.
+            with journal.open("a", encoding="utf-8") as handle:
+                handle.write('{"ts":"2026-01-01T00:00:00Z","op":"set","fie')
+
+            if writer == "bash":
+                patched = run_env_sh(f"source {state_sh}; eneo_task_patch set wave_total json:3", env=env)
+            else:
+                patched = subprocess.run(
+                    [sys.executable, str(state_sh.with_suffix(".py")), "patch", "set", "wave_total", "json:3"],
+                    text=True, capture_output=True, env={**os.environ, **env}, check=False,
+                )
+            self.assertEqual(patched.returncode, 0, patched.stderr)
+            self.assertEqual(journal.read_text(encoding="utf-8").count("\n"), 4)
+
+            read = run_env_sh(
+                f"source {state_sh}; eneo_task_get .status && eneo_task_get .wave && eneo_task_get .wave_total", env=env
+            )
+            self.assertEqual(read.stdout, "verified\n2\n3\n", read.stderr)
+            task = eneo_state.load(str(root))
+            self.assertEqual((task["status"], task["wave"], task["wave_total"]), ("verified", 2, 3))
+            updated = run_env_sh(f"source {state_sh}; eneo_task_update '.note = \"ok\"'", env=env)
+            self.assertEqual(updated.returncode, 0, updated.stderr)
+            self.assertFalse(journal.exists())
+            self.assertEqual(read_json(root / ".claude" / "state" / "current-task.json")["wave_total"], 3)
+
+    def test_reader_view_is_regenerated_on_every_write_and_read_without_jq(self) -> None:
+        root = self.make_repo_root()
+        state_dir = root / ".claude" / "state"
+        bin_dir = root / "bin"
+        bin_dir.mkdir()
+        calls = root / "jq-calls"
+        jq = bin_dir / "jq"
+        jq.write_text(f'#!/usr/bin/env bash\necho jq >> {calls}\nexec {shutil.which("jq")} "$@"\n', encoding="utf-8")
+        jq.chmod(0o755)
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0", "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        hooks = REPO_ROOT / "plugins" / "eneo-standards" / "hooks"
+
+        eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+        eneo_state.update(
+            ".wave = 1 | .wave_total = 3 | .next_hint = $h | .tdd_phase = \"RED\"", {"h": "it's /eneo-verify"}, root=str(root)
+        )
+        patched = run_env_sh(f"source {state_sh}; eneo_task_patch put wave_status 3 in_progress", env=env)
+        self.assertEqual(patched.returncode, 0, patched.stderr)
+        view = (state_dir / "current-task.view").read_text(encoding="utf-8")
+        self.assertEqual(view, eneo_state.render_view(eneo_state.load(str(root))))
+        self.assertIn("TASK_WAVE_BAR='░░▒'\n", view)
+
+        calls.unlink()
+        context = run_shell_script(hooks / "session-start-context.sh", {}, env=env)
+        self.assertEqual(context.returncode, 0, context.stderr)
+        self.assertEqual(context.stdout, "Resume: demo · Wave 1/3 · RED · Next: it's /eneo-verify\n")
+        self.assertFalse(calls.exists())
+
+        # A writer that bypasses the helpers leaves the view stale; readers
+        # then fall back to one jq call over the JSON.
+        time.sleep(0.01)
+        task = read_json(state_dir / "current-task.json")
+        write_json(state_dir / "current-task.json", {**task, "next_hint": None, "tdd_phase": "FREE"})
+        context = run_shell_script(hooks / "session-start-context.sh", {}, env=env)
+        self.assertEqual(context.stdout, "Resume: demo · Wave 1/3\n")
+        self.assertEqual(len(calls.read_text(encoding="utf-8").splitlines()), 1)
+
+        eneo_state.clear(root=str(root))
+        self.assertFalse((state_dir / "current-task.view").exists())
+
+    def test_reader_view_is_parsed_never_sourced(self) -> None:
+        root = self.make_repo_root()
+        state_dir = root / ".claude" / "state"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0"}
+        hooks = REPO_ROOT / "plugins" / "eneo-standards" / "hooks"
+        eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+        eneo_state.update(".next_hint = $h", {"h": "it's\nnext"}, root=str(root))
+        view = state_dir / "current-task.view"
+        self.assertIn("TASK_NEXT_HINT='it'\\''s\nnext'\n", view.read_text(encoding="utf-8"))
+
+        # Anything but TASK_<field>='...' records, even in a fresh view, is
+        # not run: the reader renders the JSON instead.
+        pwned = root / "pwned"
+        for forged in (
+            f"TASK_SLUG='x'; touch {pwned}\n",
+            f"TASK_SLUG=\"$(touch {pwned})\"\n",
+            f"TASK_PATH='{root}'\n",
+            f"TASK_SLUG='x'\ntouch {pwned}\n",
+        ):
+            view.write_text(forged, encoding="utf-8")
+            result = run_env_sh(
+                'eneo_task_view && printf "%s|%s|%s" "$TASK_SLUG" "$TASK_NEXT_HINT" "${TASK_PATH-unset}"', env=env
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout, "demo|it's\nnext|unset")
+            self.assertFalse(pwned.exists(), forged)
+
+    def test_statusline_task_line_renders_with_and_without_env_sh(self) -> None:
+        root = self.make_repo_root()
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0", "TMPDIR": str(root)}
+        statusline = REPO_ROOT / "plugins" / "eneo-standards" / "statusline" / "eneo-statusline.sh"
+        eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+        eneo_state.update(
+            '.wave = 2 | .wave_total = 3 | .wave_status = {"1": "done", "2": "in_progress"} | .next_hint = ""'
+            ' | .tdd_phase = "RED" | .active_agents = ["a", "b"]',
+            root=str(root),
+        )
+        detached = root / "statusline" / "eneo-statusline.sh"
+        detached.parent.mkdir()
+        shutil.copy(statusline, detached)
+
+        lines = []
+        for script in (statusline, detached):
+            result = run_shell_script(script, {"workspace": {"current_dir": str(root)}}, env=env)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            lines.append(re.sub(r"\x1b\[[0-9;]*m", "", result.stdout.splitlines()[1]))
+        self.assertEqual(lines[0], "demo · w2/3 [▓▒░] · RED · ↻ a, b")
+        self.assertEqual(lines[1], lines[0])
+
+    def test_prompt_activity_is_a_debounced_heartbeat_that_skips_the_state_lock(self) -> None:
+        root = self.make_repo_root()
+        state_dir = root / ".claude" / "state"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0"}
+        audit = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "user-prompt-audit.sh"
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+
+        run_shell_script(audit, {"prompt": "hello"}, env=env)
+        self.assertFalse((state_dir / "heartbeat").exists())  # no task, no heartbeat
+
+        eneo_state.init("demo", "fast", 1, "none", "none", root=str(root))
+        eneo_state.update(".last_update = \"2020-01-01T00:00:00Z\"", root=str(root))
+        task_before = (state_dir / "current-task.json").read_text(encoding="utf-8")
+        view_before = (state_dir / "current-task.view").read_text(encoding="utf-8")
+        lock = eneo_state.acquire_lock("state", str(root))  # a wave barrier mid-write
+        try:
+            started = time.monotonic()
+            result = run_shell_script(audit, {"prompt": "hello"}, env={**env, "ENEO_LOCK_TIMEOUT": "2"})
+            self.assertLess(time.monotonic() - started, 1.5)
+        finally:
+            eneo_state.release_lock(lock)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual((state_dir / "current-task.json").read_text(encoding="utf-8"), task_before)
+        self.assertEqual((state_dir / "current-task.view").read_text(encoding="utf-8"), view_before)
+
+        epoch, stamp = (state_dir / "heartbeat").read_text(encoding="utf-8").split()
+        self.assertGreater(stamp, "2020-01-01T00:00:00Z")
+        self.assertEqual(eneo_state.last_update(str(root)), stamp)
+        view = run_env_sh("eneo_task_view && echo \"$TASK_LAST_UPDATE\"", env=env)
+        self.assertEqual(view.stdout, f"{stamp}\n")
+
+        # Within the window a prompt writes nothing; outside it, it does.
+        (state_dir / "heartbeat").write_text(f"{epoch} {stamp}\n", encoding="utf-8")
+        self.assertFalse(eneo_state.heartbeat(root=str(root)))
+        (state_dir / "heartbeat").write_text(f"{int(epoch) - 61} {stamp}\n", encoding="utf-8")
+        run_env_sh(f"source {state_sh}; eneo_task_heartbeat", env=env)
+        self.assertNotEqual((state_dir / "heartbeat").read_text(encoding="utf-8").split()[0], str(int(epoch) - 61))
+
+    def test_transactions_apply_task_wave_and_phase_together_or_not_at_all(self) -> None:
+        state_sh = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "lib" / "state.sh"
+        task_expr = ".wave = ($w | tonumber) | .wave_total = 2 | .active_agents = $a"
+        wave_expr = '{"wave": 1, "expected": 2, "done": 0, "status": "in-progress"}'
+        bash_root, python_root = self.make_repo_root(), self.make_repo_root()
+        for root in (bash_root, python_root):
+            eneo_state.init("demo", "standard", 2, "none", "none", root=str(root))
+
+        committed = run_env_sh(
+            f"source {state_sh}; eneo_tx_begin"
+            f" && eneo_tx_task '{task_expr}' w 1 json:a '[\"Plan\",\"Explore\"]'"
+            " && eneo_tx_patch put wave_status 1 in_progress && eneo_tx_patch remove active_agents Plan"
+            f" && eneo_tx_phase RED && eneo_tx_wave '{wave_expr}' && eneo_tx_commit",
+            env={"CLAUDE_PROJECT_DIR": str(bash_root), "ENEO_TRACE": "0"},
+        )
+        self.assertEqual(committed.returncode, 0, committed.stderr)
+        cli = subprocess.run(
+            [
+                str(REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-task-tx"),
+                "--task", task_expr, "w", "1", "json:a", '["Plan","Explore"]',
+                "--patch", "put", "wave_status", "1", "in_progress", "--patch", "remove", "active_agents", "Plan",
+                "--phase", "RED", "--wave", wave_expr,
+            ],
+            text=True, capture_output=True, check=False,
+            env={**os.environ, "CLAUDE_PROJECT_DIR": str(python_root), "ENEO_TRACE": "0"},
+        )
+        self.assertEqual(cli.returncode, 0, cli.stderr)
+
+        for root in (bash_root, python_root):
+            state_dir = root / ".claude" / "state"
+            task = read_json(state_dir / "current-task.json")
+            self.assertEqual(
+                [task["wave"], task["active_agents"], task["wave_status"], task["tdd_phase"]],
+                [1, ["Explore"], {"1": "in_progress"}, "RED"],
+            )
+            self.assertEqual(read_json(state_dir / "wave.json")["expected"], 2)
+            self.assertEqual((state_dir / "phase").read_text(), "RED\n")
+            self.assertFalse((state_dir / "current-task.journal").exists())
+            self.assertIn("TASK_WAVE_BAR='▒░'", (state_dir / "current-task.view").read_text())
+
+        # Patches alone become one journal append; the snapshot is not rewritten.
+        state_dir = python_root / ".claude" / "state"
+        snapshot = (state_dir / "current-task.json").read_bytes()
+        with eneo_state.Transaction(str(python_root)) as tx:
+            tx.patch("put", "wave_status", "done", "1")
+            tx.patch("set", "active_agents", [])
+            tx.wave(".done = $d", {"d": 1})
+        self.assertEqual((state_dir / "current-task.json").read_bytes(), snapshot)
+        journal = (state_dir / "current-task.journal").read_text().splitlines()
+        self.assertEqual([json.loads(line).get("op") for line in journal], [None, "put", "set"])
+        self.assertEqual(eneo_state.load(str(python_root))["wave_status"], {"1": "done"})
+
+        # A failing expression for any file leaves every file untouched.
+        before = {path.name: path.read_bytes() for path in state_dir.iterdir() if path.is_file()}
+        tx = eneo_state.Transaction(str(python_root))
+        tx.task(".status = $s", {"s": "blocked"})
+        tx.phase("GREEN")
+        with self.assertRaises(ValueError):
+            tx.task(".note = $s", {"s": "other"})
+        tx.wave('error("boom")')
+        with self.assertRaises(eneo_state.StateError):
+            tx.commit()
+        failed = run_env_sh(
+            f"source {state_sh}; eneo_tx_begin; eneo_tx_task '.status = \"blocked\"'; eneo_tx_phase GREEN;"
+            " eneo_tx_wave 'error(\"boom\")'; eneo_tx_commit || echo \"rc=$?\"",
+            env={"CLAUDE_PROJECT_DIR": str(python_root), "ENEO_TRACE": "0"},
+        )
+        self.assertIn("rc=1", failed.stdout)
+        self.assertIn("nothing written", failed.stderr)
+        self.assertEqual({path.name: path.read_bytes() for path in state_dir.iterdir() if path.is_file()}, before)
+
+        # A write that fails after others landed is reported, not swallowed.
+        (state_dir / "phase").unlink()
+        (state_dir / "phase").mkdir()
+        with self.assertRaisesRegex(eneo_state.StateError, "partly applied: wrote current-task.json; failed on phase"):
+            with eneo_state.Transaction(str(python_root)) as tx:
+                tx.task(".status = $s", {"s": "blocked"})
+                tx.phase("GREEN")
+        partial = run_env_sh(
+            f"source {state_sh}; eneo_tx_begin; eneo_tx_task '.status = \"active\"'; eneo_tx_phase RED;"
+            " eneo_tx_commit || echo \"rc=$?\"",
+            env={"CLAUDE_PROJECT_DIR": str(python_root), "ENEO_TRACE": "0"},
+        )
+        self.assertIn("rc=1", partial.stdout)
+        self.assertIn("partly applied: wrote current-task.json; failed on phase", partial.stderr)
+        self.assertEqual(read_json(state_dir / "current-task.json")["status"], "active")
+
+        # The journal holds one record per line, so a json: value may not span lines.
+        for command in (
+            f"source {state_sh}; eneo_task_patch set waves $'json:[1,\\n2]' || echo \"rc=$?\"",
+            f"python3 {state_sh.with_suffix('.py')} patch set waves $'json:[1,\\n2]' || echo \"rc=$?\"",
+        ):
+            refused = run_env_sh(command, env={"CLAUDE_PROJECT_DIR": str(python_root), "ENEO_TRACE": "0"})
+            self.assertIn("rc=2", refused.stdout)
+            self.assertIn("must be on one line", refused.stderr)
+        self.assertNotIn("waves", eneo_state.load(str(python_root)))
+
+    def test_pre_tool_use_dispatcher_runs_each_matcher_once_in_policy_order(self) -> None:
+        hooks = read_json(REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "hooks.json")["hooks"]["PreToolUse"]
+        self.assertEqual(
+            [(entry["matcher"], [hook["command"].rsplit("/", 1)[-1] for hook in entry["hooks"]]) for entry in hooks],
+            [("Edit|Write|MultiEdit", ["dispatch.sh"]), ("Bash", ["dispatch.sh"])],
+        )
+
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / "phase").write_text("GREEN\n", encoding="utf-8")
+        write_json(root / ".claude" / "state" / "current-task.json", {"slug": "demo"})
+        dispatch = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "dispatch.py"
+        env = {"CLAUDE_PROJECT_DIR": str(root)}
+
+        def run(tool: str, tool_input: dict | None = None) -> subprocess.CompletedProcess[str]:
+            payload = {"tool_name": tool, "tool_input": tool_input or {}}
+            return subprocess.run(
+                [sys.executable, str(dispatch)],
+                input=json.dumps(payload),
+                text=True,
+                capture_output=True,
+                env={**os.environ, **env},
+                check=False,
+            )
+
+        test_edit = run("Edit", {"file_path": f"{root}/backend/tests/test_demo.py"})
+        self.assertEqual(test_edit.returncode, 2)
+        self.assertIn("run '/eneo-start demo --phase red' to unfreeze", test_edit.stderr)
+        self.assertEqual(run("Write", {"file_path": f"{root}/backend/.env"}).returncode, 2)
+        self.assertEqual(run("Edit", {"file_path": f"{root}/backend/src/intric/demo.py"}).returncode, 0)
+        self.assertEqual(run("Bash", {"command": "echo x > backend/tests/test_demo.py"}).returncode, 2)
+        self.assertEqual(run("Bash", {"command": "ls backend/tests/"}).returncode, 0)
+        self.assertEqual(run("Read").returncode, 0)
+
+    def test_dispatch_sh_settles_unblockable_calls_in_bash_and_agrees_with_dispatch_py(self) -> None:
+        root = self.make_repo_root()
+        write_json(root / ".claude" / "state" / "current-task.json", {"slug": "demo"})
+        hooks = REPO_ROOT / "plugins" / "eneo-standards" / "hooks"
+        # A python3 on PATH that records every start before running the real one.
+        shim_dir = Path(tempfile.mkdtemp(prefix="eneo-py-shim-"))
+        starts = shim_dir / "starts"
+        shim = shim_dir / "python3"
+        shim.write_text(f'#!/bin/sh\necho x >> "{starts}"\nexec "{sys.executable}" "$@"\n', encoding="utf-8")
+        shim.chmod(0o755)
+        env = {**os.environ, "CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "0", "ENEO_DECISION_CACHE": "0",
+               "ENEO_CTX": "", "PATH": f"{shim_dir}:{os.environ['PATH']}"}
+
+        def run(script: str, payload: dict) -> tuple[int, str, int]:
+            before = len(starts.read_text().splitlines()) if starts.exists() else 0
+            cmd = [str(hooks / "dispatch.sh")] if script == "sh" else [sys.executable, str(hooks / "dispatch.py")]
+            result = subprocess.run(cmd, input=json.dumps(payload), text=True, capture_output=True, env=env, check=False)
+            after = len(starts.read_text().splitlines()) if starts.exists() else 0
+            return result.returncode, result.stderr, after - before
+
+        edits = [
+            f"{root}/backend/src/intric/demo.py", f"{root}/backend/tests/test_demo.py", f"{root}/README.md",
+            f"{root}/backend/.env", f"{root}/uv.lock", f"{root}/.claude/state/phase", f"{root}/frontend/a.spec.ts", "",
+        ]
+        commands = [
+            "ls -la backend/tests", "uv run pytest -q 2>&1 | tail -5", "git status >/dev/null", "cat uv.lock",
+            "echo x > backend/tests/test_a.py", "rm -rf backend/tests", "git rm -rf backend/tests/",
+            "bash -ec 'echo x > uv.lock'", "echo `tee .env </dev/null`", "sudo -u root tee .env",
+            "cat <<EOF > backend/src/intric/a.py", 'echo "x" >> .env', "sed -i s/a/b/ backend/tests/test_a.py",
+            "python3 -c 1 >&2", "echo ok > /dev/null; echo done > out.txt", 'git commit -m "fix: a\\tb"',
+            'r"m" -r backend/tests', "c\\p a uv.lock", "grep -n 'x' README.md 2>/dev/null", "cd backend &&\nuv run pytest",
+        ]
+        settled: set[str] = set()
+        for phase in ("FREE", "RED", "GREEN"):
+            (root / ".claude" / "state" / "phase").write_text(f"{phase}\n", encoding="utf-8")
+            cases = [{"tool_name": tool, "tool_input": {"file_path": path, "content": "x"}} for path in edits
+                     for tool in ("Edit", "Write")]
+            cases += [{"tool_name": "Bash", "tool_input": {"command": command, "description": "x"}} for command in commands]
+            cases += [{"tool_name": "Read", "tool_input": {"file_path": f"{root}/.env"}}]
+            for payload in cases:
+                code, stderr, spawned = run("sh", payload)
+                self.assertEqual((code, stderr), run("py", payload)[:2], (phase, payload))
+                if spawned == 0:
+                    self.assertEqual(code, 0)
+                    settled.add(json.dumps(payload["tool_input"]))
+        self.assertIn(json.dumps({"command": "ls -la backend/tests", "description": "x"}), settled)
+        self.assertIn(json.dumps({"command": "uv run pytest -q 2>&1 | tail -5", "description": "x"}), settled)
+        self.assertIn(json.dumps({"command": 'git commit -m "fix: a\\tb"', "description": "x"}), settled)
+        self.assertIn(json.dumps({"file_path": f"{root}/README.md", "content": "x"}), settled)
+        self.assertIn(json.dumps({"file_path": f"{root}/backend/src/intric/demo.py", "content": "x"}), settled)
+
+        # Large payloads go to Python whole (the loop above ends in GREEN).
+        big = {"tool_name": "Write", "tool_input": {"file_path": f"{root}/backend/tests/test_big.py", "content": "x = 1\n" * 5000}}
+        self.assertEqual(run("sh", big)[::2], (2, 1))
+
+        # A repo override of the path table is only read by path_policy.py.
+        (root / ".claude" / "config").mkdir(parents=True)
+        write_json(root / ".claude" / "config" / "path-policy.json", {"classes": {"secret": ["*/README.md"]}})
+        self.assertEqual(run("sh", {"tool_name": "Edit", "tool_input": {"file_path": f"{root}/README.md"}})[::2], (2, 1))
+
+    def test_hook_daemon_answers_forwarded_payloads_from_warm_state(self) -> None:
+        root = self.make_repo_root()
+        phase_file = root / ".claude" / "state" / "phase"
+        phase_file.write_text("GREEN\n", encoding="utf-8")
+        write_json(root / ".claude" / "state" / "current-task.json", {"slug": "demo"})
+        env = {
+            "CLAUDE_PROJECT_DIR": str(root),
+            "TMPDIR": tempfile.mkdtemp(prefix="eneo-hookd-"),
+            "ENEO_SESSION_ID": "daemon-test",
+            "ENEO_HOOK_DAEMON": "1",
+            "ENEO_CTX": "",
+        }
+        dispatch = REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "dispatch.py"
+        test_edit = json.dumps({"tool_name": "Edit", "tool_input": {"file_path": f"{root}/backend/tests/test_demo.py"}})
+
+        with mock.patch.dict(os.environ, env):
+            sock_path = hook_daemon.socket_path()
+            # No daemon yet: the client asks for one and answers in-process.
+            with mock.patch.object(hook_daemon, "start_daemon") as start:
+                self.assertIsNone(hook_daemon.forward([], test_edit.encode("utf-8")))
+            start.assert_called_once_with(sock_path)
+
+            Path(sock_path).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            threading.Thread(target=hook_daemon.serve, args=(sock_path, 5), daemon=True).start()
+            deadline = time.monotonic() + 5
+            while not Path(sock_path).exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            def run() -> subprocess.CompletedProcess[str]:
+                return subprocess.run(
+                    [sys.executable, str(dispatch)], input=test_edit, text=True,
+                    capture_output=True, env=dict(os.environ), check=False,
+                )
+
+            blocked = run()
+            self.assertEqual(blocked.returncode, 2)
+            self.assertIn("run '/eneo-start demo --phase red' to unfreeze", blocked.stderr)
+            phase_file.write_text("RED\n", encoding="utf-8")
+            self.assertEqual(run().returncode, 0)
+
+            snapshot = hook_daemon.status()
+
+            # A socket directory that is not ours alone is never trusted: the
+            # client answers in-process and no daemon is started into it.
+            os.chmod(Path(sock_path).parent, 0o755)
+            with mock.patch.object(hook_daemon, "_exchange") as exchange:
+                self.assertIsNone(hook_daemon.forward([], test_edit.encode("utf-8")))
+                self.assertIsNone(hook_daemon.status())
+            exchange.assert_not_called()
+            self.assertFalse(hook_daemon.start_daemon(sock_path))
+            self.assertEqual(hook_daemon.serve(sock_path, 1), 1)
+            os.chmod(Path(sock_path).parent, 0o700)
+        assert snapshot is not None
+        self.assertEqual(snapshot["requests"], 2)
+        self.assertEqual((snapshot["root"], snapshot["phase"], snapshot["slug"]), (str(root), "RED", "demo"))
+
+    def test_hook_daemon_redetects_mode_when_env_cache_changes(self) -> None:
+        root = self.make_repo_root()
+        cache = root / ".claude" / "state" / ".cache" / "env.json"
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text('{"mode":"native"}\n', encoding="utf-8")
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_CTX": "", "ENEO_ENV_CACHE": "1"}
+
+        with mock.patch.dict(os.environ, env), mock.patch.object(
+            eneo_env, "detect_env", side_effect=["native", "host-with-docker"]
+        ) as detect:
+            warm = hook_daemon.WarmState()
+            self.assertEqual(warm.mode(), "native")
+            self.assertEqual(warm.mode(), "native")
+            self.assertEqual(detect.call_count, 1)
+            cache.write_text('{"mode":"host-with-docker","container":"eneo"}\n', encoding="utf-8")
+            self.assertEqual(warm.mode(), "host-with-docker")
+            self.assertEqual(detect.call_count, 2)
+
+        # Every module the daemon's answers depend on keys its socket.
+        for name in ("decision_cache.py", "hook_trace.py", "path_policy.py", "policies.py", "env.py"):
+            self.assertIn(name, hook_daemon._SOURCES)
+
+    def test_hooks_record_spans_and_eneo_hook_trace_summarizes_them(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "state" / "phase").write_text("GREEN\n", encoding="utf-8")
+        hooks = REPO_ROOT / "plugins" / "eneo-standards" / "hooks"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": ""}
+        edit = {"tool_name": "Edit", "tool_input": {"file_path": f"{root}/backend/tests/test_demo.py"}}
+        timings = root / ".claude" / "stats" / "hook-timings.jsonl"
+
+        # Without .claude/stats/ nothing is recorded unless ENEO_TRACE=1.
+        run_shell_script(hooks / "protect-files.sh", edit, env=env)
+        self.assertFalse(timings.exists())
+        run_shell_script(hooks / "session-start-context.sh", {}, env={**env, "ENEO_TRACE": "1"})
+        run_shell_script(hooks / "phase-gate.sh", edit, env=env)
+
+        spans = [json.loads(line) for line in timings.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(
+            [(span["hook"], span["event"], span["exit"]) for span in spans],
+            [("session-start-context", "SessionStart", 0), ("dispatch", "PreToolUse", 2)],
+        )
+        for span in spans:
+            self.assertGreater(span["dur_us"], 0)
+            self.assertTrue(span["spawns"] is None or span["spawns"] >= 0)
+
+        chrome = root / "trace.json"
+        result = run_executable(
+            REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-hook-trace",
+            "--file", str(timings), "--chrome", str(chrome), "--json",
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        rows = json.loads(result.stdout)
+        self.assertEqual(sorted((row["hook"], row["count"]) for row in rows), [("dispatch", 1), ("session-start-context", 1)])
+        events = read_json(chrome)["traceEvents"]
+        self.assertEqual({(event["name"], event["ph"]) for event in events}, {("dispatch", "X"), ("session-start-context", "X")})
+
+    def test_trace_span_keeps_an_exit_trap_set_before_it(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "stats").mkdir(parents=True)
+        script = root / "own-trap.sh"
+        script.write_text(
+            "set -euo pipefail\n"
+            "trap 'rc=$?; echo \"cleanup rc=$rc\"' EXIT\n"
+            f"source '{REPO_ROOT}/plugins/eneo-standards/hooks/lib/env.sh'\n"
+            "eneo_trace_begin own-trap Test\n"
+            "exit 3\n",
+            encoding="utf-8",
+        )
+
+        result = run_shell_script(script, {}, env={"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": ""})
+        self.assertEqual(result.returncode, 3, result.stderr)
+        self.assertEqual(result.stdout, "cleanup rc=3\n")
+        span = json.loads((root / ".claude" / "stats" / "hook-timings.jsonl").read_text(encoding="utf-8"))
+        self.assertEqual((span["hook"], span["exit"]), ("own-trap", 3))
+
+    def test_trace_span_without_epochrealtime_is_valid_json(self) -> None:
+        root = self.make_repo_root()
+        (root / ".claude" / "stats").mkdir(parents=True)
+        # bash < 5 has no EPOCHREALTIME, and BSD date prints %N literally.
+        bin_dir = root / "bin"
+        bin_dir.mkdir()
+        fake_date = bin_dir / "date"
+        real_date = shutil.which("date")
+        fake_date.write_text(
+            f'#!/usr/bin/env bash\nif [[ "$1" == "+%s.%N" ]]; then exec {real_date} +%s.N; fi\nexec {real_date} "$@"\n',
+            encoding="utf-8",
+        )
+        fake_date.chmod(0o755)
+        script = root / "no-clock.sh"
+        script.write_text(
+            "unset EPOCHREALTIME\n"
+            "set -euo pipefail\n"
+            f"source '{REPO_ROOT}/plugins/eneo-standards/hooks/lib/env.sh'\n"
+            "eneo_trace_begin no-clock Test\n"
+            "exit 0\n",
+            encoding="utf-8",
+        )
+
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_TRACE": "", "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+        result = run_shell_script(script, {}, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        span = json.loads((root / ".claude" / "stats" / "hook-timings.jsonl").read_text(encoding="utf-8"))
+        self.assertEqual(span["hook"], "no-clock")
+        self.assertGreater(span["start_us"], 10**15)
+        self.assertGreaterEqual(span["dur_us"], 0)
+
+    def test_hook_profile_counts_spawns_per_binary_in_bash_and_python(self) -> None:
+        root = self.make_repo_root()
+        self.write_task_state(root, active_agents=[])
+        hooks = REPO_ROOT / "plugins" / "eneo-standards" / "hooks"
+        env = {"CLAUDE_PROJECT_DIR": str(root), "ENEO_HOOK_PROFILE": "stats"}
+
+        result = run_shell_script(hooks / "user-prompt-audit.sh", {"prompt": "hello"}, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        profile = json.loads((root / ".claude" / "stats" / "hook-profile.jsonl").read_text(encoding="utf-8"))
+        self.assertEqual(profile["hook"], "user-prompt-audit")
+        self.assertGreaterEqual(profile["bins"]["jq"]["n"], 1)
+        self.assertGreater(profile["bins"]["jq"]["ms"], 0)
+        # The timestamp is UTC whatever the local zone, and without
+        # EPOCHREALTIME (bash < 5) the wrappers still time every call.
+        (root / ".claude" / "stats" / "hook-profile.jsonl").unlink()
+        script = root / "no-clock.sh"
+        script.write_text(
+            "unset EPOCHREALTIME\n"
+            "set -euo pipefail\n"
+            f"source '{REPO_ROOT}/plugins/eneo-standards/hooks/lib/env.sh'\n"
+            "jq -n 1 >/dev/null\n",
+            encoding="utf-8",
+        )
+        before = int(time.time())
+        result = run_shell_script(script, {}, env={**env, "TZ": "Asia/Tokyo"})
+        self.assertEqual((result.returncode, result.stderr), (0, ""))
+        profile = json.loads((root / ".claude" / "stats" / "hook-profile.jsonl").read_text(encoding="utf-8"))
+        self.assertEqual(profile["bins"]["jq"]["n"], 1)
+        utc = {time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)) for t in range(before, int(time.time()) + 1)}
+        self.assertIn(profile["ts"], utc)
+
+        python = subprocess.run(
+            [sys.executable, "-c", "import env; env.get_changed_python_files(env.find_repo_root())"],
+            text=True, capture_output=True, check=False,
+            cwd=str(hooks / "lib"), env={**os.environ, **env, "ENEO_HOOK_PROFILE": "1"},
+        )
+        self.assertRegex(python.stderr, r"\[eneo-profile\] -c: \d+ spawns, .*git \d+×")
+
+        ranked = run_executable(
+            REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-hook-trace",
+            "--profile", "--json", "--file", str(root / ".claude" / "stats" / "hook-profile.jsonl"),
+        )
+        self.assertEqual(ranked.returncode, 0, ranked.stderr)
+        self.assertIn("jq", [row["bin"] for row in json.loads(ranked.stdout)])
+
+    def test_bench_corpus_replays_and_flags_regressions_against_baseline(self) -> None:
+        sys.path.insert(0, str(REPO_ROOT / "tests" / "bench"))
+        try:
+            import run_bench  # type: ignore[import-not-found]
+        finally:
+            sys.path.pop(0)
+
+        cases = run_bench.load_corpus()
+        baseline = read_json(run_bench.BASELINE)
+        self.assertEqual(set(cases), set(baseline["cases"]))
+        self.assertEqual(
+            {case["event"] for case in cases.values()},
+            {"PreToolUse", "Stop", "SubagentStop", "UserPromptSubmit", "StatusLine"},
+        )
+        for case in cases.values():
+            self.assertTrue((run_bench.PLUGIN_DIR / case["hook"]).is_file(), case["hook"])
+
+        result = run_bench.run_case("pre_tool_use_write_env", cases["pre_tool_use_write_env"], runs=1)
+        self.assertGreater(result["p50_ms"], 0)
+
+        base = {"cases": {"demo": {"p50_ms": 10.0, "spawns": 4}}}
+        self.assertEqual(run_bench.compare({"demo": {"p50_ms": 12.0, "spawns": 5}}, base, 25, 1), [])
+        self.assertEqual(len(run_bench.compare({"demo": {"p50_ms": 13.0, "spawns": 6}}, base, 25, 1)), 2)
+        # A loaded machine scales the limit; a case may widen the threshold.
+        base["calibration"] = {"bash": 2.0}
+        slow = {"demo": {"p50_ms": 16.0, "spawns": 4, "runtime": "bash"}}
+        self.assertEqual(run_bench.compare(slow, base, 25, 1, {"bash": 3.0}), [])
+        self.assertEqual(len(run_bench.compare(slow, base, 25, 1, {"bash": 2.0})), 1)
+        self.assertEqual(run_bench.compare({"demo": {**slow["demo"], "threshold_pct": 60}}, base, 25, 1), [])
+
+        # A checkout without the case's hook replays what its hooks.json registers.
+        old = Path(tempfile.mkdtemp(prefix="eneo-bench-old-"))
+        write_json(old / "hooks" / "hooks.json", {"hooks": {"PreToolUse": [
+            {"matcher": "Edit|Write", "hooks": [{"command": "${CLAUDE_PLUGIN_ROOT}/hooks/a.sh"},
+                                                {"command": "${CLAUDE_PLUGIN_ROOT}/hooks/b.py"}]},
+            {"matcher": "Bash", "hooks": [{"command": "${CLAUDE_PLUGIN_ROOT}/hooks/c.sh"}]},
+        ]}})
+        commands = run_bench.case_commands(cases["pre_tool_use_write_env"], old)
+        self.assertEqual([argv[-1] for argv in commands], [f"{old}/hooks/a.sh", f"{old}/hooks/b.py"])
+        self.assertEqual(run_bench.runtime(commands), "python")
+
+    def test_eneo_validate_dispatches_subcommands_without_uv(self) -> None:
+        root = self.make_repo_root()
+        entry = REPO_ROOT / "plugins" / "eneo-standards" / "bin" / "eneo-validate"
+        target = root / "backend" / "src" / "intric" / "demo.py"
+        target.write_text("x = 1\n", encoding="utf-8")
+
+        def validate(*args: str) -> subprocess.CompletedProcess[str]:
+            return subprocess.run(
+                [sys.executable, str(entry), *args],
+                capture_output=True, text=True, cwd=root, check=False,
+                env={**os.environ, "CLAUDE_PROJECT_DIR": str(root)},
+            )
+
+        self.assertEqual(validate("validate-new-file", "--must-not-exist", "--path", str(root / "absent.py")).returncode, 0)
+        clash = validate("validate-new-file", "--must-not-exist", "--path", str(target))
+        self.assertEqual(clash.returncode, 2)
+        self.assertIn("already exists", clash.stderr)
+        unknown = validate("no-such-validator")
+        self.assertEqual(unknown.returncode, 2)
+        self.assertIn("ratchet-check", unknown.stderr)
+        for module in (REPO_ROOT / "plugins" / "eneo-standards" / "hooks" / "validators").glob("[a-z]*.py"):
+            self.assertNotIn("uv run", module.read_text(encoding="utf-8").splitlines()[0], module.name)
+
     def test_wave_barrier_counts_done_and_marks_in_progress(self) -> None:
         root = self.make_repo_root()
         write_json(
@@ -335,7 +1911,7 @@ All checks pass.
         self.assertIn("1/2 (in-progress)", result.stderr)
 
         wave = read_json(root / ".claude" / "state" / "wave.json")
-        task = read_json(root / ".claude" / "state" / "current-task.json")
+        task = eneo_state.load(str(root))
         self.assertEqual(wave["done"], 1)
         self.assertEqual(wave["status"], "in-progress")
         self.assertEqual(task["wave_status"]["1"], "in_progress")
@@ -387,7 +1963,7 @@ All checks pass.
         self.assertEqual(result.returncode, 0, result.stderr)
 
         wave = read_json(root / ".claude" / "state" / "wave.json")
-        task = read_json(root / ".claude" / "state" / "current-task.json")
+        task = eneo_state.load(str(root))
         self.assertEqual(wave["done"], 0)
         self.assertEqual(wave["status"], "in-progress")
         self.assertEqual(task["wave_status"]["1"], "in_progress")
@@ -410,7 +1986,7 @@ All checks pass.
         )
 
         self.assertEqual(result.returncode, 0, result.stderr)
-        task = read_json(root / ".claude" / "state" / "current-task.json")
+        task = eneo_state.load(str(root))
         self.assertEqual(task["active_agents"], ["Explore", "Plan"])
 
     def test_commit_preflight_flags_junk_and_security_sensitive_paths(self) -> None: